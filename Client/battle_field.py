@@ -1,4 +1,108 @@
+import codecs
 from enum import Enum
+from functools import lru_cache
+from random import choice, shuffle
+
+CLASSIC_FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)  # Ship lengths of the classic rules
+RANDOM_PLACEMENT_TRIES = 20  # Random placements drawn for a ship before going through all the free ones
+
+
+@lru_cache(maxsize=None)
+def ship_placements(width: int, height: int, length: int) -> tuple:
+    """
+    All the ways a ship of the given length fits on the field, computed once per field size.
+    Every placement is the bitmask of its cells (bit row * width + col) and the bitmask of the cells around it.
+    """
+    placements = []
+    orientations = [(0, 1)] if length == 1 else [(0, 1), (1, 0)]
+    for row in range(height):
+        for col in range(width):
+            for d_row, d_col in orientations:
+                if row + d_row * (length - 1) >= height or col + d_col * (length - 1) >= width:
+                    continue
+                mask = 0
+                for k in range(length):
+                    mask |= 1 << ((row + d_row * k) * width + col + d_col * k)
+
+                halo = 0
+                for k in range(-1, length + 1):
+                    for side in (-1, 0, 1):
+                        r = row + d_row * k + d_col * side
+                        c = col + d_col * k + d_row * side
+                        if 0 <= r < height and 0 <= c < width:
+                            halo |= 1 << (r * width + c)
+                placements.append((mask, halo & ~mask))
+    return tuple(placements)
+
+
+# The 4 cells of every packed byte (first cell in the lowest bits) and back.
+_PACKED_CELLS = {byte: "".join(".SHM"[byte >> (2 * k) & 3] for k in range(4)) for byte in range(256)}
+_PACKED_BYTES = {cells: byte for byte, cells in _PACKED_CELLS.items()}
+
+
+class PackedBoard:
+    """
+    A field packed into 2 bits per cell ("." 0, "S" 1, "H" 2, "M" 3), the way the server sends fields
+    to clients that support it: a 10x10 field takes 25 bytes of cells, 27 with the size prefix,
+    instead of 264 for the pickled list of rows.
+    The format is the same as the server's board.PackedBoard.
+    """
+
+    __slots__ = ("width", "height", "data")
+
+    HEADER_SIZE = 2  # Width and height, one byte each
+
+    def __init__(self, width, height, data):
+        if width < 1 or height < 1 or len(data) != self.data_size(width, height):
+            raise ValueError("Invalid packed board")
+
+        self.width = width
+        self.height = height
+        self.data = bytes(data)
+
+    @staticmethod
+    def data_size(width, height):
+        return (width * height + 3) // 4
+
+    @classmethod
+    def from_field(cls, field):
+        """
+        Packs a 2D list of cells, 4 cells at a time.
+        """
+        cells = "".join(map("".join, field))
+        cells += "." * (-len(cells) % 4)
+        try:
+            data = bytes([_PACKED_BYTES[cells[i:i + 4]] for i in range(0, len(cells), 4)])
+        except KeyError:
+            raise ValueError("Invalid field") from None
+        return cls(len(field[0]), len(field), data)
+
+    def to_field(self):
+        """
+        Unpacks the cells with a table of the cells of every byte.
+        
+        :return: 2D list of cells.
+        """
+        cells = codecs.charmap_decode(self.data, "strict", _PACKED_CELLS)[0]
+        width = self.width
+        return [list(cells[row * width:(row + 1) * width]) for row in range(self.height)]
+
+    def to_bytes(self):
+        return bytes((self.width, self.height)) + self.data
+
+    @classmethod
+    def from_bytes(cls, buffer, offset=0):
+        """
+        Reads a board written by to_bytes from a bytes-like object (bytes, bytearray, memoryview),
+        starting at offset. Only the board itself is copied.
+        """
+        if len(buffer) < offset + cls.HEADER_SIZE:
+            raise ValueError("Invalid packed board")
+
+        width, height = buffer[offset], buffer[offset + 1]
+        start = offset + cls.HEADER_SIZE
+        return cls(width, height, buffer[start:start + cls.data_size(width, height)])
+
 
 class BattleField:
     """
@@ -11,30 +115,107 @@ class BattleField:
         HIT = 1          # Ship hit
         MISS = 2         # Shot missed
         ALREADY_SHOT = 3 # This cell was already shot
+        SUNK = 4         # Ship hit and sunk
 
-    BATTLE_FIELD_WIDTH = 10    # Battlefield width (10 cells)
-    BATTLE_FIELD_HEIGHT = 10   # Battlefield height (10 cells)
+    BATTLE_FIELD_WIDTH = 10    # Battlefield width of the classic rules (10 cells)
+    BATTLE_FIELD_HEIGHT = 10   # Battlefield height of the classic rules (10 cells)
 
-    def __init__(self, field=None):
+    def __init__(self, field=None, width=BATTLE_FIELD_WIDTH, height=BATTLE_FIELD_HEIGHT):
         """
         Initializes the BattleField instance.
         
-        If a field is provided, it will be used; otherwise, an empty field is created.
+        If a field is provided, it will be used and its size is taken from it;
+        otherwise, an empty field of the given size is created.
         
         :param field: Optional 2D list representing the initial state of the field.
+        :param width: Width of the empty field (the session rules decide it).
+        :param height: Height of the empty field.
         """
         if field:
             self.field = field
+            self.width = len(field[0])
+            self.height = len(field)
         else:
+            self.width = width
+            self.height = height
             self.field = self.create_empty_field()
 
+    @classmethod
+    def from_data(cls, data: dict) -> "BattleField":
+        """
+        Creates the field sent by the server, packed ("board") or as a 2D list ("field").
+        """
+        if "board" in data:
+            return cls(PackedBoard.from_bytes(data["board"]).to_field())
+        return cls(data["field"])
+
+    @classmethod
+    def random_fleet(cls, width=BATTLE_FIELD_WIDTH, height=BATTLE_FIELD_HEIGHT, fleet=CLASSIC_FLEET) -> "BattleField":
+        """
+        Places the fleet at random, going back to the previous ship when one doesn't fit anymore.
+        
+        Ships are placed from the longest one using the precomputed placement bitmasks, so checking a placement
+        is one AND with the cells taken by the ships placed so far and their surroundings.
+        Every ship is drawn uniformly from its free placements: random placements are drawn until a free one
+        comes up (on most boards almost all are free), and only a crowded board makes it go through all of them.
+        
+        :param fleet: Lengths of the ships.
+        :return: A new BattleField with the fleet placed.
+        :raises ValueError: If the fleet doesn't fit on the field.
+        """
+        lengths = sorted(fleet, reverse=True)
+
+        def place(index, ships, blocked):
+            if index == len(lengths):
+                return ships
+
+            placements = ship_placements(width, height, lengths[index])
+
+            tried = None
+            for _ in range(RANDOM_PLACEMENT_TRIES):
+                mask, halo = choice(placements)
+                if not mask & blocked:
+                    result = place(index + 1, ships | mask, blocked | mask | halo)
+                    if result is not None:
+                        return result
+                    tried = mask
+                    break
+
+            free = [placement for placement in placements if not placement[0] & blocked and placement[0] != tried]
+            shuffle(free)
+            for mask, halo in free:
+                result = place(index + 1, ships | mask, blocked | mask | halo)
+                if result is not None:
+                    return result
+            return None
+
+        ships = place(0, 0, 0) if lengths else 0
+        if ships is None:
+            raise ValueError("The fleet doesn't fit on the field.")
+
+        return cls(
+            [["S" if ships >> (row * width + col) & 1 else "." for col in range(width)] for row in range(height)]
+        )
+
     def create_empty_field(self):
         """
         Creates an empty game field filled with '.' characters.
         
-        :return: 2D list of size BATTLE_FIELD_HEIGHT x BATTLE_FIELD_WIDTH filled with '.'.
+        :return: 2D list of size height x width filled with '.'.
+        """
+        return [['.' for _ in range(self.width)] for _ in range(self.height)]
+
+    def get_ships_mask(self) -> int:
+        """
+        Returns the bitmask of the ship cells (bit row * width + col is set for every 'S' cell).
+        The server accepts the fleet in this form, which stays small on any board size.
         """
-        return [['.' for _ in range(self.BATTLE_FIELD_WIDTH)] for _ in range(self.BATTLE_FIELD_HEIGHT)]
+        mask = 0
+        for row, cells in enumerate(self.field):
+            for col, cell in enumerate(cells):
+                if cell == "S":
+                    mask |= 1 << (row * self.width + col)
+        return mask
 
     def can_place_ship(self, ship_length, row, col, orientation):
         """
@@ -56,12 +237,12 @@ class BattleField:
 
         proposed_cells = []
         if orientation.upper() == 'H':
-            if col + ship_length > self.BATTLE_FIELD_WIDTH:
+            if col + ship_length > self.width:
                 return False
             for j in range(col, col + ship_length):
                 proposed_cells.append((row, j))
         else:
-            if row + ship_length > self.BATTLE_FIELD_HEIGHT:
+            if row + ship_length > self.height:
                 return False
             for i in range(row, row + ship_length):
                 proposed_cells.append((i, col))
@@ -76,7 +257,7 @@ class BattleField:
             for dx in [-1, 0, 1]:
                 for dy in [-1, 0, 1]:
                     ni, nj = i + dx, j + dy
-                    if not (0 <= ni < self.BATTLE_FIELD_HEIGHT and 0 <= nj < self.BATTLE_FIELD_WIDTH):
+                    if not (0 <= ni < self.height and 0 <= nj < self.width):
                         continue
                     if (ni, nj) in proposed_cells:
                         continue
@@ -109,7 +290,7 @@ class BattleField:
         :param col: Column index.
         :raises ValueError: If the coordinates are outside the valid range.
         """
-        if not (0 <= row < self.BATTLE_FIELD_HEIGHT and 0 <= col < self.BATTLE_FIELD_WIDTH):
+        if not (0 <= row < self.height and 0 <= col < self.width):
             raise ValueError("Invalid coordinates")
 
     def shoot(self, row, col) -> 'BattleField.ShootState':
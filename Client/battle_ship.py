@@ -1,11 +1,11 @@
 from time import sleep
 from config import Config
-from utils import clear_console
+from utils import clear_console, column_name
 from network import Network
 from user import User
 from enums import UserConnectionStatus, GameDataCode, GameDataType, Errors, ErrorMessages
 from ui import UI
-from battle_field import BattleField
+from battle_field import BattleField, PackedBoard
 from packet import Packet
 
 class BattleShip:
@@ -17,6 +17,7 @@ class BattleShip:
         # Game variables
         self.is_in_session = False
         self.battle_field = None
+        self.rules = None  # Board size and fleet of the current session, sent by the server
 
     def play_game(self):
         if not self.user.is_valid():
@@ -51,6 +52,7 @@ class BattleShip:
                     print(
                         "Game running... (type 'disconnect' to leave from the server)"
                     )
+                    print("Type 'variants' to see the game variants and 'play <variant>' to play one of them.")
             
             if self.is_in_session:
                 sleep(1.0)
@@ -61,10 +63,21 @@ class BattleShip:
             if user_in_lower == "disconnect":
                 self.connection.disconnect()
                 sleep(1)
-            elif user_in_lower == "play" and not self.is_in_session:
+            elif user_in_lower.startswith("play") and not self.is_in_session:
+                # "play <variant>" looks for a game of another variant, e.g. 'play large'.
+                parts = user_in_lower.split()
+                if len(parts) > 1:
+                    self.choose_variant(parts[1])
                 self.connect_to_session()
+            elif user_in_lower == "variants":
+                self.choose_variant()
             elif user_in_lower == "leave" and self.is_in_session:
                 self.leave_session()
+            elif user_in_lower.startswith("watch") and not self.is_in_session:
+                try:
+                    self.spectate_session(int(user_in_lower.split()[1]))
+                except (IndexError, ValueError):
+                    print("Enter the session id to watch (e.g., 'watch 0').")
         
         sleep(0.5)
         clear_console()
@@ -84,6 +97,8 @@ class BattleShip:
             error = request.data
 
             self.handle_error(error)
+        elif request.code == Packet.Code.RULES:
+            self.handle_rules(request.data)
         elif request.code == Packet.Code.UNDEFINED:
             self.connection.disconnect()
             return None
@@ -106,6 +121,12 @@ class BattleShip:
                 #error_msg = "Attempting to access a session to which the player is not connected!"
                 self.on_session_closed()
                 return None
+            elif error["msg"] == ErrorMessages.SESSION_NOT_FOUND.value:
+                error_msg = "There is no session with this id."
+            elif error["msg"] == ErrorMessages.CANNOT_SPECTATE_SESSION.value:
+                error_msg = "This session can't be watched right now."
+            elif error["msg"] == ErrorMessages.UNKNOWN_GAME_VARIANT.value:
+                error_msg = "The server doesn't offer this game variant. Enter 'variants' to see them."
             else:
                 error_msg = error["msg"]
 
@@ -199,6 +220,45 @@ class BattleShip:
     def leave_session(self):
         self.connection.delay_send(Packet(Packet.Code.STATUS, UserConnectionStatus.LEAVE_SESSION.value))
 
+    def choose_variant(self, variant: str = None):
+        """
+        Chooses the game variant (board size and fleet) of the next session, or only asks for the variants without one.
+        """
+        self.connection.delay_send(Packet(Packet.Code.RULES, {"variant": variant} if variant else None))
+
+    def handle_rules(self, data: dict):
+        print(f"Game variant: {data['variant']}. Variants of this server:")
+        for rules in data["variants"]:
+            fleet = ", ".join(str(length) for length in rules["fleet"])
+            print(f"  {rules['variant']}: {rules['width']}x{rules['height']}, ships {fleet}")
+
+    def spectate_session(self, session_id: int):
+        self.connection.delay_send(Packet(Packet.Code.SPECTATE, {"session_id": session_id}))
+
+    def handle_spectator_event(self, event: dict):
+        if event["type"] == "snapshot":
+            print(f"Watching players: {', '.join(event['players'])}.")
+            if "rules" in event:
+                print(f"Game variant: {event['rules']['variant']} ({event['rules']['width']}x{event['rules']['height']}).")
+            for player, board in event.get("boards", {}).items():
+                print(f"{player} shooting field:")
+                self.ui.display_field(BattleField(PackedBoard.from_bytes(board).to_field()))
+            for player, field in event.get("fields", {}).items():
+                print(f"{player} shooting field:")
+                self.ui.display_field(BattleField(field))
+        elif event["type"] == "started":
+            print(f"Game started. Players: {', '.join(event['players'])}.")
+        elif event["type"] == "battle":
+            print(f"Battle started. {event['turn']} shoots first.")
+        elif event["type"] == "shot":
+            row, col = event["coords"]["row"], event["coords"]["col"]
+            state = BattleField.ShootState(event["shoot_state"]).name.replace("_", " ").lower()
+            print(f"{event['player']} shoots {event['target']} at {row} {column_name(col)}: {state}.")
+        elif event["type"] == "winner":
+            print(f"{event['winner']} won the game.")
+        elif event["type"] == "closed":
+            print("The game you were watching has ended. Enter 'play' to find a new session.")
+
     def send_to_session(self, data: dict) -> None:
         if self.is_in_session:
             self.connection.delay_send(Packet(Packet.Code.SESSION_DATA, {"code": GameDataCode.POST_DATA.value, "data": data}))
@@ -211,6 +271,11 @@ class BattleShip:
                 print(f"Connected to session #{data['session_id']}.\nStarting game.")
 
                 self.on_session_connected()
+
+                # Servers without game variants don't send rules, their games are classic.
+                self.rules = data.get("rules")
+                if self.rules:
+                    print(f"Game variant: {self.rules['variant']} ({self.rules['width']}x{self.rules['height']}).")
             elif code == GameDataCode.SESSION_CLOSED.value:
                 self.on_session_closed()
             elif code == GameDataCode.POST_DATA.value:
@@ -219,9 +284,13 @@ class BattleShip:
 
                     if data["type"] == GameDataType.BATTLE_FIELD_REQUIRED.value:
                         if self.battle_field is None:
-                            self.battle_field = self.ui.get_battle_field()
+                            self.battle_field = self.ui.get_battle_field(self.rules)
 
-                        self.send_to_session({"type": GameDataType.BATTLE_FIELD.value, "field": self.battle_field.field})
+                        if self.rules:
+                            # The bitmask of the ship cells keeps the packet small on large boards.
+                            self.send_to_session({"type": GameDataType.BATTLE_FIELD.value, "ships": self.battle_field.get_ships_mask()})
+                        else:
+                            self.send_to_session({"type": GameDataType.BATTLE_FIELD.value, "field": self.battle_field.field})
                         
                     if data["type"] == GameDataType.NOT_YOUR_TURN.value:
                         clear_console()
@@ -231,18 +300,21 @@ class BattleShip:
 
                     if data["type"] == GameDataType.SHOOT_STATE.value:
                         shoot_state = data["shoot_state"]
-                        if shoot_state == BattleField.ShootState.HIT.value:
+                        if shoot_state in (BattleField.ShootState.HIT.value, BattleField.ShootState.SUNK.value):
                             clear_console()
 
-                            print("You hit! You can shoot again.")
-                            row, col = self.ui.get_shoot_coordinates(BattleField(data["field"]))
+                            if shoot_state == BattleField.ShootState.SUNK.value:
+                                print("You sunk a ship! You can shoot again.")
+                            else:
+                                print("You hit! You can shoot again.")
+                            row, col = self.ui.get_shoot_coordinates(BattleField.from_data(data))
 
                             self.send_to_session({"type": GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}})
                         elif shoot_state == BattleField.ShootState.MISS.value:
                             clear_console()
                             print("You missed.")
 
-                            self.battle_field = BattleField(data["field"])
+                            self.battle_field = BattleField.from_data(data)
 
                             sleep(0.5)
                         elif shoot_state == BattleField.ShootState.ALREADY_SHOT.value:
@@ -252,7 +324,7 @@ class BattleShip:
                         clear_console()
 
                         print(f"{data["player"]} field:")
-                        row, col = self.ui.get_shoot_coordinates(BattleField(data["field"]))
+                        row, col = self.ui.get_shoot_coordinates(BattleField.from_data(data))
                         self.send_to_session({"type": GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}})
 
                     if data["type"] == GameDataType.RESULTS.value:
@@ -262,6 +334,8 @@ class BattleShip:
                             else:
                                 print(f"All your ships have been destroyed by player {data["winner"]}")
                             self.game_ended = True
+            elif code == GameDataCode.SPECTATOR_EVENT.value:
+                self.handle_spectator_event(data["event"])
             elif code == GameDataCode.COMPLETE.value:
                 #print("Your ships placement has been successfully confirmed on the server.")
                 pass
@@ -29,6 +29,9 @@ class ErrorMessages(Enum):
     Enumeration for descriptive error messages.
     """
     PLAYER_NOT_IN_ANY_SESSION = 0  # The player is not connected to any session.
+    SESSION_NOT_FOUND = 1          # There is no session with the requested id.
+    CANNOT_SPECTATE_SESSION = 2    # The session can't be watched (closed, full or the user is playing in it).
+    UNKNOWN_GAME_VARIANT = 3       # The server doesn't offer the requested game variant.
 
 class UserConnectionStatus(Enum):
     CONNECTED = 1               # The user is connected.
@@ -47,6 +50,7 @@ class GameDataCode(Enum):
     POST_DATA = 3        # Posting data (e.g. field, coordinate)
     COMPLETE = 4         # Battlefield validation complete
     WAITING = 5          # Waiting (e.g., for other players)
+    SPECTATOR_EVENT = 6  # Notification: an event of the session being watched
 
 class GameDataType(Enum):
     BATTLE_FIELD_REQUIRED = 0  # Request to send the battle field
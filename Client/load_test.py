@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Load generator for the BattleShip server.
+
+Opens many client connections with asyncio and lets every client go through the whole
+protocol: handshake, registration (or login on later runs), matchmaking, ship placement
+and a game of random shots. Latencies of the handshake, the matchmaking wait and every
+shot round trip are collected into histograms and printed with a throughput and error summary.
+
+The server limits (MAX_USERS, MAX_GAME_SESSIONS in Server/settings.py) and the open files limit
+(ulimit -n) must allow the number of clients you start.
+
+Usage: python load_test.py [--host 127.0.0.1] [--port 64221] [--clients 100] [--ramp 50]
+"""
+import argparse
+import asyncio
+from collections import Counter
+from random import choice
+from time import perf_counter
+from uuid import uuid4
+from battle_field import BattleField
+from enums import UserConnectionStatus, GameDataCode, GameDataType
+from packet import Packet, PacketReader
+
+FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)
+
+# Histogram buckets, upper bounds in milliseconds.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class LoadTestError(Exception):
+    """
+    A client failed; the message is the error category used in the summary.
+    """
+
+    pass
+
+
+class Histogram:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.samples: list[float] = []
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds * 1000)
+
+    def percentile(self, percent: float) -> float:
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+    def print(self) -> None:
+        if not self.samples:
+            print(f"{self.name}: no samples")
+            return
+
+        print(
+            f"{self.name}: {len(self.samples)} samples, "
+            f"p50 {self.percentile(50):.1f}ms, p90 {self.percentile(90):.1f}ms, "
+            f"p99 {self.percentile(99):.1f}ms, max {max(self.samples):.1f}ms"
+        )
+
+        counts = Counter()
+        for sample in self.samples:
+            counts[next((bound for bound in BUCKETS if sample <= bound), None)] += 1
+
+        largest = max(counts.values())
+        for bound in BUCKETS + (None,):
+            if counts[bound]:
+                label = f"<= {bound}ms" if bound else f"> {BUCKETS[-1]}ms"
+                bar = "#" * max(1, counts[bound] * 40 // largest)
+                print(f"  {label:>10} {counts[bound]:>8} {bar}")
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.handshake = Histogram("Handshake")
+        self.auth = Histogram("Registration/login")
+        self.matchmaking = Histogram("Matchmaking wait")
+        self.shot = Histogram("Shot round trip")
+
+        self.errors = Counter()
+        self.games = 0
+        self.shots = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+
+
+class PacketStream:
+    """
+    Reads packets from the socket stream (see PacketReader).
+    """
+
+    def __init__(self, reader: asyncio.StreamReader) -> None:
+        self.reader = reader
+        self.packets = PacketReader()
+
+    async def read(self) -> Packet:
+        while True:
+            try:
+                packet = self.packets.next()
+            except ValueError:
+                raise LoadTestError("invalid packet")
+            if packet:
+                return packet
+
+            data = await self.reader.read(65536)
+            if not data:
+                raise LoadTestError("disconnected by server")
+            self.packets.feed(data)
+
+
+class LoadTestClient:
+    def __init__(self, number: int, args: argparse.Namespace, stats: Stats) -> None:
+        self.name = f"{args.prefix}{number}"
+        self.uid = str(uuid4())
+        self.args = args
+        self.stats = stats
+
+        self.stream = None
+        self.writer = None
+
+        self.session_started = False
+        self.session_closed = False
+        self.results = None
+
+    def _send(self, packet: Packet) -> None:
+        self.writer.write(packet.to_bytes())
+        self.stats.packets_sent += 1
+
+    async def _receive(self, codes: tuple) -> Packet:
+        """
+        Reads packets until one with one of the codes arrives.
+        Session notifications received in the meantime are handled on the way.
+        """
+        while True:
+            packet = await asyncio.wait_for(self.stream.read(), self.args.timeout)
+            self.stats.packets_received += 1
+
+            if packet.code == Packet.Code.STATUS and packet.data in (
+                UserConnectionStatus.DISCONNECTED.value,
+                UserConnectionStatus.BANNED.value,
+            ):
+                raise LoadTestError("disconnected by server")
+
+            if packet.code == Packet.Code.SESSION_DATA:
+                code = packet.data.get("code")
+                if code == GameDataCode.SESSION_STARTED.value:
+                    self.session_started = True
+                    continue
+                if code == GameDataCode.SESSION_CLOSED.value:
+                    self.session_closed = True
+                    if Packet.Code.SESSION_DATA in codes:
+                        return packet
+                    continue
+
+            if packet.code in codes:
+                return packet
+
+    async def _request(self, packet: Packet, codes: tuple) -> Packet:
+        """
+        Sends a packet and waits for its reply. The server reads one packet at a time
+        without framing, so only one request may be in flight.
+        """
+        self._send(packet)
+        await self.writer.drain()
+        return await self._receive(codes)
+
+    async def _session_request(self, data: dict) -> Packet:
+        reply = await self._request(
+            Packet(Packet.Code.SESSION_DATA, data),
+            (Packet.Code.SESSION_DATA, Packet.Code.ERROR),
+        )
+        if reply.code == Packet.Code.ERROR:
+            raise LoadTestError(f"error packet {reply.data.get('error_code') if reply.data else None}")
+        return reply
+
+    async def run(self) -> None:
+        try:
+            await self._connect()
+            await self._authorise()
+            await self._find_session()
+            await self._play()
+            self.stats.games += 1
+        except LoadTestError as e:
+            self.stats.errors[str(e)] += 1
+        except asyncio.TimeoutError:
+            self.stats.errors["timeout"] += 1
+        except OSError as e:
+            self.stats.errors[f"socket error ({e.__class__.__name__})"] += 1
+        except Exception as e:
+            # An unexpected reply fails this client only, the others keep running and the summary is still printed.
+            self.stats.errors[f"unexpected error ({e.__class__.__name__})"] += 1
+        finally:
+            if self.writer:
+                self.writer.close()
+
+    async def _connect(self) -> None:
+        start = perf_counter()
+        try:
+            reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.args.host, self.args.port), self.args.timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            raise LoadTestError("connection failed")
+        self.stream = PacketStream(reader)
+
+        reply = await self._request(
+            Packet(Packet.Code.USERNAME_AND_ID, {"name": self.name, "uid": self.uid}),
+            (Packet.Code.STATUS, Packet.Code.ERROR),
+        )
+        if reply.code == Packet.Code.ERROR:
+            raise LoadTestError(f"handshake rejected ({reply.data.get('error_code')})")
+        if reply.data != UserConnectionStatus.CONNECTED.value:
+            raise LoadTestError(f"handshake rejected (status {reply.data})")
+
+        self.stats.handshake.add(perf_counter() - start)
+
+    async def _authorise(self) -> None:
+        start = perf_counter()
+
+        # The first request of a new user is answered with the registration or login requirement.
+        reply = await self._request(
+            Packet(Packet.Code.PING), (Packet.Code.OK, Packet.Code.STATUS, Packet.Code.ERROR)
+        )
+        if reply.code == Packet.Code.STATUS and reply.data in (
+            UserConnectionStatus.REGISTER_REQUIRED.value,
+            UserConnectionStatus.AUTHORIZATION_REQUIRED.value,
+        ):
+            reply = await self._request(
+                Packet(Packet.Code.PASSWORD, {"password": self.args.password}),
+                (Packet.Code.OK, Packet.Code.ERROR),
+            )
+            if reply.code != Packet.Code.OK:
+                raise LoadTestError("authorisation failed")
+
+            # The reply to the PING that triggered the authorisation.
+            await self._receive((Packet.Code.OK,))
+        elif reply.code != Packet.Code.OK:
+            raise LoadTestError("authorisation failed")
+
+        self.stats.auth.add(perf_counter() - start)
+
+    async def _find_session(self) -> None:
+        start = perf_counter()
+        while not self.session_started:
+            await asyncio.sleep(self.args.poll)
+            await self._request(Packet(Packet.Code.PING), (Packet.Code.OK, Packet.Code.ERROR))
+
+        self.stats.matchmaking.add(perf_counter() - start)
+
+    async def _play(self) -> None:
+        reply = await self._session_request(
+            {
+                "code": GameDataCode.POST_DATA.value,
+                "data": {"type": GameDataType.BATTLE_FIELD.value, "field": random_field()},
+            }
+        )
+
+        while not self.session_closed and self.results is None:
+            code = reply.data.get("code")
+            data = reply.data.get("data") or {}
+
+            if code == GameDataCode.POST_DATA.value and data.get("type") == GameDataType.BATTLE_FIELD.value:
+                reply = await self._shoot(data["field"])
+                continue
+            if code == GameDataCode.POST_DATA.value and data.get("type") == GameDataType.RESULTS.value:
+                self.results = data["winner"]
+                break
+            if code == GameDataCode.POST_DATA.value and data.get("type") == GameDataType.BATTLE_FIELD_REQUIRED.value:
+                raise LoadTestError("battle field rejected")
+
+            # Waiting for the opponent: their field or their turn.
+            await asyncio.sleep(self.args.poll)
+            reply = await self._session_request({"code": GameDataCode.GET_DATA.value})
+
+        if self.results is None:
+            raise LoadTestError("session closed before the end of the game")
+
+        # Leaving before the session is closed would end it for the opponent before they see the results.
+        while not self.session_closed:
+            await asyncio.sleep(self.args.poll)
+            await self._request(Packet(Packet.Code.PING), (Packet.Code.OK, Packet.Code.ERROR))
+
+        self._send(Packet(Packet.Code.STATUS, UserConnectionStatus.DISCONNECTED.value))
+        await self.writer.drain()
+
+    async def _shoot(self, field: list[list[str]]) -> Packet:
+        """
+        Shoots at random free cells while hitting, returns the reply that ended the turn.
+        """
+        while True:
+            row, col = choice(
+                [(row, col) for row, cells in enumerate(field) for col, cell in enumerate(cells) if cell == "."]
+            )
+
+            start = perf_counter()
+            reply = await self._session_request(
+                {
+                    "code": GameDataCode.POST_DATA.value,
+                    "data": {"type": GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}},
+                }
+            )
+            self.stats.shot.add(perf_counter() - start)
+            self.stats.shots += 1
+
+            data = reply.data.get("data") or {}
+            if data.get("type") != GameDataType.SHOOT_STATE.value:
+                return reply
+
+            if data["shoot_state"] in (BattleField.ShootState.HIT.value, BattleField.ShootState.SUNK.value):
+                field = data["field"]
+            elif data["shoot_state"] == BattleField.ShootState.ALREADY_SHOT.value:
+                field[row][col] = "M"
+            else:
+                return reply
+
+
+def random_field() -> list[list[str]]:
+    """
+    Places the fleet at random positions.
+    """
+    return BattleField.random_fleet(fleet=FLEET).field
+
+
+async def run_load_test(args: argparse.Namespace) -> Stats:
+    stats = Stats()
+
+    async def start_client(number: int) -> None:
+        await asyncio.sleep(number / args.ramp)
+        await LoadTestClient(number, args, stats).run()
+
+    await asyncio.gather(*(start_client(number) for number in range(args.clients)))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of the BattleShip server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Server address.")
+    parser.add_argument("--port", type=int, default=64221, help="Server port.")
+    parser.add_argument("--clients", type=int, default=100, help="Number of clients (default 100).")
+    parser.add_argument("--ramp", type=float, default=50, help="New connections per second (default 50).")
+    parser.add_argument("--poll", type=float, default=0.2, help="Seconds between requests while waiting (default 0.2).")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for a reply (default 120).")
+    parser.add_argument("--prefix", default="load", help="Prefix of the user names (default 'load').")
+    parser.add_argument("--password", default="load-test", help="Password of the test users.")
+    args = parser.parse_args()
+
+    print(f"Starting {args.clients} clients against {args.host}:{args.port}...")
+
+    start = perf_counter()
+    stats = asyncio.run(run_load_test(args))
+    elapsed = perf_counter() - start
+
+    print()
+    for histogram in (stats.handshake, stats.auth, stats.matchmaking, stats.shot):
+        histogram.print()
+
+    print()
+    print(f"Duration:  {elapsed:.1f}s")
+    print(f"Clients:   {args.clients}, finished a game: {stats.games}, failed: {sum(stats.errors.values())}")
+    print(f"Games:     {stats.games} finished by clients ({stats.games / elapsed:.2f}/s)")
+    print(f"Shots:     {stats.shots} ({stats.shots / elapsed:.1f} shots/s)")
+    print(f"Packets:   {stats.packets_sent} sent, {stats.packets_received} received")
+    if stats.errors:
+        print("Errors:")
+        for error, count in stats.errors.most_common():
+            print(f"  {error}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,11 @@ from enums import ConnectionStatus, UserConnectionStatus, Errors
 from contextlib import suppress
 from time import sleep
 from user import User
-from packet import Packet
+from packet import Packet, PacketReader, FEATURE_PACKED_BOARD
 from select import select
 
+RECV_BUFFER_SIZE = 65536  # Largest packet read at once; fields of the largest boards take a few KB
+
 class Network:
     def __init__(self, user: User, request_handler: Callable[[str], str]) -> None:
         self.user = user
@@ -23,6 +25,9 @@ class Network:
         self.set_default_packet()
         self.next_send_packets = Queue(25)
 
+        # Bytes received from the server, split into packets.
+        self.packets = PacketReader()
+
     def connect(self, ip: str, port: int, max_attempts: int = 5) -> bool:
         if not max_attempts:
             print("Failed to connect to the server!")
@@ -33,13 +38,14 @@ class Network:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(10.0)
             self.socket.connect((ip, port))
+            self.packets = PacketReader()
 
             self.connection_status = ConnectionStatus.CONNECTING
 
             response = self.get(
                 Packet(
                     Packet.Code.USERNAME_AND_ID,
-                    {"name": self.user.name, "uid": self.user.uid},
+                    {"name": self.user.name, "uid": self.user.uid, "features": [FEATURE_PACKED_BOARD]},
                 )
             )
             if response.code == Packet.Code.STATUS:
@@ -134,31 +140,33 @@ class Network:
             print("Disconnected from the server.")
             self.disconnect()
 
-    def _flush_socket(self):
+    def _flush_socket(self) -> None:
+        """
+        Reads the bytes the server has already sent without waiting.
+        """
         while True:
             ready_to_read, _, _ = select([self.socket], [], [], 0)
-            if ready_to_read:
-                try:
-                    flushed = self.socket.recv(1024)
-                    if flushed:
-                        return flushed
-                    else:
-                        break
-                except socket.error:
-                    break
-            else:
+            if not ready_to_read:
                 break
-        return None
+            try:
+                flushed = self.socket.recv(RECV_BUFFER_SIZE)
+            except socket.error:
+                break
+            if not flushed:
+                break
+            self.packets.feed(flushed)
 
     def get(self, data: str = None) -> Packet:
         if not self.connected() and not self.connecting():
             return Packet(Packet.Code.UNDEFINED)
 
         try:
-            buffer = self._flush_socket()
-            if buffer:
-                return Packet(buffer)
-            
+            # Packets received before, e.g. spectator events or packets that came together with the last reply.
+            self._flush_socket()
+            packet = self.packets.next()
+            if packet:
+                return packet
+
             if data:
                 self.send(data)
             elif not self.next_send_packets.empty():
@@ -168,12 +176,16 @@ class Network:
             else:
                 self.send(Packet(Packet.Code.PING, None))
 
-            resp = self.socket.recv(1024)
-            response = Packet(resp)
-
-            # print(f"Get {response}")
+            while True:
+                response = self.packets.next()
+                if response:
+                    # print(f"Get {response}")
+                    return response
 
-            return response
+                received = self.socket.recv(RECV_BUFFER_SIZE)
+                if not received:
+                    raise ConnectionError("The server has closed the connection")
+                self.packets.feed(received)
         except socket.timeout:
             print("Error: Timeout. Most likely the server is overloaded or not working at the moment")
             return Packet(Packet.Code.UNDEFINED)
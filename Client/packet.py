@@ -1,6 +1,9 @@
 from enum import Enum
-from pickle import dumps, loads
+from io import BytesIO
+from pickle import Unpickler, UnpicklingError, dumps, loads
 
+# Optional protocol features the client lists in the "features" of its USERNAME_AND_ID packet.
+FEATURE_PACKED_BOARD = "packed_board"  # Fields are received as PackedBoard bytes ("board") instead of lists of rows ("field").
 
 class Packet:
     class Code(Enum):
@@ -12,6 +15,8 @@ class Packet:
         USERNAME_AND_ID = 5
         PASSWORD = 6
         SESSION_DATA = 7
+        SPECTATE = 8
+        RULES = 9
 
         @classmethod
         def to_code(cls, value: int) -> "Code":
@@ -66,4 +71,46 @@ class Packet:
         if len(packet) > 2:
             self.data = loads(packet[2:])
         else:
-            self.data = None
\ No newline at end of file
+            self.data = None
+
+
+class PacketReader:
+    """
+    Splits the bytes read from the socket into packets.
+
+    The protocol has no framing, so several packets (e.g. a reply and a spectator event)
+    may arrive in one read, or a packet may arrive in several. A packet is b"H", a code byte and
+    an optional pickle, and a pickle knows where it ends, so the stream is split by unpickling from the buffer.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = b""
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+
+    def next(self) -> Packet:
+        """
+        Takes one complete packet from the buffer, returns None if it isn't complete yet.
+        """
+        if len(self.buffer) < 2:
+            return None
+        if self.buffer[0:1] != b"H":
+            raise ValueError("This package is not valid!")
+
+        # Packets without data are followed by the next packet or nothing; pickles start with PROTO (0x80).
+        if len(self.buffer) == 2 or self.buffer[2] != 0x80:
+            packet = Packet(self.buffer[:2])
+            self.buffer = self.buffer[2:]
+            return packet
+
+        stream = BytesIO(self.buffer)
+        stream.seek(2)
+        try:
+            data = Unpickler(stream).load()
+        except (EOFError, UnpicklingError):
+            return None
+
+        packet = Packet(Packet.Code.to_code(self.buffer[1]), data)
+        self.buffer = self.buffer[stream.tell():]
+        return packet
@@ -6,7 +6,7 @@ Contains functions for displaying menus, boards and handling basic user interact
 from pyfiglet import figlet_format
 from time import sleep
 from battle_field import BattleField
-from utils import clear_console
+from utils import clear_console, column_name, parse_column
 
 
 class UI:
@@ -146,14 +146,18 @@ class UI:
     def display_field(self, field : BattleField):
         """
         Displays a field (2D list) on the console.
+        Columns past Z are named AA, AB... so the cells are widened to the longest column name.
         
         :param field: 2D list representing the game field.
         """
-        header = "   " + " ".join(chr(65 + i) for i in range(len(field.field[0])))
+        cell_width = len(column_name(field.width - 1))
+        row_width = max(2, len(str(field.height - 1)))
+
+        header = " " * (row_width + 1) + " ".join(column_name(i).rjust(cell_width) for i in range(field.width))
         print(header)
-        print("   " + "---" * len(field.field[0]))
+        print(" " * (row_width + 1) + "---" * field.width)
         for idx, row in enumerate(field.field):
-            print(f"{idx:2} " + " ".join(row))
+            print(f"{idx:{row_width}} " + " ".join(cell.rjust(cell_width) for cell in row))
         print()
 
     def get_shoot_coordinates(self, field : BattleField):
@@ -173,32 +177,40 @@ class UI:
             try:
                 row = int(user_in[0])
             except ValueError:
-                print("Error: The row must be an integer between 0 and 9. Try again.")
+                print(f"Error: The row must be an integer between 0 and {field.height - 1}. Try again.")
+                continue
+            try:
+                col = parse_column(user_in[1])
+            except ValueError:
+                print(f"Error: The column must be a number or a letter between A and {column_name(field.width - 1)}. Try again.")
                 continue
-            col_part = user_in[1]
-            if col_part.isalpha():
-                col = ord(col_part.upper()) - ord("A")
-            else:
-                try:
-                    col = int(col_part)
-                except ValueError:
-                    print("Error: The column must be a number or a letter between A and J. Try again.")
-                    continue
 
             try:
                 field._check_coordinates(row, col)
             except ValueError:
-                print("Error: The coordinates must be an numbers beetwen 0 and 9. Please try again.\n")
+                print(
+                    f"Error: The row must be between 0 and {field.height - 1} and the column between "
+                    f"A and {column_name(field.width - 1)} (or 0 and {field.width - 1}). Please try again.\n"
+                )
                 continue
 
             return row, col
         
-    def get_battle_field(self) -> BattleField:
-            print("Press any key to start placing ships")
-
-            ship_lengths = [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]
-
-            battle_field = BattleField()
+    def get_battle_field(self, rules: dict = None) -> BattleField:
+            """
+            Lets the user place the fleet of the session rules (board size and ship lengths sent by the server).
+            Without rules the classic 10x10 board and fleet are used.
+            """
+            rules = rules or {}
+            ship_lengths = rules.get("fleet", [4, 3, 3, 2, 2, 2, 1, 1, 1, 1])
+            width = rules.get("width", BattleField.BATTLE_FIELD_WIDTH)
+            height = rules.get("height", BattleField.BATTLE_FIELD_HEIGHT)
+
+            user_in = input("Enter 'auto' to place the fleet randomly or press Enter to place the ships yourself: ")
+            if user_in.strip().lower() == "auto":
+                return self.get_random_battle_field(width, height, ship_lengths)
+
+            battle_field = BattleField(None, width, height)
 
             self.display_field(battle_field)
 
@@ -217,19 +229,18 @@ class UI:
                         print("Error: The first coordinate (row) must be an integer. Please try again.\n")
                         continue
 
-                    col_part = user_in[1]
-                    if col_part.isalpha():
-                        col = ord(col_part.upper()) - ord('A')
-                    else:
-                        try:
-                            col = int(col_part)
-                        except ValueError:
-                            print("Error: The second coordinate (column) must be a number or a letter. Try again.\n")
-                            continue
+                    try:
+                        col = parse_column(user_in[1])
+                    except ValueError:
+                        print("Error: The second coordinate (column) must be a number or a letter. Try again.\n")
+                        continue
 
                     orientation = user_in[2].upper()
-                    if row not in range(10) or col not in range(10):
-                        print("Error: Row must be between 0 and 9 and column between A and J (or 0 and 9). Try again.\n")
+                    if row not in range(battle_field.height) or col not in range(battle_field.width):
+                        print(
+                            f"Error: Row must be between 0 and {battle_field.height - 1} and column between "
+                            f"A and {column_name(battle_field.width - 1)} (or 0 and {battle_field.width - 1}). Try again.\n"
+                        )
                         continue
                     if orientation not in ('H', 'V'):
                         print("Error: Orientation must be 'H' (horizontal) or 'V' (vertical). Try again.\n")
@@ -247,3 +258,17 @@ class UI:
                     break
 
             return battle_field
+
+    def get_random_battle_field(self, width: int, height: int, ship_lengths: list[int]) -> BattleField:
+            """
+            Places the fleet randomly and lets the user reroll it until they like it.
+            """
+            while True:
+                battle_field = BattleField.random_fleet(width, height, ship_lengths)
+
+                clear_console()
+                self.display_field(battle_field)
+
+                user_in = input("Press Enter to play with this fleet or enter 'r' to reroll it: ")
+                if user_in.strip().lower() != "r":
+                    return battle_field
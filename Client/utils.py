@@ -20,3 +20,27 @@ def get_uuid() -> str:
 def clear_console():
     command = 'cls' if os.name == 'nt' else 'clear'
     os.system(command)
+
+def column_name(index: int) -> str:
+    """
+    Name of a field column as in spreadsheets: A..Z, then AA, AB and so on for wide fields.
+    """
+    name = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+def parse_column(text: str) -> int:
+    """
+    Column index from its name (e.g. 'C' or 'AB') or number. Raises ValueError if the text is neither.
+    """
+    if text.isdigit():
+        return int(text)
+    if not text.isalpha() or not text.isascii():
+        raise ValueError(f"Invalid column {text}")
+    index = 0
+    for letter in text.upper():
+        index = index * 26 + ord(letter) - 64
+    return index - 1
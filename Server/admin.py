@@ -60,6 +60,10 @@ class Admin:
             output = Commands.delete_user(self.server, command)
         elif lower_command.startswith("add-admin-user"):
             output = Commands.add_admin_user(self.server, command)
+        elif lower_command == "caches":
+            output = Commands.caches(self.server, command)
+        elif lower_command == "db-stats":
+            output = Commands.db_stats(self.server, command)
         elif lower_command == "stop":
             output = Commands.stop_server(self.server, command)
         elif lower_command == "restart":
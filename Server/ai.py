@@ -0,0 +1,224 @@
+from random import choice, random, shuffle
+from board import (
+    CLASSIC_FLEET,
+    ship_placements,
+    placements_covering,
+    placement_halo,
+    orthogonal_neighbours,
+    mask_cells,
+)
+
+# How much more likely a placement is when it covers cells that were already hit.
+HIT_WEIGHT = 20
+
+
+def random_fleet_mask(width: int = 10, height: int = 10, fleet: tuple = CLASSIC_FLEET) -> int:
+    """
+    Places the fleet randomly, backtracking when a ship doesn't fit anymore.
+    Returns the bitmask of the ship cells.
+    """
+    lengths = sorted(fleet, reverse=True)
+
+    def place(index: int, occupied: int, blocked: int) -> int:
+        if index == len(lengths):
+            return occupied
+
+        placements = list(ship_placements(width, height, lengths[index]))
+        shuffle(placements)
+        for mask, halo, _ in placements:
+            if mask & blocked:
+                continue
+            result = place(index + 1, occupied | mask, blocked | mask | halo)
+            if result is not None:
+                return result
+        return None
+
+    ships = place(0, 0, 0)
+    if ships is None:
+        raise ValueError("The fleet doesn't fit on the board.")
+    return ships
+
+
+def random_fleet(width: int = 10, height: int = 10, fleet: tuple = CLASSIC_FLEET) -> list[list[str]]:
+    """
+    Places the fleet randomly. Returns the field as a list of rows of "S" and "." cells.
+    """
+    ships = random_fleet_mask(width, height, fleet)
+    return [
+        ["S" if ships >> (row * width + col) & 1 else "." for col in range(width)]
+        for row in range(height)
+    ]
+
+
+class TargetingEngine:
+    """
+    Hunt/target shooting AI.
+
+    The board knowledge is kept in bitmasks of shot cells and hit cells. The strongest mode
+    counts every legal placement of every remaining ship (a placement is legal if it doesn't
+    cover a missed cell and doesn't touch a hit cell it doesn't cover, as ships can't touch)
+    and shoots the cell covered by the most placements, weighting placements that go through
+    unresolved hits much higher.
+
+    Difficulty trades search depth for speed:
+      - "easy": random hunting, random shots around hits, no reasoning about ship spacing.
+      - "medium": checkerboard hunting, placement counting only around hits
+        (just the placements covering the hit cells are looked at, whatever the size of the board).
+      - "hard": placement counting over the whole board on every shot.
+    """
+
+    DIFFICULTIES = ("easy", "medium", "hard")
+
+    def __init__(
+        self,
+        difficulty: str = "medium",
+        width: int = 10,
+        height: int = 10,
+        fleet: tuple = CLASSIC_FLEET,
+    ) -> None:
+        if difficulty not in self.DIFFICULTIES:
+            raise ValueError(f"Unknown difficulty {difficulty}")
+
+        self.difficulty = difficulty
+        self.width = width
+        self.height = height
+        self.remaining = list(fleet)  # Lengths of ships that are still afloat
+
+        self.shot = 0  # Cells that have been shot at
+        self.hits = 0  # Hit cells that don't belong to a sunk ship yet
+        self.empty = 0  # Cells known to be empty without shooting them
+
+        # Every ship longer than one cell covers a cell of each checkerboard colour,
+        # so hunting on one colour finds them with half of the shots.
+        parity = 0 if random() < 0.5 else 1
+        self.parity = 0
+        for cell in range(width * height):
+            if sum(divmod(cell, width)) % 2 == parity:
+                self.parity |= 1 << cell
+
+    def record(self, row: int, col: int, hit: bool) -> None:
+        """
+        Remembers the result of a shot.
+        """
+        bit = 1 << (row * self.width + col)
+        self.shot |= bit
+        if hit:
+            self.hits |= bit
+
+            if self.difficulty == "easy":
+                return
+
+            # Ships are straight and can't touch, so the diagonal neighbours of a hit are water.
+            for nrow, ncol in ((row - 1, col - 1), (row - 1, col + 1), (row + 1, col - 1), (row + 1, col + 1)):
+                if 0 <= nrow < self.height and 0 <= ncol < self.width:
+                    self.empty |= 1 << (nrow * self.width + ncol)
+
+    def sunk(self, row: int, col: int) -> None:
+        """
+        Remembers that the shot at the cell sank a ship: its hits are resolved,
+        its length is no longer afloat and the water around it is empty.
+        """
+        bit = 1 << (row * self.width + col)
+        self.shot |= bit
+
+        # The ship is the straight line of hits going through the cell.
+        ship = bit
+        for drow, dcol in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            nrow, ncol = row + drow, col + dcol
+            while 0 <= nrow < self.height and 0 <= ncol < self.width and self.hits >> (nrow * self.width + ncol) & 1:
+                ship |= 1 << (nrow * self.width + ncol)
+                nrow, ncol = nrow + drow, ncol + dcol
+
+        self.hits &= ~ship
+        self.empty |= placement_halo(self.width, self.height, ship)
+
+        length = bin(ship).count("1")
+        if length in self.remaining:
+            self.remaining.remove(length)
+
+    def sync(self, field: list[list[str]]) -> None:
+        """
+        Records every hit ("H") and miss ("M") of a shooting field that isn't known yet.
+        """
+        for row, cells in enumerate(field):
+            for col, cell in enumerate(cells):
+                if cell in ("H", "M") and not self.shot >> (row * self.width + col) & 1:
+                    self.record(row, col, cell == "H")
+
+    def next_shot(self) -> tuple[int, int]:
+        cell = None
+        if self.difficulty == "hard":
+            cell = self._best_cell(self._density(self.hits))
+        else:
+            if self.hits:
+                if self.difficulty == "medium":
+                    cell = self._best_cell(self._density(self.hits, only_hits=True))
+                else:
+                    cell = self._random_cell(self._neighbours(self.hits))
+            if cell is None and self.difficulty == "medium":
+                cell = self._random_cell(self.parity)
+
+        if cell is None:
+            cell = self._random_cell(~self.empty)
+
+        return divmod(cell, self.width)
+
+    def _density(self, hits: int, only_hits: bool = False) -> dict[int, float]:
+        """
+        Counts for every cell how many legal placements of the remaining ships cover it.
+        Cells no placement covers are left out.
+        :param only_hits: Count only placements that go through a hit cell.
+        """
+        misses = self.shot & ~hits
+        density = {}
+
+        lengths = {}
+        for length in self.remaining:
+            lengths[length] = lengths.get(length, 0) + 1
+
+        for length, count in lengths.items():
+            if only_hits:
+                by_cell = placements_covering(self.width, self.height, length)
+                placements = set()
+                for cell in mask_cells(hits):
+                    placements.update(by_cell[cell])
+            else:
+                placements = ship_placements(self.width, self.height, length)
+
+            for mask, halo, cells in placements:
+                # The placement must not cover a miss, must not touch other ships
+                # and must still have cells to shoot at.
+                if mask & misses or halo & hits or not mask & ~self.shot:
+                    continue
+
+                covered = mask & hits
+                if covered:
+                    weight = count * HIT_WEIGHT * bin(covered).count("1")
+                elif only_hits:
+                    continue
+                else:
+                    weight = count
+
+                for cell in cells:
+                    density[cell] = density.get(cell, 0) + weight
+
+        return density
+
+    def _best_cell(self, density: dict[int, float]) -> int:
+        best, best_cells = 0, []
+        for cell, value in density.items():
+            if value <= 0 or (self.shot | self.empty) >> cell & 1:
+                continue
+            if value > best:
+                best, best_cells = value, [cell]
+            elif value == best:
+                best_cells.append(cell)
+        return choice(best_cells) if best_cells else None
+
+    def _random_cell(self, mask: int) -> int:
+        mask &= ~(self.shot | self.empty) & ((1 << (self.width * self.height)) - 1)
+        cells = mask_cells(mask)
+        return choice(cells) if cells else None
+
+    def _neighbours(self, mask: int) -> int:
+        return orthogonal_neighbours(self.width, self.height, mask)
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the server internals.
+
+Usage: python benchmark.py [name ...] [--repeat N]
+Runs all benchmarks if no name is given.
+"""
+import argparse
+import os
+import sys
+from pickle import dumps, loads
+from random import randrange, shuffle
+from tempfile import TemporaryDirectory
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+from timeit import repeat
+from ai import random_fleet, random_fleet_mask
+from board import CLASSIC_FLEET, PackedBoard, fleet_mask, validate_fleet
+from game_session import BattleField, GAME_RULES, validate_fleet_cached
+
+
+class ListBattleField:
+    """
+    Reference implementation of the battlefield as a list of lists of cells,
+    the representation BattleField used before bitboards.
+    """
+
+    def __init__(self, battle_field: list[list[str]]) -> None:
+        self.battle_field = battle_field
+
+    def _check_coordinates(self, row: int, col: int) -> None:
+        rows = len(self.battle_field)
+        cols = len(self.battle_field[0])
+
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError("Invalid coordinates")
+
+    def shoot(self, row: int, col: int) -> BattleField.ShootState:
+        self._check_coordinates(row, col)
+
+        cell = self.battle_field[row][col]
+        if cell == "S":
+            self.battle_field[row][col] = "H"
+            return BattleField.ShootState.HIT
+        elif cell == ".":
+            self.battle_field[row][col] = "M"
+            return BattleField.ShootState.MISS
+        elif cell in ("H", "M"):
+            return BattleField.ShootState.ALREADY_SHOT
+        return BattleField.ShootState.UNKNOWN
+
+    def is_all_ships_destroyed(self) -> bool:
+        for row in self.battle_field:
+            if "S" in row:
+                return False
+        return True
+
+    def copy(self) -> "ListBattleField":
+        return ListBattleField([row[:] for row in self.battle_field])
+
+
+def dfs_validate(battle_field: list[list[str]]) -> None:
+    """
+    Reference implementation of the fleet validation BattleField used before the placement table:
+    a DFS over the grid grouping ship cells into ships, then an 8-neighbour adjacency check of every cell.
+    """
+    n, m = 10, 10
+    visited = [[False] * m for _ in range(n)]
+    component_id = [[None] * m for _ in range(n)]
+    ship_lengths = []
+    for i in range(n):
+        for j in range(m):
+            if battle_field[i][j] == "S" and not visited[i][j]:
+                stack, cells = [(i, j)], []
+                while stack:
+                    x, y = stack.pop()
+                    if visited[x][y]:
+                        continue
+                    visited[x][y] = True
+                    component_id[x][y] = len(ship_lengths)
+                    cells.append((x, y))
+                    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < n and 0 <= ny < m and battle_field[nx][ny] == "S" and not visited[nx][ny]:
+                            stack.append((nx, ny))
+                xs = [x for x, _ in cells]
+                ys = [y for _, y in cells]
+                if all(x == xs[0] for x in xs):
+                    if max(ys) - min(ys) + 1 != len(cells):
+                        raise ValueError("not contiguous")
+                elif all(y == ys[0] for y in ys):
+                    if max(xs) - min(xs) + 1 != len(cells):
+                        raise ValueError("not contiguous")
+                else:
+                    raise ValueError("not straight")
+                ship_lengths.append(len(cells))
+
+    if sorted(ship_lengths) != sorted(CLASSIC_FLEET):
+        raise ValueError("wrong fleet")
+
+    for i in range(n):
+        for j in range(m):
+            if battle_field[i][j] == "S":
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        ni, nj = i + dx, j + dy
+                        if (dx or dy) and 0 <= ni < n and 0 <= nj < m and battle_field[ni][nj] == "S":
+                            if component_id[ni][nj] != component_id[i][j]:
+                                raise ValueError("ships touch")
+
+
+def report(name: str, reference: float, bitboard: float, unit: str) -> None:
+    print(
+        f"  {name:<32} old {reference * 1e6:>9.2f}us  new {bitboard * 1e6:>9.2f}us"
+        f"  x{reference / bitboard:.1f} per {unit}"
+    )
+
+
+def best(statement, number: int, repeats: int) -> float:
+    """
+    Best time of one call of the statement.
+    """
+    return min(repeat(statement, number=number, repeat=repeats)) / number
+
+
+def benchmark_battlefield(repeats: int) -> None:
+    """
+    Compares the bitboard BattleField with the list of lists representation.
+    """
+    print("battlefield:")
+
+    field = random_fleet()
+    cells = [(row, col) for row in range(10) for col in range(10)]
+    shuffle(cells)
+
+    # A whole game against one field: every shot is followed by the end of game check, as in Session._shoot.
+    # The fields are validated once outside of the measurement.
+    validated = BattleField(field)
+
+    def play(battle_field) -> int:
+        for shots, (row, col) in enumerate(cells, 1):
+            battle_field.shoot(row, col)
+            if battle_field.is_all_ships_destroyed():
+                return shots
+
+    def play_list() -> int:
+        return play(ListBattleField([row[:] for row in field]))
+
+    def play_bitboard() -> int:
+        return play(validated.copy())
+
+    report(f"game ({play_list()} shots + checks)", best(play_list, 200, repeats), best(play_bitboard, 200, repeats), "game")
+
+    # The end of game check alone, on a field with only the last ship cell left.
+    last_ship_cell = max((row, col) for row, col in cells if field[row][col] == "S")
+    list_field = ListBattleField([row[:] for row in field])
+    bitboard_field = BattleField(field)
+    for row, col in cells:
+        if (row, col) != last_ship_cell:
+            list_field.shoot(row, col)
+            bitboard_field.shoot(row, col)
+    report(
+        "is_all_ships_destroyed",
+        best(list_field.is_all_ships_destroyed, 20000, repeats),
+        best(bitboard_field.is_all_ships_destroyed, 20000, repeats),
+        "check",
+    )
+
+    # Shooting at a cell that was already shot.
+    report(
+        "shoot (already shot)",
+        best(lambda: list_field.shoot(0, 0), 20000, repeats),
+        best(lambda: bitboard_field.shoot(0, 0), 20000, repeats),
+        "shot",
+    )
+
+    # Copying a field: 11 lists against 3 ints and the ship counters.
+    report("copy", best(list_field.copy, 20000, repeats), best(bitboard_field.copy, 20000, repeats), "copy")
+
+    list_size = sys.getsizeof(list_field.battle_field) + sum(sys.getsizeof(row) for row in list_field.battle_field)
+    bitboard_size = sum(sys.getsizeof(mask) for mask in (bitboard_field.ships, bitboard_field.hits, bitboard_field.misses))
+    print(f"  {'memory':<32} old {list_size:>10}B   new {bitboard_size:>10}B")
+
+    # The list view for the clients is built once per field and then updated by the shots.
+    def render() -> None:
+        bitboard_field._view = None
+        bitboard_field.battle_field
+
+    print(f"  {'battle_field (first render)':<32} {best(render, 2000, repeats) * 1e6:>14.2f}us")
+
+
+def benchmark_validation(repeats: int) -> None:
+    """
+    Compares the fleet validation with the placement table and the DFS over the grid.
+    """
+    print("validation:")
+
+    fields = [random_fleet() for _ in range(100)]
+    masks = [fleet_mask(field) for field in fields]
+
+    def validate_dfs() -> None:
+        for field in fields:
+            dfs_validate(field)
+
+    def validate_table() -> None:
+        for mask in masks:
+            validate_fleet(mask)
+
+    # The layouts repeat, so after the first round every lookup is a cache hit.
+    def validate_cached() -> None:
+        for mask in masks:
+            validate_fleet_cached(mask, 10, 10, CLASSIC_FLEET)
+
+    def create_list() -> None:
+        for field in fields:
+            BattleField(field)
+
+    def create_mask() -> None:
+        for mask in masks:
+            BattleField.from_ship_mask(mask)
+
+    dfs = best(validate_dfs, 20, repeats) / len(fields)
+    report("validate_fleet (mask)", dfs, best(validate_table, 20, repeats) / len(fields), "fleet")
+    report("validate_fleet_cached (hit)", dfs, best(validate_cached, 20, repeats) / len(fields), "fleet")
+    report("BattleField(field)", dfs, best(create_list, 20, repeats) / len(fields), "fleet")
+    report("BattleField.from_ship_mask", dfs, best(create_mask, 20, repeats) / len(fields), "fleet")
+
+
+def benchmark_variants(repeats: int) -> None:
+    """
+    Costs of the same operations on the boards of every game variant.
+    """
+    print("variants:")
+
+    for rules in GAME_RULES.values():
+        width, height, fleet = rules.width, rules.height, rules.fleet
+        masks = [random_fleet_mask(width, height, fleet) for _ in range(20)]
+        cells = [(row, col) for row in range(height) for col in range(width)]
+        shuffle(cells)
+
+        def validate() -> None:
+            for mask in masks:
+                BattleField.from_ship_mask(mask, width, height, fleet)
+
+        validated = BattleField.from_ship_mask(masks[0], width, height, fleet)
+
+        def play() -> int:
+            battle_field = validated.copy()
+            for shots, (row, col) in enumerate(cells, 1):
+                battle_field.shoot(row, col)
+                if battle_field.is_all_ships_destroyed():
+                    return shots
+
+        shots = play()
+
+        def render() -> None:
+            validated._view = None
+            validated.battle_field
+
+        print(
+            f"  {rules.name + f' ({width}x{height})':<20}"
+            f" from_ship_mask {best(validate, 5, repeats) / len(masks) * 1e6:>8.2f}us"
+            f"  shot+check {best(play, 5, repeats) / shots * 1e6:>6.2f}us"
+            f"  first render {best(render, 5, repeats) * 1e6:>8.2f}us"
+        )
+
+
+def benchmark_numpy(repeats: int) -> None:
+    """
+    Compares the batch operations of the NumPy engine with the same work done board by board on bitboards.
+    """
+    print("numpy:")
+
+    # Imported here so the other benchmarks run without NumPy.
+    from numpy_board import NUMPY_AVAILABLE, NumpyBattleField, validate_fleets, hit_masks
+
+    if not NUMPY_AVAILABLE:
+        print("  NumPy is not installed, skipped.")
+        return
+
+    for rules in GAME_RULES.values():
+        width, height, fleet = rules.width, rules.height, rules.fleet
+        name = f"{rules.name} ({width}x{height})"
+
+        masks = [random_fleet_mask(width, height, fleet) for _ in range(200)]
+
+        def validate_one_by_one() -> None:
+            for mask in masks:
+                validate_fleet(mask, width, height, fleet)
+
+        report(
+            f"validate_fleets {name}",
+            best(validate_one_by_one, 3, repeats) / len(masks),
+            best(lambda: validate_fleets(masks, width, height, fleet), 3, repeats) / len(masks),
+            "fleet",
+        )
+
+        # A whole game worth of shots (every cell once, in a random order) applied to one board.
+        cells = [(row, col) for row in range(height) for col in range(width)]
+        shuffle(cells)
+        rows = [row for row, _ in cells]
+        cols = [col for _, col in cells]
+        bitboard = BattleField.from_ship_mask(masks[0], width, height, fleet)
+        array = NumpyBattleField.from_ship_mask(masks[0], width, height, fleet)
+
+        def shoot_one_by_one() -> None:
+            field = bitboard.copy()
+            for row, col in cells:
+                field.shoot(row, col)
+
+        report(
+            f"shoot_many {name}",
+            best(shoot_one_by_one, 3, repeats) / len(cells),
+            best(lambda: array.copy().shoot_many(rows, cols), 3, repeats) / len(cells),
+            "shot",
+        )
+
+        # Hit cells of many boards halfway through their games.
+        bitboards = [BattleField.from_ship_mask(mask, width, height, fleet) for mask in masks]
+        arrays = [NumpyBattleField.from_ship_mask(mask, width, height, fleet) for mask in masks]
+        half = len(cells) // 2
+        for field in bitboards:
+            for row, col in cells[:half]:
+                field.shoot(row, col)
+        for field in arrays:
+            field.shoot_many(rows[:half], cols[:half])
+
+        def hit_masks_one_by_one() -> None:
+            for field in bitboards:
+                [[field.hits >> (row * width + col) & 1 for col in range(width)] for row in range(height)]
+
+        report(
+            f"hit_masks {name}",
+            best(hit_masks_one_by_one, 3, repeats) / len(masks),
+            best(lambda: hit_masks(arrays), 3, repeats) / len(masks),
+            "board",
+        )
+
+
+def benchmark_packed(repeats: int) -> None:
+    """
+    Compares the packed boards with the pickled lists of rows they replace in the packets,
+    on fields halfway through a game of every variant.
+    """
+    print("packed:")
+
+    for rules in GAME_RULES.values():
+        width, height, fleet = rules.width, rules.height, rules.fleet
+        name = f"{rules.name} ({width}x{height})"
+
+        field = BattleField.from_ship_mask(random_fleet_mask(width, height, fleet), width, height, fleet)
+        cells = [(row, col) for row in range(height) for col in range(width)]
+        shuffle(cells)
+        for row, col in cells[: len(cells) // 2]:
+            field.shoot(row, col)
+
+        rows = field.battle_field
+        pickled = dumps(rows)
+        packed = field.to_packed().to_bytes()
+        print(f"  {name + ' size':<32} old {len(pickled):>10}B   new {len(packed):>10}B")
+
+        report(
+            f"encode {name}",
+            best(lambda: dumps(field.battle_field), 200, repeats),
+            best(lambda: field.to_packed().to_bytes(), 200, repeats),
+            "board",
+        )
+        report(
+            f"decode {name}",
+            best(lambda: loads(pickled), 200, repeats),
+            best(lambda: PackedBoard.from_bytes(packed).to_rows(), 200, repeats),
+            "board",
+        )
+        report(
+            f"decode to bitboards {name}",
+            best(lambda: fleet_mask(loads(pickled), width, height), 200, repeats),
+            best(lambda: PackedBoard.from_bytes(packed).to_bitboards(), 200, repeats),
+            "board",
+        )
+
+
+def run_database_load(database, readers: int, writers: int, duration: float) -> tuple[int, int, int]:
+    """
+    Runs reader threads (a user lookup each) and writer threads (a statistics update each)
+    against the database for the given time. Returns the number of reads, writes and errors.
+    """
+    stop = Event()
+    lock = Lock()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+
+    def read() -> None:
+        reads = errors = 0
+        while not stop.is_set():
+            try:
+                database.select("users", {"user_name": f"user{randrange(1000)}"})
+                reads += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["reads"] += reads
+            counts["errors"] += errors
+
+    def write() -> None:
+        writes = errors = 0
+        while not stop.is_set():
+            try:
+                database.set("users", "stat_games", randrange(1000), {"user_name": f"user{randrange(1000)}"})
+                writes += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["writes"] += writes
+            counts["errors"] += errors
+
+    threads = [Thread(target=read) for _ in range(readers)] + [Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return counts["reads"], counts["writes"], counts["errors"]
+
+
+def benchmark_sqlite(repeats: int) -> None:
+    """
+    Concurrent read and write throughput of the SQLite engine: one connection shared by all threads
+    with the SQLite defaults (rollback journal, synchronous FULL) against per-thread connections with the tuned pragmas.
+    """
+    print("sqlite:")
+
+    # Imported here so the other benchmarks run without the database drivers.
+    import sqlite3
+    from databases.sqlite_db import SQLiteDatabase
+
+    class SharedSQLiteDatabase(SQLiteDatabase):
+        """
+        The previous engine: a single connection used by every thread.
+        """
+
+        def _connection(self):
+            if not hasattr(self, "_shared"):
+                self._shared = sqlite3.connect(self.database_file, check_same_thread=False)
+                self._shared.row_factory = sqlite3.Row
+            return self._shared
+
+    defaults = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 0, "mmap_size": 0}
+    engines = {
+        "shared connection": lambda path: SharedSQLiteDatabase(path, defaults),
+        "per-thread + pragmas": lambda path: SQLiteDatabase(path),
+    }
+    duration = 0.2 * repeats
+
+    for readers, writers in ((4, 0), (4, 1), (8, 4)):
+        for name, engine in engines.items():
+            with TemporaryDirectory() as directory:
+                database = engine(os.path.join(directory, "benchmark.sqlite3"))
+                database.create_table("users", {"user_name": "TEXT PRIMARY KEY", "stat_games": "INTEGER"})
+                for user in range(1000):
+                    database.insert("users", {"user_name": f"user{user}", "stat_games": 0})
+
+                start = perf_counter()
+                reads, writes, errors = run_database_load(database, readers, writers, duration)
+                elapsed = perf_counter() - start
+                database.__exit__(None, None, None)
+
+            print(
+                f"  {f'{readers}R/{writers}W {name}':<32}"
+                f" reads {reads / elapsed:>9.0f}/s  writes {writes / elapsed:>7.0f}/s  errors {errors}"
+            )
+
+
+def benchmark_batch(repeats: int) -> None:
+    """
+    Multi-row writes on SQLite: a commit per row against a single transaction and the batch methods.
+    """
+    print("batch:")
+
+    from databases.sqlite_db import SQLiteDatabase
+
+    rows = 200 * repeats
+
+    def per_row(database):
+        for user in range(rows):
+            database.insert("users", {"user_name": f"user{user}", "stat_games": 0})
+        for user in range(rows):
+            database.set("users", "stat_games", 1, {"user_name": f"user{user}"})
+
+    def transaction(database):
+        with database.transaction():
+            per_row(database)
+
+    def batch(database):
+        database.insert_many("users", [{"user_name": f"user{user}", "stat_games": 0} for user in range(rows)])
+        database.set_many("users", "stat_games", [(1, {"user_name": f"user{user}"}) for user in range(rows)])
+
+    for name, write in (("commit per row", per_row), ("transaction", transaction), ("insert_many/set_many", batch)):
+        with TemporaryDirectory() as directory:
+            database = SQLiteDatabase(os.path.join(directory, "benchmark.sqlite3"))
+            database.create_table("users", {"user_name": "TEXT PRIMARY KEY", "stat_games": "INTEGER"})
+
+            start = perf_counter()
+            write(database)
+            elapsed = perf_counter() - start
+            database.__exit__(None, None, None)
+
+        print(f"  {name:<24} {rows * 2} writes in {elapsed * 1e3:8.1f}ms ({rows * 2 / elapsed:>9.0f}/s)")
+
+
+def benchmark_lookup(repeats: int) -> None:
+    """
+    Finding a user by name on SQLite: scanning the selected table against a primary key lookup.
+    """
+    print("lookup:")
+
+    from databases.sqlite_db import SQLiteDatabase
+
+    for users in (1000, 100000):
+        with TemporaryDirectory() as directory:
+            database = SQLiteDatabase(os.path.join(directory, "benchmark.sqlite3"))
+            database.create_table("users", {"user_name": "TEXT PRIMARY KEY", "stat_games": "INTEGER"})
+            database.insert_many("users", [{"user_name": f"user{user}", "stat_games": 0} for user in range(users)])
+            name = f"user{users // 2}"
+
+            def scan():
+                for user in database.select("users"):
+                    if user["user_name"] == name:
+                        return user
+
+            number = max(1, 100000 // users)
+            report(
+                f"find in {users} users",
+                best(scan, number, repeats),
+                best(lambda: database.select_one("users", {"user_name": name}), number, repeats),
+                "lookup",
+            )
+            database.__exit__(None, None, None)
+
+
+def benchmark_statements(repeats: int) -> None:
+    """
+    Getting the SQL text of the hottest queries: building it on every call against the statement cache.
+    """
+    print("statements:")
+
+    from databases.statements import Statements
+
+    statements = Statements("?", "MAX")
+    conditions = {"user_name": "user"}
+    deltas = {"stat_wins": 1, "stat_matches": 1, "stat_hits": 17}
+    maximums = {"stat_longest_match": 120}
+
+    def build_select_one():
+        condition_str = " AND ".join([f"{col}=?" for col in conditions])
+        return f"SELECT * FROM users WHERE {condition_str} LIMIT 1"
+
+    def build_increment():
+        values_str = ", ".join(
+            [f"{col}={col}+?" for col in deltas.keys()] + [f"{col}=MAX({col}, ?)" for col in maximums.keys()]
+        )
+        condition_str = " AND ".join([f"{col}=?" for col in conditions.keys()])
+        return f"UPDATE users SET {values_str} WHERE {condition_str};"
+
+    number = 100000
+    report(
+        "select_one",
+        best(build_select_one, number, repeats),
+        best(lambda: statements.select_one("users", tuple(conditions)), number, repeats),
+        "query",
+    )
+    report(
+        "increment_many",
+        best(build_increment, number, repeats),
+        best(lambda: statements.increment("users", tuple(deltas), tuple(maximums), tuple(conditions)), number, repeats),
+        "query",
+    )
+
+
+def benchmark_leaderboard(repeats: int) -> None:
+    """
+    A page of the leaderboard: sorting every user on each request against the sorted leaderboard.
+    """
+    print("leaderboard:")
+
+    from random import randrange
+    from leaderboard import Leaderboard
+
+    for count in (1000, 100000):
+        users = [{"user_name": f"user{user}", "stat_wins": randrange(count)} for user in range(count)]
+        leaderboard = Leaderboard()
+        leaderboard.load((user["user_name"], user["stat_wins"]) for user in users)
+
+        number = max(1, 10000 // count)
+        report(
+            f"page of {count} users",
+            best(lambda: sorted(users, key=lambda user: user["stat_wins"], reverse=True)[:10], number, repeats),
+            best(lambda: leaderboard.page(count // 20, 10), number, repeats),
+            "page",
+        )
+
+
+BENCHMARKS = {
+    "battlefield": benchmark_battlefield,
+    "validation": benchmark_validation,
+    "variants": benchmark_variants,
+    "numpy": benchmark_numpy,
+    "packed": benchmark_packed,
+    "sqlite": benchmark_sqlite,
+    "batch": benchmark_batch,
+    "lookup": benchmark_lookup,
+    "statements": benchmark_statements,
+    "leaderboard": benchmark_leaderboard,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the server internals.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run: {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repeats, the best one is reported.")
+    args = parser.parse_args()
+
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name}")
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.repeat)
+
+
+if __name__ == "__main__":
+    main()
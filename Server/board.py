@@ -0,0 +1,366 @@
+import codecs
+from functools import lru_cache
+
+CLASSIC_FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)  # One 4-cell, two 3-cells, three 2-cells and four 1-cell ships
+MAX_BOARD_SIZE = 50  # Largest width and height of a board
+
+
+class Rules:
+    """
+    Rules of a game variant: the size of the board and the lengths of the ships of the fleet.
+    Both players of a session play by the same rules, they are sent to the clients when the session starts.
+    """
+
+    def __init__(self, name: str, width: int, height: int, fleet) -> None:
+        if not (1 <= width <= MAX_BOARD_SIZE and 1 <= height <= MAX_BOARD_SIZE):
+            raise ValueError(f"The board of the '{name}' variant must be from 1x1 to {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE} cells.")
+        if not fleet or any(not 1 <= length <= max(width, height) for length in fleet):
+            raise ValueError(f"The fleet of the '{name}' variant has ships that don't fit on the board.")
+        if sum(fleet) > width * height:
+            raise ValueError(f"The fleet of the '{name}' variant has more cells than the board.")
+
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fleet = tuple(sorted(fleet, reverse=True))
+
+    def to_dict(self) -> dict:
+        return {
+            "variant": self.name,
+            "width": self.width,
+            "height": self.height,
+            "fleet": list(self.fleet),
+        }
+
+
+def load_variants(variants: dict) -> dict[str, Rules]:
+    """
+    Creates the rules of the game variants from the settings ({name: {"width", "height", "fleet"}}).
+    Raises ValueError if a variant is not playable.
+    """
+    return {
+        name: Rules(name, variant["width"], variant["height"], variant["fleet"])
+        for name, variant in variants.items()
+    }
+
+
+def column_name(index: int) -> str:
+    """
+    Name of a field column as in spreadsheets: A..Z, then AA, AB and so on for wide fields (as the client names them).
+    """
+    name = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+@lru_cache(maxsize=None)
+def board_masks(width: int, height: int) -> tuple[int, int, int]:
+    """
+    Bitmasks of all the cells of the board, of its first column and of its last column.
+    """
+    first_column = 0
+    for row in range(height):
+        first_column |= 1 << (row * width)
+    return (1 << (width * height)) - 1, first_column, first_column << (width - 1)
+
+
+@lru_cache(maxsize=None)
+def ship_placements(width: int, height: int, length: int) -> tuple[tuple[int, int, tuple[int, ...]], ...]:
+    """
+    All the ways a ship of the given length fits on the board.
+    Every placement is a bitmask (bit row * width + col is set for every cell of the ship),
+    the bitmask of the cells around it and the tuple of its cell indexes.
+    """
+    placements = []
+    for row in range(height):
+        for col in range(width):
+            orientations = [(0, 1)] if length == 1 else [(0, 1), (1, 0)]
+            for dx, dy in orientations:
+                if row + dx * (length - 1) >= height or col + dy * (length - 1) >= width:
+                    continue
+                cells = tuple(
+                    (row + dx * k) * width + col + dy * k for k in range(length)
+                )
+                mask = 0
+                for cell in cells:
+                    mask |= 1 << cell
+                placements.append((mask, placement_halo(width, height, mask), cells))
+    return tuple(placements)
+
+
+def placement_halo(width: int, height: int, mask: int) -> int:
+    """
+    Bitmask of the cells surrounding a placement (in all 8 directions), excluding the placement itself.
+    The placement is spread by shifting the whole bitmask, so the cost doesn't depend on its cells.
+    """
+    full, first_column, last_column = board_masks(width, height)
+    # Shifting by one cell wraps around the rows: the cells that land in the other edge column are dropped.
+    row = (mask | (mask << 1) & ~first_column | (mask >> 1) & ~last_column) & full
+    return (row | row << width | row >> width) & full & ~mask
+
+
+def orthogonal_neighbours(width: int, height: int, mask: int) -> int:
+    """
+    Bitmask of the cells next to the cells of the mask horizontally or vertically, excluding the mask itself.
+    """
+    full, first_column, last_column = board_masks(width, height)
+    neighbours = (mask << 1) & ~first_column | (mask >> 1) & ~last_column | mask << width | mask >> width
+    return neighbours & full & ~mask
+
+
+@lru_cache(maxsize=None)
+def placements_by_cell(width: int, height: int, lengths: tuple[int, ...]) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """
+    For every cell, the placements (mask, halo) of ships of the given lengths that start in it,
+    i.e. whose lowest cell it is. The table is built once per board size and fleet.
+    """
+    table = [[] for _ in range(width * height)]
+    for length in sorted(set(lengths)):
+        for mask, halo, cells in ship_placements(width, height, length):
+            table[cells[0]].append((mask, halo))
+    return tuple(tuple(placements) for placements in table)
+
+
+@lru_cache(maxsize=None)
+def placements_covering(width: int, height: int, length: int) -> tuple[tuple[tuple[int, int, tuple[int, ...]], ...], ...]:
+    """
+    For every cell, the placements of a ship of the given length that cover it,
+    so the placements around a few cells can be looked up without going over the whole board.
+    """
+    table = [[] for _ in range(width * height)]
+    for placement in ship_placements(width, height, length):
+        for cell in placement[2]:
+            table[cell].append(placement)
+    return tuple(tuple(placements) for placements in table)
+
+
+def mask_cells(mask: int) -> list[int]:
+    """
+    Indexes of the set cells of a bitmask, in increasing order. Only the set bits are visited.
+    """
+    cells = []
+    while mask:
+        bit = mask & -mask
+        cells.append(bit.bit_length() - 1)
+        mask ^= bit
+    return cells
+
+
+@lru_cache(maxsize=None)
+def placement_cells(mask: int) -> tuple[int, ...]:
+    """
+    Indexes of the cells of a placement bitmask. The number of different placements only grows
+    with the size of the board (about thirty thousand on the largest one), so they are cached.
+    """
+    return tuple(mask_cells(mask))
+
+
+def fleet_mask(field: list[list[str]], width: int = 10, height: int = 10) -> int:
+    """
+    Converts a field given as a list of rows of cells into the bitmask of its ship ("S") cells.
+    Raises ValueError if the field doesn't have the size of the board.
+    """
+    if not isinstance(field, list) or len(field) != height:
+        raise ValueError("Uncorrect battle field")
+
+    mask = 0
+    bit = 1
+    for row in field:
+        if not isinstance(row, list) or len(row) != width:
+            raise ValueError("Uncorrect battle field")
+        for cell in row:
+            if cell == "S":
+                mask |= bit
+            bit <<= 1
+    return mask
+
+
+def validate_fleet(mask: int, width: int = 10, height: int = 10, fleet: tuple = CLASSIC_FLEET) -> list[int]:
+    """
+    Splits the ship cells of a board into ships and checks them against the fleet.
+    Returns the bitmask of every ship, raises ValueError if the ships are not a valid placement of the fleet.
+
+    The lowest ship cell left is always the first cell of a ship, and exactly one placement starting
+    there covers only ship cells while its halo covers none (which also means the ship touches no other one).
+    So every ship costs a couple of AND operations per candidate placement from the precomputed table.
+    """
+    if mask >> (width * height):
+        raise ValueError("Uncorrect battle field")
+    if bin(mask).count("1") != sum(fleet):
+        raise ValueError(f"The ships must have {sum(fleet)} cells in total.")
+
+    table = placements_by_cell(width, height, tuple(fleet))
+
+    ships = []
+    remaining = mask
+    while remaining:
+        cell = (remaining & -remaining).bit_length() - 1
+        for placement, halo in table[cell]:
+            if placement & remaining == placement and not halo & mask:
+                break
+        else:
+            raise ValueError("Ships must be straight lines of the fleet sizes and cannot touch each other, even diagonally.")
+
+        ships.append(placement)
+        remaining ^= placement
+
+    lengths = sorted((bin(ship).count("1") for ship in ships), reverse=True)
+    if lengths != sorted(fleet, reverse=True):
+        raise ValueError(
+            f"Ship sizes {sorted(lengths)} do not match expected configuration {sorted(fleet)}."
+        )
+
+    return ships
+
+
+@lru_cache(maxsize=None)
+def _interleave_masks(bits: int) -> tuple[int, tuple[int, ...]]:
+    """
+    Number of bits rounded up to a power of two and the masks that spread (or gather) them:
+    for every shift s from 1 up, blocks of s set bits followed by s clear bits over twice as many bits.
+    """
+    size = 1
+    while size < bits:
+        size *= 2
+    repeat = (1 << (2 * size)) - 1
+    masks = []
+    shift = 1
+    while shift <= size:
+        masks.append(((1 << shift) - 1) * (repeat // ((1 << (2 * shift)) - 1)))
+        shift *= 2
+    return size, tuple(masks)
+
+
+def spread_bits(mask: int, bits: int) -> int:
+    """
+    Moves bit i of the mask to bit 2 * i. Works on the whole int at once, in log2(bits) steps.
+    """
+    size, masks = _interleave_masks(bits)
+    shift = size // 2
+    for step in reversed(masks[:-1]):
+        mask = (mask | mask << shift) & step
+        shift //= 2
+    return mask
+
+
+def gather_bits(mask: int, bits: int) -> int:
+    """
+    Moves bit 2 * i of the mask to bit i (the odd bits are dropped), the inverse of spread_bits.
+    """
+    size, masks = _interleave_masks(bits)
+    mask &= masks[0]
+    shift = 1
+    for step in masks[1:]:
+        mask = (mask | mask >> shift) & step
+        shift *= 2
+    return mask
+
+
+# The 4 cells of every packed byte (first cell in the lowest bits) and back, for codecs.charmap_decode.
+_PACKED_CELLS = {byte: "".join(".SHM"[byte >> (2 * k) & 3] for k in range(4)) for byte in range(256)}
+_PACKED_BYTES = {cells: byte for byte, cells in _PACKED_CELLS.items()}
+
+
+@lru_cache(maxsize=None)
+def _row_slices(width: int, height: int) -> tuple[slice, ...]:
+    return tuple(slice(row * width, (row + 1) * width) for row in range(height))
+
+
+class PackedBoard:
+    """
+    A board packed into 2 bits per cell: 0 empty, 1 ship, 2 hit, 3 miss (the cell states of numpy_board).
+    Cell row * width + col takes bits 2 * cell and 2 * cell + 1, so a 10x10 board takes 25 bytes of cells,
+    27 with the size prefix, instead of 264 for the pickled list of rows (measured with benchmark.py packed).
+
+    to_bytes puts the width and the height in front of the cells, so packets, checkpoints and replays
+    can store boards as they are. Packing and unpacking the bitboards of BattleField are a few operations
+    on whole ints, and the rows are decoded with a table of the cells of every byte.
+    """
+
+    __slots__ = ("width", "height", "data")
+
+    CELLS = ".SHM"
+    HEADER_SIZE = 2  # Width and height, one byte each (boards are at most MAX_BOARD_SIZE cells wide)
+
+    def __init__(self, width: int, height: int, data: bytes) -> None:
+        if not (1 <= width <= MAX_BOARD_SIZE and 1 <= height <= MAX_BOARD_SIZE):
+            raise ValueError("Uncorrect board size")
+        if len(data) != self.data_size(width, height):
+            raise ValueError("Uncorrect packed board")
+
+        self.width = width
+        self.height = height
+        self.data = bytes(data)
+
+    @staticmethod
+    def data_size(width: int, height: int) -> int:
+        return (width * height + 3) // 4
+
+    @classmethod
+    def from_bitboards(cls, width: int, height: int, ships: int, hits: int, misses: int) -> "PackedBoard":
+        cells = width * height
+        # Low bit: ship or miss, high bit: hit or miss.
+        low = spread_bits((ships & ~hits) | misses, cells)
+        high = spread_bits(hits | misses, cells)
+        return cls(width, height, (low | high << 1).to_bytes(cls.data_size(width, height), "little"))
+
+    def to_bitboards(self) -> tuple[int, int, int]:
+        """
+        The bitboards of the ship cells (hit or not), the hit cells and the missed cells.
+        """
+        cells = self.width * self.height
+        packed = int.from_bytes(self.data, "little")
+        low = gather_bits(packed, cells)
+        high = gather_bits(packed >> 1, cells)
+        # Codes (high bit, low bit): 01 ship, 10 hit, 11 miss. A ship cell is a ship or a hit,
+        # the codes with exactly one bit set.
+        return low ^ high, high & ~low, low & high
+
+    @classmethod
+    def from_field(cls, field: list[list[str]]) -> "PackedBoard":
+        """
+        Packs a list of rows of cells ("." empty, "S" ship, "H" hit, "M" miss), 4 cells at a time.
+        """
+        height, width = len(field), len(field[0])
+        cells = "".join(map("".join, field))
+        cells += "." * (-len(cells) % 4)
+        try:
+            data = bytes([_PACKED_BYTES[cells[i : i + 4]] for i in range(0, len(cells), 4)])
+        except KeyError:
+            raise ValueError("Uncorrect battle field") from None
+        return cls(width, height, data)
+
+    def to_rows(self) -> list[str]:
+        """
+        The rows of cells as strings, decoded by a table of the cells of every byte.
+        """
+        cells = codecs.charmap_decode(self.data, "strict", _PACKED_CELLS)[0]
+        return list(map(cells.__getitem__, _row_slices(self.width, self.height)))
+
+    def to_field(self) -> list[list[str]]:
+        return [list(row) for row in self.to_rows()]
+
+    def to_bytes(self) -> bytes:
+        return bytes((self.width, self.height)) + self.data
+
+    @classmethod
+    def from_bytes(cls, buffer, offset: int = 0) -> "PackedBoard":
+        """
+        Reads a board written by to_bytes from a bytes-like object (bytes, bytearray, memoryview),
+        starting at offset. Only the board itself is copied, so boards can be read out of a larger buffer.
+        """
+        if len(buffer) < offset + cls.HEADER_SIZE:
+            raise ValueError("Uncorrect packed board")
+
+        width, height = buffer[offset], buffer[offset + 1]
+        start = offset + cls.HEADER_SIZE
+        return cls(width, height, buffer[start : start + cls.data_size(width, height)])
+
+    def size(self) -> int:
+        """
+        Number of bytes to_bytes takes.
+        """
+        return self.HEADER_SIZE + len(self.data)
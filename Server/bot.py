@@ -0,0 +1,179 @@
+from itertools import count
+from packet import Packet
+from log import Log
+from ai import TargetingEngine, random_fleet_mask
+from timers import timers
+from settings import BOT_THINK_TIME, BOT_POLL_INTERVAL
+
+
+class BotNetwork:
+    """
+    Stands in for the network connection of a bot.
+    Packets the session sends to the bot are handed straight to it instead of a socket.
+    """
+
+    def __init__(self, bot: "Bot") -> None:
+        self.bot = bot
+        self.ip = "bot"
+        self.conn = None
+        self.is_connected = True
+
+    def connected(self) -> bool:
+        return self.is_connected
+
+    def send(self, packet: Packet) -> bool:
+        if not self.is_connected:
+            return False
+        try:
+            self.bot.handle_packet(packet)
+        except Exception as e:
+            Log.exception(f'Bot "{self.bot.name}" failed to handle a packet', e)
+        return True
+
+    def disconnect(self) -> None:
+        self.is_connected = False
+
+
+class Bot:
+    """
+    A computer player that fills a session slot like a User.
+
+    The bot doesn't have a thread of its own: it reacts to the packets of the session and
+    schedules its next request (a shot or a poll for its turn) on the shared timer heap,
+    so hundreds of bot games cost almost nothing while the bots wait.
+    The timer only queues the bot's turn on the session (see Session.add_bot_action) and the request,
+    e.g. the search for the next shot, is made by the session thread, which keeps the timer thread free.
+    """
+
+    is_bot = True
+
+    next_bot_id = count(1)
+
+    def __init__(self, difficulty: str) -> None:
+        self.id = f"bot-{next(Bot.next_bot_id)}"
+        self.name = f"Bot #{self.id[4:]} ({difficulty})"
+        self.difficulty = difficulty
+
+        self.net = BotNetwork(self)
+
+        self.session = None
+        self.is_looking_for_session = False
+        self.spectating = None
+        self.features = set()  # The bot reads the fields as lists of rows
+
+        self.engine = None
+        self.last_shot = None
+        self.game_ended = False
+
+    def connect_session(self, session: "Session" = None) -> None:
+        self.session = session
+        rules = session.rules
+        self.engine = TargetingEngine(self.difficulty, rules.width, rules.height, rules.fleet)
+        self.last_shot = None
+        self.game_ended = False
+
+    def is_in_session(self) -> bool:
+        return True if self.session else False
+
+    def disconnect_session(self, find_new_session: bool = False) -> None:
+        # A bot only ever plays the session it was created for.
+        self.session = None
+        self.net.disconnect()
+
+    def stop_spectating(self) -> None:
+        pass
+
+    def _schedule(self, delay: float, action) -> None:
+        """
+        Queues the action on the session after delay seconds. The action runs on the session thread
+        and returns the data of the bot's SESSION_DATA packet, or None if there is nothing to send.
+        """
+        timers.schedule(delay, self._wake_up, action)
+
+    def _wake_up(self, action) -> None:
+        # Timer callback, it must not block the timer thread.
+        session = self.session
+        if session and session.is_active and not session.add_bot_action(self, action):
+            # The packet queue of the session is full, try again later.
+            timers.schedule(BOT_POLL_INTERVAL, self._wake_up, action)
+
+    def _post(self, data: dict) -> dict:
+        return {"code": self.session.GameDataCode.POST_DATA.value, "data": data}
+
+    def _request_data(self) -> dict:
+        if self.session and not self.game_ended:
+            return {"code": self.session.GameDataCode.GET_DATA.value}
+        return None
+
+    def _post_battle_field(self) -> dict:
+        # The fleet is sent as the bitmask of its cells, which stays small on any board size.
+        rules = self.session.rules
+        return self._post(
+            {
+                "type": self.session.GameDataType.BATTLE_FIELD.value,
+                "ships": random_fleet_mask(rules.width, rules.height, rules.fleet),
+            }
+        )
+
+    def _shoot(self) -> dict:
+        if not self.session or self.game_ended:
+            return None
+        row, col = self.engine.next_shot()
+        self.last_shot = (row, col)
+        return self._post(
+            {
+                "type": self.session.GameDataType.COORDINATE.value,
+                "coords": {"row": row, "col": col},
+            }
+        )
+
+    def handle_packet(self, packet: Packet) -> None:
+        session = self.session
+        if not session or packet.code != Packet.Code.SESSION_DATA:
+            if packet.code == Packet.Code.ERROR and session:
+                # The last request was rejected, try again a bit later.
+                self._schedule(BOT_POLL_INTERVAL, self._request_data)
+            return
+
+        code = packet.data.get("code")
+        if code == session.GameDataCode.SESSION_STARTED.value:
+            self._schedule(0, self._post_battle_field)
+        elif code in (session.GameDataCode.COMPLETE.value, session.GameDataCode.WAITING.value):
+            self._schedule(BOT_POLL_INTERVAL, self._request_data)
+        elif code == session.GameDataCode.POST_DATA.value:
+            data = packet.data["data"]
+
+            if data["type"] == session.GameDataType.BATTLE_FIELD_REQUIRED.value:
+                self._schedule(0, self._post_battle_field)
+            elif data["type"] == session.GameDataType.BATTLE_FIELD.value:
+                # The shooting field also contains shots the session made for the bot on timeout.
+                self.engine.sync(data["field"])
+                self._schedule(BOT_THINK_TIME, self._shoot)
+            elif data["type"] == session.GameDataType.NOT_YOUR_TURN.value:
+                self._schedule(BOT_POLL_INTERVAL, self._request_data)
+            elif data["type"] == session.GameDataType.SHOOT_STATE.value:
+                self._on_shoot_state(data)
+            elif data["type"] == session.GameDataType.RESULTS.value:
+                self.game_ended = True
+
+    def _on_shoot_state(self, data: dict) -> None:
+        # Imported here because game_session imports this module.
+        from game_session import BattleField
+
+        shoot_state = data["shoot_state"]
+        if shoot_state == BattleField.ShootState.SUNK.value and self.last_shot:
+            row, col = self.last_shot
+            self.engine.sunk(row, col)
+            self.engine.sync(data["field"])
+        elif shoot_state in (BattleField.ShootState.HIT.value, BattleField.ShootState.SUNK.value):
+            self.engine.sync(data["field"])
+        elif shoot_state == BattleField.ShootState.MISS.value and self.last_shot:
+            row, col = self.last_shot
+            self.engine.record(row, col, False)
+        self.last_shot = None
+
+        if shoot_state in (BattleField.ShootState.HIT.value, BattleField.ShootState.SUNK.value):
+            # A hit gives one more shot.
+            self._schedule(BOT_THINK_TIME, self._shoot)
+        else:
+            self._schedule(BOT_POLL_INTERVAL, self._request_data)
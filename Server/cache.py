@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache:
+    """
+    Bounded cache that drops the least recently used entries first. It is shared between the
+    user and session threads, so every operation takes a lock.
+
+    Every cache registers itself by name and counts its hits, misses and evictions,
+    so administrators can see how well it works (see the 'caches' command).
+
+    Entries can also expire a fixed time after they were stored, for data that can change
+    behind the cache's back (e.g. rows edited directly in the database).
+    """
+
+    caches: dict[str, "LRUCache"] = {}
+
+    _missing = object()
+
+    def __init__(self, name: str, max_size: int, ttl: float = 0) -> None:
+        """
+        :param name: Name of the cache shown to administrators.
+        :param max_size: Maximum number of entries, 0 disables the cache.
+        :param ttl: Seconds an entry stays valid after it was stored, 0 keeps entries until they're evicted.
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        LRUCache.caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Returns the value of the key and marks it as recently used, or default if the key isn't cached.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is self._missing:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """
+        Returns the value of the key like get(), but doesn't mark it as used or count the lookup.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            return default if value is self._missing else value
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return self._missing
+
+        value, expires = entry
+        if expires and expires < monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return self._missing
+        return value
+
+    def put(self, key, value) -> None:
+        """
+        Stores the value of the key, dropping the least recently used entry if the cache is full.
+        """
+        if self.max_size <= 0:
+            return
+
+        expires = monotonic() + self.ttl if self.ttl > 0 else 0
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def remove(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def hit_rate(self) -> float:
+        """
+        Share of the lookups that found their key, from 0 to 1.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "ttl": self.ttl,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate(),
+        }
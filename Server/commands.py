@@ -1,9 +1,11 @@
 from time import sleep
 from user import User
 from game_session import Session, BattleField
+from board import column_name
 from data import Data
 from settings import DEBUG
 from log import Log
+from cache import LRUCache
 
 
 class Commands:
@@ -47,7 +49,7 @@ Available commands:
     2. ban-list,
     3. white-list,
     4. sessions,
-    5. ban <user_name>,
+    5. ban <user_name> [<user_name> ...],
     6. unban <user_name>,
     7. disconnect <user_name>,
     8. stop-session <id>,
@@ -56,8 +58,10 @@ Available commands:
     11. all-users,
     12. delete-user <user_name>,
     13. add-admin-user <user_name>
-    14. stop,
-    15. restart
+    14. caches,
+    15. db-stats,
+    16. stop,
+    17. restart
 Example:
     ban SomeUserName
     
@@ -169,14 +173,29 @@ Example:
     def ban_user(server, args, kwargs) -> str:
         output = ""
 
-        user_name = kwargs.get("user_name") or (args[0] if args else None)
-        if user_name:
-            user = User.get_user_by_name(server, user_name)
+        user_names = [kwargs["user_name"]] if kwargs.get("user_name") else args
+        if len(user_names) == 1:
+            user = User.get_user_by_name(server, user_names[0])
             if user:
                 user.ban()
-                output += f"The User with name {user_name} has been banned."
+                output += f"The User with name {user_names[0]} has been banned."
             else:
-                output += f"Failed to ban user with name {user_name}."
+                output += f"Failed to ban user with name {user_names[0]}."
+        elif user_names:
+            # Several users are added to the black list with a single commit.
+            users = []
+            for user_name in user_names:
+                user = User.get_user_by_name(server, user_name)
+                if user:
+                    users.append(user)
+                else:
+                    output += f"Failed to ban user with name {user_name}.\n"
+
+            if users:
+                server.server_data.black_list.add_many([(user.name, user.id) for user in users])
+                for user in users:
+                    user.disconnect_user()
+                output += f"{len(users)} users have been banned: {', '.join(user.name for user in users)}."
         else:
             output += (
                 "Error: Specify a valid user name to ban (e.g., 'ban <user_name>')."
@@ -243,12 +262,17 @@ Example:
         def display_field(field : BattleField) -> None:
             nonlocal output
 
-            output += "   " + " ".join(chr(65+i) for i in range(len(field[0]))) + "\n"
+            # Columns past Z are named AA, AB... so the cells are widened to the longest column name.
+            width = len(field[0])
+            cell_width = len(column_name(width - 1))
+            row_width = max(2, len(str(len(field) - 1)))
+
+            output += " " * (row_width + 1) + " ".join(column_name(i).rjust(cell_width) for i in range(width)) + "\n"
 
-            output += "   " + "---" * len(field[0]) + "\n"
+            output += " " * (row_width + 1) + "---" * width + "\n"
 
             for idx, row in enumerate(field):
-                output += f"{idx:2} " + " ".join(row) + "\n"
+                output += f"{idx:{row_width}} " + " ".join(cell.rjust(cell_width) for cell in row) + "\n"
             output += "\n"            
 
         output = ""
@@ -278,6 +302,8 @@ Example:
 
                     output += "\n"
 
+                output += f"Spectators: {session.spectators.count()}\n"
+
                 winner = session.get_winner()
                 if winner:
                     output += f"The winner of this session is {winner.name}."
@@ -350,6 +376,49 @@ Example:
 
         return output
 
+    @staticmethod
+    @_command
+    def caches(server, args, kwargs) -> str:
+        output = ""
+
+        if len(LRUCache.caches) > 0:
+            output += "Caches:\n"
+            for i, cache in enumerate(LRUCache.caches.values()):
+                stats = cache.stats()
+                output += (
+                    f"{i + 1}. {stats['name'].capitalize()}: {stats['size']}/{stats['max_size']} entries, "
+                    f"hits: {stats['hits']}, misses: {stats['misses']} (hit rate: {stats['hit_rate']:.1%}), "
+                    f"evictions: {stats['evictions']}"
+                )
+                if stats["ttl"]:
+                    output += f", expired after {stats['ttl']}s: {stats['expirations']}"
+                output += "\n"
+        else:
+            output += "No caches yet."
+
+        return output
+
+    @staticmethod
+    @_command
+    def db_stats(server, args, kwargs) -> str:
+        output = ""
+
+        stats = server.server_data.database.stats()
+        if stats:
+            output += "Database connections:\n"
+            for name, value in stats.items():
+                if isinstance(value, float):
+                    value = f"{value:.3f}s"
+                output += f"  {name.replace('_', ' ').capitalize()}: {value}\n"
+        else:
+            output += "The database engine doesn't collect statistics."
+
+        output += "\nWrite-behind queue:\n"
+        for name, value in server.server_data.writer.stats().items():
+            output += f"  {name.replace('_', ' ').capitalize()}: {value}\n"
+
+        return output
+
     @staticmethod
     @_command
     def stop_server(server, args, kwargs) -> str:
@@ -3,19 +3,34 @@ from importlib import import_module
 from inspect import getmembers, isclass
 from log import Log
 from database import DataBase
+from databases import DatabaseWriter
 from models import *
+from migrations import migrate
+from settings import DATABASE_WRITE_BEHIND, DATABASE_WRITE_BATCH_SIZE, DATABASE_WRITE_QUEUE_SIZE
 
 class Data:
     def __init__(self) -> None:
         self.database = DataBase.init()
+        self.writer = DatabaseWriter(
+            self.database, DATABASE_WRITE_BEHIND, DATABASE_WRITE_BATCH_SIZE, DATABASE_WRITE_QUEUE_SIZE
+        )
         
         models_path = os.path.join(os.path.dirname(__file__), "models")
 
         self.__import_models(models_path)
+        migrate(self.database)
     
     def __del__(self) -> None:
+        self.close()
         DataBase.deinit()
 
+    def close(self) -> None:
+        """
+        Writes the queued writes to the database.
+        """
+        if hasattr(self, "writer"):
+            self.writer.close()
+
     def __import_models(self, models_path: str) -> None:
         self.models = []
         for file_name in os.listdir(models_path):
@@ -31,8 +46,11 @@ class Data:
                     self.models.append(obj)
     def delete_data(self) -> bool:
         try:
+            self.writer.close()
             for obj in self.models:
                 obj.delete()
+            # The migrations are applied again to the new tables.
+            self.database.delete_table("schema_version")
             self.__init__()
         except Exception as e:
             Log.exception("An error occurred while deleting data from the database", e)
@@ -1,4 +1,10 @@
-from settings import DATABASE_ENGINE, DATABASE_CONFIG
+from settings import (
+    DATABASE_ENGINE,
+    DATABASE_CONFIG,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_PING_INTERVAL,
+)
 from databases import MySQLDatabase, SQLiteDatabase
 
 
@@ -24,6 +30,9 @@ class DataBase:
                     DATABASE_CONFIG["user"],
                     DATABASE_CONFIG["password"],
                     DATABASE_CONFIG["database"],
+                    pool_size=DATABASE_POOL_SIZE,
+                    pool_timeout=DATABASE_POOL_TIMEOUT,
+                    ping_interval=DATABASE_POOL_PING_INTERVAL,
                 )
             except Exception as e:
                 raise DataBaseInitError(
@@ -32,7 +41,9 @@ class DataBase:
             return DataBase.database
         elif DataBase.engine == "SQLite":
             try:
-                DataBase.database = SQLiteDatabase(DATABASE_CONFIG["database"])
+                DataBase.database = SQLiteDatabase(
+                    DATABASE_CONFIG["database"], DATABASE_CONFIG.get("pragmas")
+                )
             except Exception as e:
                 raise DataBaseInitError(
                     f"An error occurred while connecting to the database. Try using a different DBMS\nDB Error: {e}"
@@ -1,3 +1,4 @@
 from .db import DatabaseInterface
 from .mysql_db import MySQLDatabase
 from .sqlite_db import SQLiteDatabase
+from .writer import DatabaseWriter, Durability
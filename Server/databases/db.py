@@ -6,6 +6,13 @@ class DatabaseInterface(ABC):
     def create_table(self, table_name, fields):
         pass
 
+    @abstractmethod
+    def create_index(self, table_name: str, index_name: str, columns: list, unique: bool = False) -> None:
+        """
+        Creates an index on the columns of the table, if an index with that name doesn't exist yet.
+        """
+        pass
+
     @abstractmethod
     def delete_table(self, table_name):
         pass
@@ -18,6 +25,15 @@ class DatabaseInterface(ABC):
     def select(self, table_name, conditions=None):
         pass
 
+    @abstractmethod
+    def select_one(self, table_name: str, conditions: dict) -> dict:
+        """
+        Returns the first row matching the conditions as a dictionary, or None.
+        Conditions on a primary key or an indexed column are resolved with an index lookup
+        instead of scanning the table.
+        """
+        pass
+
     @abstractmethod
     def delete(self, table_name, conditions=None):
         pass
@@ -25,3 +41,61 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def set(self, table_name: str, field: str, value, conditions: dict) -> int:
         pass
+
+    @abstractmethod
+    def update(self, table_name: str, values: dict, conditions: dict) -> int:
+        pass
+
+    def increment(self, table_name: str, field: str, delta: int, conditions: dict) -> int:
+        """
+        Adds the delta to the field of the rows matching the conditions with a single atomic UPDATE.
+        """
+        return self.increment_many(table_name, {field: delta}, conditions)
+
+    @abstractmethod
+    def increment_many(self, table_name: str, deltas: dict, conditions: dict, maximums: dict = None) -> int:
+        """
+        Adds deltas to several fields of the rows matching the conditions with a single atomic UPDATE
+        (SET field = field + delta), so concurrent updates never lose an increment.
+        :param deltas: Dictionary of column names and the values to add to them.
+        :param maximums: Dictionary of column names and values they are raised to if they're lower.
+        """
+        pass
+
+    @abstractmethod
+    def insert_many(self, table_name: str, rows: list[dict]) -> int:
+        pass
+
+    @abstractmethod
+    def set_many(self, table_name: str, field: str, updates: list[tuple]) -> int:
+        pass
+
+    @abstractmethod
+    def transaction(self):
+        """
+        Context manager that groups the statements of the with block into one transaction of the calling thread:
+        they are committed together when the block ends, or rolled back if it raises.
+        Transactions can be nested, only the outermost one commits or rolls back.
+        """
+        pass
+
+    @abstractmethod
+    def in_transaction(self) -> bool:
+        """
+        Tells if the calling thread is inside a transaction() block.
+        """
+        pass
+
+    @abstractmethod
+    def on_commit(self, callback) -> None:
+        """
+        Calls the callback once the transaction of the calling thread is committed, or right away outside
+        of a transaction. Callbacks of a transaction that is rolled back are dropped.
+        """
+        pass
+
+    def stats(self) -> dict:
+        """
+        Statistics of the database connections for administrators, empty if the engine doesn't collect any.
+        """
+        return {}
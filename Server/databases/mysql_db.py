@@ -1,21 +1,55 @@
 import mysql.connector as mysql
+from contextlib import contextmanager
+from threading import Lock, local
+from weakref import WeakKeyDictionary
 from .db import DatabaseInterface
+from .pool import ConnectionPool
+from .statements import Statements
 from log import Log
 
 
 class MySQLDatabase(DatabaseInterface):
-    def __init__(self, host: str, user: str, password: str, database: str) -> None:
+    statements = Statements("%s", "GREATEST")
+
+    def __init__(
+        self,
+        host: str,
+        user: str,
+        password: str,
+        database: str,
+        pool_size: int = 8,
+        pool_timeout: float = 10.0,
+        ping_interval: float = 60.0,
+    ) -> None:
+        """
+        MySQL connector connections can't be used by several threads at once, so every operation
+        checks a connection out of a pool (see ConnectionPool) instead of sharing a single one.
+        The connections are in autocommit mode, transaction() starts an explicit transaction.
+        """
         Log.info("Connecting to a MySQL database...")
 
-        self.connection = mysql.connect(
-            host=host, user=user, password=password, database=database
+        self._local = local()
+        # Connection -> its prepared cursors by statement, dropped together with the connection.
+        self._prepared = WeakKeyDictionary()
+        self._prepared_lock = Lock()
+        self.pool = ConnectionPool(
+            # Statements outside of transaction() are committed right away, so a read always sees the rows
+            # committed by the other connections instead of the snapshot of a transaction left open on its connection.
+            lambda: mysql.connect(host=host, user=user, password=password, database=database, autocommit=True),
+            lambda connection: connection.ping(reconnect=False),
+            lambda connection: connection.is_connected(),
+            size=pool_size,
+            timeout=pool_timeout,
+            ping_interval=ping_interval,
         )
         try:
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT VERSION()")
-            Log.info(
-                f"Succesfully connected to MySQL Database. MySQL DB version is {cursor.fetchone()[0]}"
-            )
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT VERSION()")
+                Log.info(
+                    f"Succesfully connected to MySQL Database. MySQL DB version is {cursor.fetchone()[0]}"
+                )
+                cursor.close()
         except mysql.Error as e:
             Log.exception(
                 "Failed to connect to MySQL database. Check if it is running", e
@@ -26,9 +60,8 @@ class MySQLDatabase(DatabaseInterface):
 
     def __del__(self):
         try:
-            if self.connection.is_connected():
-                Log.info("Closing the connection to the MySQL Database...")
-                self.connection.close()
+            Log.info("Closing the connections to the MySQL Database...")
+            self.pool.close()
         except Exception as e:
             pass
 
@@ -38,71 +71,137 @@ class MySQLDatabase(DatabaseInterface):
     def __exit__(self, exc_type, exc_value, traceback):
         self.__del__()
 
+    def stats(self) -> dict:
+        return {"engine": "MySQL", **self.pool.stats()}
+
+    @contextmanager
+    def transaction(self):
+        # The thread keeps its connection until the outermost transaction ends,
+        # the pool rolls it back if the block raises.
+        with self.pool.connection() as connection:
+            depth = getattr(self._local, "transaction_depth", 0)
+            if not depth:
+                self._local.on_commit = []
+                connection.start_transaction()
+            self._local.transaction_depth = depth + 1
+            try:
+                yield self
+            finally:
+                self._local.transaction_depth = depth
+            if not depth:
+                connection.commit()
+
+        if not depth:
+            # Run once the connection is back in the pool.
+            callbacks, self._local.on_commit = self._local.on_commit, []
+            for callback in callbacks:
+                callback()
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "transaction_depth", 0) > 0
+
+    def on_commit(self, callback) -> None:
+        if self.in_transaction():
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+
+    def _execute(self, connection, statement: str, params: tuple, dictionary: bool = False):
+        """
+        Executes a statement from the statement cache with a server-side prepared cursor of the connection.
+        Every connection keeps one cursor per statement, so a statement is prepared once per connection
+        and later executions only send the parameters.
+        """
+        cursors = self._prepared.get(connection)
+        if cursors is None:
+            with self._prepared_lock:
+                cursors = self._prepared.setdefault(connection, {})
+
+        key = (statement, dictionary)
+        cursor = cursors.get(key)
+        if cursor is None:
+            cursor = connection.cursor(prepared=True, dictionary=dictionary)
+            cursors[key] = cursor
+
+        try:
+            cursor.execute(statement, params)
+        except Exception:
+            # Prepared again on the next use.
+            del cursors[key]
+            raise
+        return cursor
+
     def create_table(self, table_name: str, fields: dict):
-        cursor = self.connection.cursor()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
 
-        field_definitions = ", ".join(
-            [f"{name} {type}" for name, type in fields.items()]
-        )
-        cursor.execute(
-            f"CREATE TABLE IF NOT EXISTS {table_name} ({field_definitions});"
-        )
+            field_definitions = ", ".join(
+                [f"{name} {type}" for name, type in fields.items()]
+            )
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} ({field_definitions});"
+            )
+            cursor.close()
 
-        self.connection.commit()
-        cursor.close()
+    def create_index(self, table_name: str, index_name: str, columns: list, unique: bool = False) -> None:
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
 
-    def delete_table(self, table_name: str):
-        cursor = self.connection.cursor()
+            try:
+                # MySQL has no CREATE INDEX IF NOT EXISTS.
+                cursor.execute(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {index_name} ON {table_name} ({', '.join(columns)})"
+                )
+            except mysql.Error as e:
+                if e.errno != 1061:  # ER_DUP_KEYNAME, the index already exists
+                    raise
+            cursor.close()
 
-        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+    def delete_table(self, table_name: str):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
 
-        self.connection.commit()
-        cursor.close()
+            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+            cursor.close()
 
     def insert(self, table_name: str, data: dict):
-        cursor = self.connection.cursor()
+        with self.pool.connection() as connection:
+            self._execute(connection, self.statements.insert(table_name, tuple(data)), tuple(data.values()))
 
-        columns = ", ".join(data.keys())
-        values = ", ".join(["%s"] * len(data))
-        cursor.execute(
-            f"INSERT INTO {table_name} ({columns}) VALUES ({values});",
-            tuple(data.values()),
-        )
+    def select(self, table_name: str, conditions=None):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
 
-        self.connection.commit()
-        cursor.close()
+            conditions = conditions or {}
+            cursor.execute(self.statements.select(table_name, tuple(conditions)), tuple(conditions.values()))
 
-    def select(self, table_name: str, conditions=None):
-        cursor = self.connection.cursor(dictionary=True)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
 
-        query = f"SELECT * FROM {table_name}"
-        if conditions:
-            condition_str = " AND ".join([f"{col}=%s" for col in conditions])
-            query += f" WHERE {condition_str}"
-            cursor.execute(query, tuple(conditions.values()))
-        else:
-            cursor.execute(query)
+    def select_one(self, table_name: str, conditions: dict) -> dict:
+        with self.pool.connection() as connection:
+            cursor = self._execute(
+                connection,
+                self.statements.select_one(table_name, tuple(conditions)),
+                tuple(conditions.values()),
+                dictionary=True,
+            )
 
-        rows = cursor.fetchall()
-        cursor.close()
-        return rows
+            # Reads the whole result, so the cursor can be executed again.
+            rows = cursor.fetchall()
+            return rows[0] if rows else None
 
     def delete(self, table_name: str, conditions=None):
-        cursor = self.connection.cursor()
-        query = f"DELETE FROM {table_name}"
-        if conditions:
-            condition_str = " AND ".join([f"{col}=%s" for col in conditions])
-            query += f" WHERE {condition_str}"
-            cursor.execute(query, tuple(conditions.values()))
-        else:
-            cursor.execute(query)
-
-        deleted = cursor.rowcount
+        with self.pool.connection() as connection:
+            conditions = conditions or {}
+            cursor = self._execute(
+                connection, self.statements.delete(table_name, tuple(conditions)), tuple(conditions.values())
+            )
 
-        self.connection.commit()
-        cursor.close()
+            deleted = cursor.rowcount
 
-        return deleted
+            return deleted
 
     def set(self, table_name: str, field: str, value, conditions: dict) -> int:
         """
@@ -112,15 +211,83 @@ class MySQLDatabase(DatabaseInterface):
         :param value: New value for the field.
         :param conditions: Dictionary of conditions for selecting rows (where keys are column names and values are their values).
         """
-        cursor = self.connection.cursor()
-        condition_str = " AND ".join([f"{col}=%s" for col in conditions.keys()])
-        query = f"UPDATE {table_name} SET {field}=%s WHERE {condition_str};"
-        params = (value,) + tuple(conditions.values())
+        with self.pool.connection() as connection:
+            query = self.statements.update(table_name, (field,), tuple(conditions))
+            params = (value,) + tuple(conditions.values())
+
+            cursor = self._execute(connection, query, params)
+            updated_rows = cursor.rowcount
+
+            return updated_rows
+
+    def update(self, table_name: str, values: dict, conditions: dict) -> int:
+        """
+        Sets new values for several fields at once in rows matching the conditions.
+        :param table_name: The name of the table.
+        :param values: Dictionary of new values (where keys are column names).
+        :param conditions: Dictionary of conditions for selecting rows (where keys are column names and values are their values).
+        """
+        with self.pool.connection() as connection:
+            query = self.statements.update(table_name, tuple(values), tuple(conditions))
+            params = tuple(values.values()) + tuple(conditions.values())
+
+            cursor = self._execute(connection, query, params)
+            updated_rows = cursor.rowcount
+
+            return updated_rows
+
+    def increment_many(self, table_name: str, deltas: dict, conditions: dict, maximums: dict = None) -> int:
+        maximums = maximums or {}
+        if not deltas and not maximums:
+            return 0
+
+        with self.pool.connection() as connection:
+            query = self.statements.increment(table_name, tuple(deltas), tuple(maximums), tuple(conditions))
+            params = tuple(deltas.values()) + tuple(maximums.values()) + tuple(conditions.values())
 
-        cursor.execute(query, params)
-        updated_rows = cursor.rowcount
+            cursor = self._execute(connection, query, params)
+            updated_rows = cursor.rowcount
 
-        self.connection.commit()
-        cursor.close()
+            return updated_rows
+
+    def insert_many(self, table_name: str, rows: list[dict]) -> int:
+        """
+        Inserts several rows with a single commit (the connector sends them as one multi-row INSERT).
+        :param rows: Dictionaries of values, all with the same columns.
+        """
+        if not rows:
+            return 0
+
+        # In autocommit mode every statement would be committed on its own.
+        with self.transaction(), self.pool.connection() as connection:
+            cursor = connection.cursor()
+
+            cursor.executemany(
+                self.statements.insert(table_name, tuple(rows[0])),
+                [tuple(row.values()) for row in rows],
+            )
+            inserted = cursor.rowcount
+            cursor.close()
+
+            return inserted
+
+    def set_many(self, table_name: str, field: str, updates: list[tuple]) -> int:
+        """
+        Sets the field of several groups of rows with a single commit.
+        :param updates: Pairs of a new value and a dictionary of conditions, all conditions with the same columns.
+        """
+        if not updates:
+            return 0
+
+        # In autocommit mode every statement would be committed on its own.
+        with self.transaction(), self.pool.connection() as connection:
+            cursor = connection.cursor()
+            query = self.statements.update(table_name, (field,), tuple(updates[0][1]))
+
+            cursor.executemany(
+                query, [(value,) + tuple(conditions.values()) for value, conditions in updates]
+            )
+            updated_rows = cursor.rowcount
+            cursor.close()
 
-        return updated_rows
+            return updated_rows
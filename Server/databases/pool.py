@@ -0,0 +1,242 @@
+from collections import deque
+from contextlib import contextmanager
+from threading import Event, Lock, local
+from time import monotonic
+from typing import Callable
+from log import Log
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class _Waiter:
+    """
+    A thread waiting for a connection. The thread that frees a connection hands it over directly,
+    so threads that come later can't take it first.
+    """
+
+    def __init__(self) -> None:
+        self.event = Event()
+        self.connection = None
+        self.returned = None  # When the handed over connection was returned, None for a free slot
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database connections shared by the user, session and admin threads.
+
+    A thread checks a connection out for one operation and returns it afterwards, so no two threads
+    ever use a connection at the same time. Connections are opened on demand up to the size of the pool,
+    after that threads wait for a free one, in the order they came. A thread gets back the connection
+    it used last if it's free (its statements and buffers stay warm), and a thread that already holds
+    a connection gets the same one again instead of waiting for a second one.
+
+    A connection that has been idle for longer than the ping interval is checked before it's handed out,
+    so connections closed by the server (e.g. after MySQL's wait_timeout) are reopened transparently.
+    A connection that fails during an operation is dropped and replaced by a new one on demand.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], object],
+        check: Callable[[object], None],
+        is_usable: Callable[[object], bool],
+        size: int = 8,
+        timeout: float = 10.0,
+        ping_interval: float = 60.0,
+    ) -> None:
+        """
+        :param connect: Opens a new connection.
+        :param check: Checks a connection, raises if it can't be used anymore.
+        :param is_usable: Tells if a connection that raised an error during an operation can still be used.
+        :param size: Maximum number of open connections.
+        :param timeout: Seconds a thread waits for a free connection before PoolTimeoutError is raised.
+        :param ping_interval: Seconds a connection can stay idle before it's checked again.
+        """
+        self._connect = connect
+        self._check = check
+        self._is_usable = is_usable
+
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        self._lock = Lock()
+        self._idle: list[tuple[object, float]] = []  # Free connections and the time they were returned
+        self._waiters: deque[_Waiter] = deque()
+        self._open = 0
+        self._closed = False
+        self._local = local()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.created = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out for the duration of the with block.
+        """
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            # Nested use by the same thread: it already holds a connection.
+            yield held
+            return
+
+        connection = self._checkout()
+        self._local.held = connection
+        try:
+            yield connection
+        except Exception:
+            self._local.held = None
+            self._release(connection, failed=True)
+            raise
+        else:
+            self._local.held = None
+            self._release(connection)
+
+    def _checkout(self):
+        waiter = None
+        with self._lock:
+            self.checkouts += 1
+
+            if self._waiters or (not self._idle and self._open >= self.size):
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+                self.waits += 1
+            elif self._idle:
+                connection, returned = self._take_idle()
+            else:
+                # Reserve the slot, the connection is opened outside the lock.
+                self._open += 1
+                connection, returned = None, None
+
+        if waiter:
+            start = monotonic()
+            if not waiter.event.wait(self.timeout):
+                with self._lock:
+                    # The connection may have been handed over right after the timeout.
+                    if not waiter.event.is_set():
+                        self._waiters.remove(waiter)
+                        self.timeouts += 1
+                        raise PoolTimeoutError(f"No free database connection after {self.timeout} seconds.")
+            with self._lock:
+                self.wait_time += monotonic() - start
+            connection, returned = waiter.connection, waiter.returned
+
+        if connection is None:
+            connection = self._open_connection()
+        elif monotonic() - returned > self.ping_interval:
+            connection = self._health_check(connection)
+
+        self._local.last = connection
+        return connection
+
+    def _take_idle(self):
+        # The connection this thread used last, if it's free, otherwise the most recently returned one.
+        last = getattr(self._local, "last", None)
+        for index, (connection, returned) in enumerate(self._idle):
+            if connection is last:
+                return self._idle.pop(index)
+        return self._idle.pop()
+
+    def _health_check(self, connection):
+        try:
+            self._check(connection)
+            return connection
+        except Exception as e:
+            Log.warning(f"A database connection failed its health check, reconnecting: {e}")
+            self._close(connection)
+
+        with self._lock:
+            self.reconnects += 1
+        return self._open_connection()
+
+    def _open_connection(self):
+        try:
+            connection = self._connect()
+        except Exception:
+            self._drop_slot()
+            raise
+        with self._lock:
+            self.created += 1
+        return connection
+
+    def _release(self, connection, failed: bool = False) -> None:
+        usable = True
+        if failed:
+            with self._lock:
+                self.errors += 1
+            usable = self._is_usable(connection)
+            if usable:
+                # Don't hand the next thread a half-done transaction.
+                try:
+                    connection.rollback()
+                except Exception:
+                    usable = False
+
+        with self._lock:
+            if usable and not self._closed:
+                if self._waiters:
+                    self._hand_over(connection, monotonic())
+                else:
+                    self._idle.append((connection, monotonic()))
+                return
+
+        self._close(connection)
+        self._drop_slot()
+
+    def _drop_slot(self) -> None:
+        with self._lock:
+            if self._waiters and not self._closed:
+                # The slot goes to the first waiting thread, which opens a new connection.
+                self._hand_over(None, None)
+            else:
+                self._open -= 1
+
+    def _hand_over(self, connection, returned) -> None:
+        waiter = self._waiters.popleft()
+        waiter.connection = connection
+        waiter.returned = returned
+        waiter.event.set()
+
+    @staticmethod
+    def _close(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """
+        Closes the free connections. Connections in use are closed when they're returned.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._closed = True
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": idle,
+                "in_use": self._open - idle,
+                "waiting": len(self._waiters),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "reconnects": self.reconnects,
+                "created": self.created,
+            }
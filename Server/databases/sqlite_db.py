@@ -1,31 +1,90 @@
 import sqlite3 as sql
+from contextlib import contextmanager
+from threading import Lock, current_thread, local
 from .db import DatabaseInterface
+from .statements import Statements
 from log import Log
 
 
 class SQLiteDatabase(DatabaseInterface):
-    def __init__(self, database_file: str) -> None:
+    # Pragmas applied to every connection, DATABASE_CONFIG["pragmas"] overrides them.
+    PRAGMAS = {
+        "journal_mode": "WAL",   # Readers don't block the writer and the writer doesn't block readers
+        "synchronous": "NORMAL", # With WAL the database stays consistent, only the last commits can be lost on power loss
+        "busy_timeout": 5000,    # Milliseconds a connection waits for a lock before "database is locked"
+        "mmap_size": 67108864,   # Bytes of the database file read through memory mapping
+    }
+
+    statements = Statements("?", "MAX")
+
+    def __init__(self, database_file: str, pragmas: dict = None) -> None:
+        """
+        Every thread gets a connection of its own, opened on first use, so the user, session and admin
+        threads never share a connection and WAL lets them read while another one writes.
+        The connections are in autocommit mode, transaction() starts an explicit transaction, so a failed statement
+        never leaves a transaction open that would keep the write lock.
+        The database must be a file: every connection to ":memory:" (or "") opens a separate empty database.
+        """
+        if database_file in (":memory:", ""):
+            raise ValueError(
+                "SQLiteDatabase needs a database file, every thread connection to an in-memory database "
+                "would see a separate empty database."
+            )
+
         Log.info("Connecting to a SQLite database...")
 
-        self.connection = sql.connect(database_file, check_same_thread=False)
-        self.connection.row_factory = sql.Row
+        self.database_file = database_file
+        self.pragmas = {**self.PRAGMAS, **(pragmas or {})}
+
+        self._local = local()
+        self._connections = {}  # Thread -> its connection, connections of finished threads are closed
+        self._lock = Lock()
+        self.created = 0
+
         try:
-            cursor = self.connection.cursor()
+            cursor = self._connection().cursor()
 
             cursor.execute("SELECT sqlite_version();")
             version = cursor.fetchone()[0]
+            cursor.execute("PRAGMA journal_mode;")
+            journal_mode = cursor.fetchone()[0]
             Log.info(
-                f"Successfully connected to SQLite Database. SQLite DB version is {version}"
+                f"Successfully connected to SQLite Database. SQLite DB version is {version}, journal mode is {journal_mode}"
             )
         except sql.DatabaseError as e:
             Log.exception("Failed to connect to SQLite database.", e)
             raise Exception(f"Failed to connect to SQLite database. Error: {e}")
 
+    def _connection(self) -> sql.Connection:
+        """
+        The connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Closed from another thread when this one finishes, it's never used by two threads at once.
+            connection = sql.connect(self.database_file, check_same_thread=False, isolation_level=None)
+            connection.row_factory = sql.Row
+            for name, value in self.pragmas.items():
+                connection.execute(f"PRAGMA {name}={value};").fetchall()
+
+            with self._lock:
+                self._close_finished()
+                self._connections[current_thread()] = connection
+                self.created += 1
+            self._local.connection = connection
+        return connection
+
+    def _close_finished(self) -> None:
+        for thread in [thread for thread in self._connections if not thread.is_alive()]:
+            self._connections.pop(thread).close()
+
     def __del__(self):
         try:
-            if self.connection:
-                Log.info("Closing the SQLite database connection...")
-                self.connection.close()
+            Log.info("Closing the SQLite database connections...")
+            with self._lock:
+                for connection in self._connections.values():
+                    connection.close()
+                self._connections.clear()
         except Exception:
             pass
 
@@ -35,8 +94,51 @@ class SQLiteDatabase(DatabaseInterface):
     def __exit__(self, exc_type, exc_value, traceback):
         self.__del__()
 
+    def stats(self) -> dict:
+        with self._lock:
+            self._close_finished()
+            return {
+                "engine": "SQLite",
+                "open": len(self._connections),
+                "created": self.created,
+                **self.pragmas,
+            }
+
+    @contextmanager
+    def transaction(self):
+        connection = self._connection()
+        depth = getattr(self._local, "transaction_depth", 0)
+        if not depth:
+            self._local.on_commit = []
+            connection.execute("BEGIN;")
+        self._local.transaction_depth = depth + 1
+        try:
+            yield self
+        except Exception:
+            self._local.transaction_depth = depth
+            if not depth:
+                self._local.on_commit = []
+                connection.rollback()
+            raise
+        else:
+            self._local.transaction_depth = depth
+            if not depth:
+                connection.commit()
+                callbacks, self._local.on_commit = self._local.on_commit, []
+                for callback in callbacks:
+                    callback()
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "transaction_depth", 0) > 0
+
+    def on_commit(self, callback) -> None:
+        if self.in_transaction():
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+
     def create_table(self, table_name: str, fields: dict) -> None:
-        cursor = self.connection.cursor()
+        cursor = self._connection().cursor()
         field_definitions = ", ".join(
             [f"{name} {type}" for name, type in fields.items()]
         )
@@ -44,55 +146,51 @@ class SQLiteDatabase(DatabaseInterface):
         cursor.execute(
             f"CREATE TABLE IF NOT EXISTS {table_name} ({field_definitions});"
         )
-        self.connection.commit()
+        cursor.close()
+
+    def create_index(self, table_name: str, index_name: str, columns: list, unique: bool = False) -> None:
+        cursor = self._connection().cursor()
+
+        cursor.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)});"
+        )
         cursor.close()
 
     def delete_table(self, table_name: str):
-        cursor = self.connection.cursor()
+        cursor = self._connection().cursor()
 
         cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
 
-        self.connection.commit()
         cursor.close()
 
     def insert(self, table_name: str, data):
-        cursor = self.connection.cursor()
+        cursor = self._connection().cursor()
 
-        columns = ", ".join(data.keys())
-        values = ", ".join(["?"] * len(data))
-        cursor.execute(
-            f"INSERT INTO {table_name} ({columns}) VALUES ({values});",
-            tuple(data.values()),
-        )
+        cursor.execute(self.statements.insert(table_name, tuple(data)), tuple(data.values()))
 
-        self.connection.commit()
         cursor.close()
 
     def select(self, table_name: str, conditions=None):
-        cursor = self.connection.cursor()
-        query = f"SELECT * FROM {table_name}"
-        if conditions:
-            condition_str = " AND ".join([f"{col}=?" for col in conditions])
-            query += f" WHERE {condition_str}"
-            cursor.execute(query, tuple(conditions.values()))
-        else:
-            cursor.execute(query)
+        cursor = self._connection().cursor()
+        conditions = conditions or {}
+        cursor.execute(self.statements.select(table_name, tuple(conditions)), tuple(conditions.values()))
         rows = cursor.fetchall()
         cursor.close()
         return rows
 
+    def select_one(self, table_name: str, conditions: dict) -> dict:
+        cursor = self._connection().cursor()
+        cursor.execute(self.statements.select_one(table_name, tuple(conditions)), tuple(conditions.values()))
+        row = cursor.fetchone()
+        cursor.close()
+        return dict(row) if row else None
+
     def delete(self, table_name: str, conditions=None):
-        cursor = self.connection.cursor()
-        query = f"DELETE FROM {table_name}"
-        if conditions:
-            condition_str = " AND ".join([f"{col}=?" for col in conditions])
-            query += f" WHERE {condition_str}"
-            cursor.execute(query, tuple(conditions.values()))
-        else:
-            cursor.execute(query)
+        cursor = self._connection().cursor()
+        conditions = conditions or {}
+        cursor.execute(self.statements.delete(table_name, tuple(conditions)), tuple(conditions.values()))
 
         deleted = cursor.rowcount
-        self.connection.commit()
         cursor.close()
 
         return deleted
@@ -105,15 +203,89 @@ class SQLiteDatabase(DatabaseInterface):
         :param value: New value for the field.
         :param conditions: Dictionary of conditions for selecting rows (where keys are column names and values are their values).
         """
-        cursor = self.connection.cursor()
-        condition_str = " AND ".join([f"{col}=?" for col in conditions.keys()])
-        query = f"UPDATE {table_name} SET {field}=? WHERE {condition_str};"
+        cursor = self._connection().cursor()
+        query = self.statements.update(table_name, (field,), tuple(conditions))
         params = (value,) + tuple(conditions.values())
 
         cursor.execute(query, params)
         updated_rows = cursor.rowcount
 
-        self.connection.commit()
         cursor.close()
 
         return updated_rows
+
+    def update(self, table_name: str, values: dict, conditions: dict) -> int:
+        """
+        Sets new values for several fields at once in rows matching the conditions.
+        :param table_name: The name of the table.
+        :param values: Dictionary of new values (where keys are column names).
+        :param conditions: Dictionary of conditions for selecting rows (where keys are column names and values are their values).
+        """
+        cursor = self._connection().cursor()
+        query = self.statements.update(table_name, tuple(values), tuple(conditions))
+        params = tuple(values.values()) + tuple(conditions.values())
+
+        cursor.execute(query, params)
+        updated_rows = cursor.rowcount
+
+        cursor.close()
+
+        return updated_rows
+
+    def increment_many(self, table_name: str, deltas: dict, conditions: dict, maximums: dict = None) -> int:
+        maximums = maximums or {}
+        if not deltas and not maximums:
+            return 0
+
+        cursor = self._connection().cursor()
+        query = self.statements.increment(table_name, tuple(deltas), tuple(maximums), tuple(conditions))
+        params = tuple(deltas.values()) + tuple(maximums.values()) + tuple(conditions.values())
+
+        cursor.execute(query, params)
+        updated_rows = cursor.rowcount
+
+        cursor.close()
+
+        return updated_rows
+
+    def insert_many(self, table_name: str, rows: list[dict]) -> int:
+        """
+        Inserts several rows with one statement execution per row and a single commit.
+        :param rows: Dictionaries of values, all with the same columns.
+        """
+        if not rows:
+            return 0
+
+        # In autocommit mode every statement would be committed on its own.
+        with self.transaction():
+            cursor = self._connection().cursor()
+
+            cursor.executemany(
+                self.statements.insert(table_name, tuple(rows[0])),
+                [tuple(row.values()) for row in rows],
+            )
+            inserted = cursor.rowcount
+            cursor.close()
+
+            return inserted
+
+    def set_many(self, table_name: str, field: str, updates: list[tuple]) -> int:
+        """
+        Sets the field of several groups of rows with a single commit.
+        :param updates: Pairs of a new value and a dictionary of conditions, all conditions with the same columns.
+        """
+        if not updates:
+            return 0
+
+        # In autocommit mode every statement would be committed on its own.
+        with self.transaction():
+            cursor = self._connection().cursor()
+            query = self.statements.update(table_name, (field,), tuple(updates[0][1]))
+
+            cursor.executemany(
+                query, [(value,) + tuple(conditions.values()) for value, conditions in updates]
+            )
+            updated_rows = cursor.rowcount
+            cursor.close()
+
+            return updated_rows
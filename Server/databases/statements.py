@@ -0,0 +1,88 @@
+from threading import Lock
+from settings import SQL_STATEMENT_CACHE_SIZE
+
+
+class Statements:
+    """
+    Builds the SQL text of the queries of an engine. Every statement is built once per operation, table
+    and columns and taken from a dictionary afterwards, so the same string object is returned for the same query,
+    which also lets MySQL prepared cursors skip preparing it again.
+
+    The number of different statements is fixed by the code, so entries are never evicted,
+    the cache only stops growing when it's full. Lookups don't take a lock.
+    """
+
+    def __init__(self, placeholder: str, greatest: str, max_size: int = SQL_STATEMENT_CACHE_SIZE) -> None:
+        """
+        :param placeholder: Parameter placeholder of the database driver ("?" or "%s").
+        :param greatest: Function returning the greater of two values ("MAX" or "GREATEST").
+        :param max_size: Maximum number of cached statements, 0 disables the cache.
+        """
+        self.placeholder = placeholder
+        self.greatest = greatest
+        self.max_size = max_size
+
+        self._statements = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def _store(self, key: tuple, statement: str) -> str:
+        with self._lock:
+            # Another thread may have built it meanwhile, its string is kept so it stays the same object.
+            statement = self._statements.get(key, statement)
+            if len(self._statements) < self.max_size:
+                self._statements[key] = statement
+        return statement
+
+    def _where(self, columns: tuple) -> str:
+        if not columns:
+            return ""
+        return " WHERE " + " AND ".join([f"{col}={self.placeholder}" for col in columns])
+
+    def insert(self, table_name: str, columns: tuple) -> str:
+        key = ("insert", table_name, columns)
+        statement = self._statements.get(key)
+        if statement is None:
+            values = ", ".join([self.placeholder] * len(columns))
+            statement = self._store(key, f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({values})")
+        return statement
+
+    def select(self, table_name: str, conditions: tuple = ()) -> str:
+        key = ("select", table_name, conditions)
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._store(key, f"SELECT * FROM {table_name}{self._where(conditions)}")
+        return statement
+
+    def select_one(self, table_name: str, conditions: tuple) -> str:
+        key = ("select_one", table_name, conditions)
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._store(key, f"SELECT * FROM {table_name}{self._where(conditions)} LIMIT 1")
+        return statement
+
+    def delete(self, table_name: str, conditions: tuple = ()) -> str:
+        key = ("delete", table_name, conditions)
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._store(key, f"DELETE FROM {table_name}{self._where(conditions)}")
+        return statement
+
+    def update(self, table_name: str, columns: tuple, conditions: tuple) -> str:
+        key = ("update", table_name, columns, conditions)
+        statement = self._statements.get(key)
+        if statement is None:
+            values = ", ".join([f"{col}={self.placeholder}" for col in columns])
+            statement = self._store(key, f"UPDATE {table_name} SET {values}{self._where(conditions)}")
+        return statement
+
+    def increment(self, table_name: str, columns: tuple, maximums: tuple, conditions: tuple) -> str:
+        key = ("increment", table_name, columns, maximums, conditions)
+        statement = self._statements.get(key)
+        if statement is None:
+            values = [f"{col}={col}+{self.placeholder}" for col in columns]
+            values += [f"{col}={self.greatest}({col}, {self.placeholder})" for col in maximums]
+            statement = self._store(key, f"UPDATE {table_name} SET {', '.join(values)}{self._where(conditions)}")
+        return statement
@@ -0,0 +1,149 @@
+from concurrent.futures import Future
+from enum import Enum
+from queue import Empty, Queue
+from threading import Lock, Thread, current_thread
+from log import Log
+
+
+class Durability(Enum):
+    ASYNC = "async"          # The write is queued and the caller goes on right away (fire-and-forget)
+    COMMITTED = "committed"  # The caller waits until the write is committed and gets its result
+
+
+class DatabaseWriter:
+    """
+    Write-behind queue for writes that don't have to block the thread making them (logins, statistics).
+
+    Writes are queued as functions and run by one dedicated writer thread, which commits everything
+    queued so far (up to the batch size) in a single transaction. If a batch fails, its writes are retried
+    one by one, so only the failing write is lost. Writes are run in the order they were queued.
+
+    Writes made by the writer thread itself, inside a transaction of the calling thread, after the writer
+    is closed or with the writer disabled are run right away by the calling thread.
+    """
+
+    def __init__(self, database: "DatabaseInterface", enabled: bool = True, batch_size: int = 100, queue_size: int = 10000) -> None:
+        """
+        :param enabled: Without write-behind every write is run by the calling thread.
+        :param batch_size: Maximum number of writes committed in one transaction.
+        :param queue_size: Maximum number of queued writes, a thread queuing a write waits while the queue is full.
+        """
+        self.database = database
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+
+        self._queue = Queue(queue_size)
+        self._lock = Lock()  # Queuing a write and closing the writer exclude each other
+        self._closed = not enabled
+
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.largest_batch = 0
+
+        self._thread = None
+        if enabled:
+            self._thread = Thread(target=self._run, name="database-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, function, *args, durability: Durability = Durability.COMMITTED, **kwargs):
+        """
+        Runs function(*args, **kwargs) on the writer thread.
+        With Durability.COMMITTED waits for it to be committed and returns its result (or raises its error),
+        with Durability.ASYNC returns a Future of the result right away.
+        """
+        if self._closed or current_thread() is self._thread or self.database.in_transaction():
+            result = function(*args, **kwargs)
+            if durability is Durability.ASYNC:
+                future = Future()
+                future.set_result(result)
+                return future
+            return result
+
+        future = Future()
+        with self._lock:
+            if self._closed:
+                # Closed meanwhile, nothing will read the queue anymore.
+                return self.write(function, *args, durability=durability, **kwargs)
+            self._queue.put((function, args, kwargs, future, durability))
+            self.queued += 1
+
+        if durability is Durability.COMMITTED:
+            return future.result()
+        return future
+
+    def flush(self) -> None:
+        """
+        Waits until every write queued so far is committed.
+        """
+        self.write(lambda: None)
+
+    def close(self) -> None:
+        """
+        Writes everything that is queued and stops the writer thread. Later writes are run by the calling threads.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Nothing is queued after it, so the thread stops once everything before it is written.
+            self._queue.put(None)
+        if current_thread() is not self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+
+    def _write(self, batch: list) -> None:
+        try:
+            with self.database.transaction():
+                results = [function(*args, **kwargs) for function, args, kwargs, _, _ in batch]
+        except Exception as e:
+            if len(batch) > 1:
+                # The whole batch was rolled back, write them separately to find the failing one.
+                for item in batch:
+                    self._write([item])
+                return
+
+            function, _, _, future, durability = batch[0]
+            self.errors += 1
+            if durability is Durability.ASYNC:
+                # Nobody waits for the result of the write, so its error would go unnoticed.
+                Log.exception(f"A queued database write ({getattr(function, '__qualname__', function)}) failed", e)
+            future.set_exception(e)
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, _, _, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize(),
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "errors": self.errors,
+        }
@@ -1,13 +1,78 @@
-from threading import Thread
-from time import sleep, time
+from threading import Thread, Lock
+from time import time
 from typing import Optional
 from enum import Enum
-from queue import Queue
-from packet import Packet
+from queue import Queue, Empty, Full
+from random import choice
+from contextlib import suppress
+from packet import Packet, FEATURE_PACKED_BOARD
 from network import Network
 from log import Log
+from spectators import SpectatorHub
+from timers import timers
+from stats import SessionStatistics
+from bot import Bot
+from cache import LRUCache
+from board import (
+    CLASSIC_FLEET,
+    Rules,
+    PackedBoard,
+    load_variants,
+    placement_halo,
+    placement_cells,
+    mask_cells,
+    board_masks,
+    fleet_mask,
+    validate_fleet,
+)
+from settings import (
+    SETUP_PHASE_TIMEOUT,
+    TURN_TIMEOUT,
+    TURN_TIMEOUT_ACTION,
+    TURN_TIMEOUT_FORFEIT_AFTER,
+    RESULTS_TIMEOUT,
+    BOTS_ENABLED,
+    BOT_MATCH_WAIT,
+    BOT_DIFFICULTY,
+    REVEAL_SUNK_SHIP_SURROUNDINGS,
+    GAME_VARIANTS,
+    DEFAULT_GAME_VARIANT,
+    BOARD_ENGINE,
+    FLEET_VALIDATION_CACHE_SIZE,
+)
 
 MIN_PLAYERS_IN_SESSION = 2  # Minimum number of players required to start a session
+SESSION_POLL_INTERVAL = 0.1  # Seconds between checks of the players' connections while no packets arrive
+
+# Rules of the game variants players can choose, checked once when the server starts.
+GAME_RULES = load_variants(GAME_VARIANTS)
+if DEFAULT_GAME_VARIANT not in GAME_RULES:
+    raise ValueError(f"The default game variant '{DEFAULT_GAME_VARIANT}' is not one of GAME_VARIANTS.")
+
+# Results of the fleet validation by layout: bots, simulations and players who keep their fleet
+# between games submit the same layouts again and again.
+fleet_validation_cache = LRUCache("fleet validation", FLEET_VALIDATION_CACHE_SIZE)
+
+
+def validate_fleet_cached(mask: int, width: int, height: int, fleet: tuple) -> list[int]:
+    """
+    board.validate_fleet with its results cached by the rules and the bitmask of the ship cells,
+    which identify a layout exactly. Both the ships of a valid layout and the error of an invalid one are kept,
+    so a layout that was seen before is checked with one dictionary lookup.
+    """
+    key = (width, height, tuple(fleet), mask)
+    result = fleet_validation_cache.get(key)
+    if result is None:
+        try:
+            result = tuple(validate_fleet(mask, width, height, fleet))
+        except ValueError as e:
+            result = str(e)
+        fleet_validation_cache.put(key, result)
+
+    if isinstance(result, str):
+        raise ValueError(result)
+    return list(result)
+
 
 class BattleField:
     class ShootState(Enum):
@@ -15,179 +80,250 @@ class BattleField:
         HIT = 1         # The shot hit a ship cell
         MISS = 2        # The shot missed any ship
         ALREADY_SHOT = 3  # The cell has already been shot at
+        SUNK = 4        # The shot hit the last intact cell of a ship
+
+    BATTLE_FIELD_WIDTH = 10   # Battlefield width of the classic rules
+    BATTLE_FIELD_HEIGH = 10   # Battlefield height of the classic rules
+
+    def __init__(
+        self,
+        battle_field: list[list] = None,
+        width: int = BATTLE_FIELD_WIDTH,
+        height: int = BATTLE_FIELD_HEIGH,
+        fleet: tuple = CLASSIC_FLEET,
+    ) -> None:
+        """
+        Initializes the battlefield with either an existing configuration or a clean grid of the given size.
 
-    BATTLE_FIELD_WIDTH = 10   # Battlefield width is fixed at 10 cells
-    BATTLE_FIELD_HEIGH = 10   # Battlefield height is fixed at 10 cells
+        The board is stored as three bitboards (Python ints where bit row * width + col stands for a cell):
+        the ship cells, the hit cells and the missed cells. Shots and the end of game check are a few
+        integer operations; the list of lists is only built for rendering and for the clients (see battle_field).
+        Every ship keeps a counter of its intact cells, so a shot can tell when it sinks a ship.
 
-    def __init__(self, battle_field: list[list] = None) -> None:
-        """
-        Initializes the battlefield with either an existing configuration or a clean 10x10 grid.
         If a battlefield configuration is provided, its validity is checked:
-          - The battlefield must be a list of 10 lists.
-          - Each inner list must also have 10 elements.
-          - Ships (cells marked with "S") are grouped using DFS to check ship contiguity.
-          - Each ship must be placed either horizontally or vertically.
-          - The cells of each ship must be continuous (no gaps).
-          - The configuration must match the expected ship sizes (one 4-cell, two 3-cells,
-            three 2-cells, and four 1-cell ships).
+          - The battlefield must be a list of height lists of width cells, ships are the cells marked with "S".
+          - Each ship must be a straight horizontal or vertical line without gaps.
+          - The configuration must match the ship sizes of the fleet (by default the classic one: one 4-cell,
+            two 3-cells, three 2-cells, and four 1-cell ships).
           - Ships cannot be adjacent to each other in any of the 8 surrounding directions.
+        The checks are done on bitmasks with the precomputed placements of board.validate_fleet,
+        so their cost grows with the number of ships rather than with the size of the board,
+        and their results are cached by layout (see validate_fleet_cached).
         If any of these checks fail, a ValueError is raised.
         """
-        if battle_field:
-            if isinstance(battle_field, list):
-                if all([
-                    isinstance(field, list) and len(field) == 10
-                    for field in battle_field
-                ]):
-                    n, m = 10, 10
-                    # Initialize helper matrices for DFS: 'visited' tracks cells that have been checked,
-                    # 'component_id' stores which ship component each cell belongs to.
-                    visited = [[False] * m for _ in range(n)]
-                    component_id = [[None] * m for _ in range(n)]
-                    ship_lengths = []
-                    comp_id = 0
-                    components = {}  # comp_id: list of (i, j) cells in that ship
-
-                    # DFS to traverse the ships (connected components)
-                    for i in range(n):
-                        for j in range(m):
-                            if battle_field[i][j] == "S" and not visited[i][j]:
-                                stack = [(i, j)]
-                                components[comp_id] = []
-                                while stack:
-                                    x, y = stack.pop()
-                                    if visited[x][y]:
-                                        continue
-                                    visited[x][y] = True
-                                    component_id[x][y] = comp_id
-                                    components[comp_id].append((x, y))
-                                    # Traverse neighbors in 4 directions (without diagonals)
-                                    for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-                                        nx, ny = x + dx, y + dy
-                                        if (
-                                            0 <= nx < n
-                                            and 0 <= ny < m
-                                            and battle_field[nx][ny] == "S"
-                                            and not visited[nx][ny]
-                                        ):
-                                            stack.append((nx, ny))
-                                ship_cells = components[comp_id]
-                                xs = [x for x, _ in ship_cells]
-                                ys = [y for _, y in ship_cells]
-                                # Check that the ship is placed either horizontally or vertically
-                                if not (all(x == xs[0] for x in xs) or all(y == ys[0] for y in ys)):
-                                    raise ValueError(
-                                        f"Ship component {comp_id} is not placed horizontally or vertically."
-                                    )
-                                # Check for continuity: the distance between the extreme cells + 1 must equal the number of cells
-                                if all(x == xs[0] for x in xs):  # horizontal ship
-                                    if (max(ys) - min(ys) + 1) != len(ship_cells):
-                                        raise ValueError(
-                                            f"Ship component {comp_id}'s cells are not contiguous horizontally."
-                                        )
-                                else:  # vertical ship
-                                    if (max(xs) - min(xs) + 1) != len(ship_cells):
-                                        raise ValueError(
-                                            f"Ship component {comp_id}'s cells are not contiguous vertically."
-                                        )
-                                ship_lengths.append(len(ship_cells))
-                                comp_id += 1
-
-                    # Check for expected configuration based on ship sizes.
-                    # Classic configuration: one 4-cell, two 3-cells, three 2-cells, and four 1-cell ships.
-                    expected_ships = [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]
-                    if sorted(ship_lengths) != sorted(expected_ships):
-                        raise ValueError(
-                            f"Ship sizes {sorted(ship_lengths)} do not match expected configuration {sorted(expected_ships)}."
-                        )
+        self.width = width
+        self.height = height
+        self.fleet = fleet
 
-                    # Additional check: ships must not touch each other,
-                    # meaning that no ship cell should have a neighbor (in any of 8 directions) that belongs to a different ship.
-                    for i in range(n):
-                        for j in range(m):
-                            if battle_field[i][j] == "S":
-                                for dx in [-1, 0, 1]:
-                                    for dy in [-1, 0, 1]:
-                                        if dx == 0 and dy == 0:
-                                            continue
-                                        ni, nj = i + dx, j + dy
-                                        if (
-                                            0 <= ni < n
-                                            and 0 <= nj < m
-                                            and battle_field[ni][nj] == "S"
-                                        ):
-                                            # If the neighboring cell belongs to a different ship:
-                                            if component_id[ni][nj] != component_id[i][j]:
-                                                raise ValueError(
-                                                    "Ships cannot be adjacent to each other, even diagonally."
-                                                )
-
-                    self.battle_field = battle_field
-                else:
-                    raise ValueError("Uncorrect battle field")
-            else:
-                raise ValueError("Uncorrect battle field")
-        else:
-            # If no battlefield configuration is provided, initialize an empty 10x10 grid filled with '.' (empty cell)
-            self.battle_field = [["." for _ in range(10)] for _ in range(10)]
+        self.ships = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.ship_ids: dict[int, int] = {}  # Cell index -> index of the ship in ship_masks
+        self.ship_masks: list[int] = []     # Bitboard of every ship
+        self.ship_health: list[int] = []    # Number of cells of every ship that haven't been hit
+        self.ships_left = 0
+
+        # The list of lists view, built on first use and then kept up to date cell by cell.
+        self._view = None
+
+        if battle_field:
+            mask = fleet_mask(battle_field, width, height)
+            self._place_ships(validate_fleet_cached(mask, width, height, fleet))
+
+    @classmethod
+    def from_ship_mask(
+        cls,
+        mask: int,
+        width: int = BATTLE_FIELD_WIDTH,
+        height: int = BATTLE_FIELD_HEIGH,
+        fleet: tuple = CLASSIC_FLEET,
+    ) -> "BattleField":
+        """
+        Creates a battlefield from the bitmask of its ship cells, e.g. a fleet generated by a bot or
+        sent by a client. This skips the conversion of the list of lists; the fleet is still validated.
+        """
+        if not isinstance(mask, int) or mask < 0:
+            raise ValueError("Uncorrect battle field")
+
+        battle_field = cls(None, width, height, fleet)
+        battle_field._place_ships(validate_fleet_cached(mask, width, height, fleet))
+        return battle_field
+
+    def _place_ships(self, ship_masks: list[int]) -> None:
+        for ship, mask in enumerate(ship_masks):
+            cells = placement_cells(mask)
+            for cell in cells:
+                self.ship_ids[cell] = ship
+            self.ship_health.append(len(cells))
+            self.ships |= mask
+
+        self.ship_masks = ship_masks
+        self.ships_left = len(ship_masks)
+
+    @property
+    def battle_field(self) -> list[list[str]]:
+        """
+        The field as a list of rows of cells: "S" (ship), "H" (hit), "M" (miss) or "." (empty),
+        for rendering and for the clients. The list is shared and must not be modified.
+        """
+        if self._view is None:
+            self._view = [
+                [
+                    "H" if self.hits >> cell & 1
+                    else "M" if self.misses >> cell & 1
+                    else "S" if self.ships >> cell & 1
+                    else "."
+                    for cell in range(row * self.width, (row + 1) * self.width)
+                ]
+                for row in range(self.height)
+            ]
+        return self._view
+
+    def get_unshot_cells(self) -> list[tuple[int, int]]:
+        """
+        Returns the coordinates of all cells that haven't been shot at yet.
+        """
+        unshot = board_masks(self.width, self.height)[0] & ~(self.hits | self.misses)
+        return [divmod(cell, self.width) for cell in mask_cells(unshot)]
 
     def _check_coordinates(self, row, col) -> None:
         """
         Validate that the provided coordinates (row, col) are within the bounds of the battlefield.
         Raises a ValueError if the coordinates are invalid.
         """
-        rows = len(self.battle_field)
-        cols = len(self.battle_field[0])
-
-        if not (0 <= row < rows and 0 <= col < cols):
+        if not (0 <= row < self.height and 0 <= col < self.width):
             raise ValueError("Invalid coordinates")
 
     def shoot(self, row, col) -> 'BattleField.ShootState':
         """
         Processes a shot at the coordinates (row, col):
           - Check the coordinates for validity.
-          - Retrieve the content of the targeted cell.
-          - If a ship is present ("S"), mark the cell as hit ("H") and return HIT.
-          - If the cell is empty (".") mark it as a miss ("M") and return MISS.
-          - If the cell was already hit or marked as a miss (i.e. "H" or "M"), return ALREADY_SHOT.
-          - Otherwise, return UNKNOWN.
+          - If the cell was already hit or missed, return ALREADY_SHOT.
+          - If a ship is present, mark the cell as hit and return HIT, or SUNK if it was the last intact cell of the ship.
+          - Otherwise mark it as a miss and return MISS.
         """
-        self._check_coordinates(row, col)
-
-        cell = self.battle_field[row][col]
-        if cell == "S":
-            self.battle_field[row][col] = "H"
-            return self.ShootState.HIT
-        elif cell == ".":
-            self.battle_field[row][col] = "M"
-            return self.ShootState.MISS
-        elif cell in ("H", "M"):
-            return self.ShootState.ALREADY_SHOT
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError("Invalid coordinates")
 
-        return self.ShootState.UNKNOWN
+        bit = 1 << (row * self.width + col)
+        if (self.hits | self.misses) & bit:
+            return _ALREADY_SHOT
+        if self.ships & bit:
+            self.hits |= bit
+            if self._view:
+                self._view[row][col] = "H"
+
+            ship = self.ship_ids[row * self.width + col]
+            self.ship_health[ship] -= 1
+            if self.ship_health[ship] == 0:
+                self.ships_left -= 1
+                return _SUNK
+            return _HIT
+
+        self.misses |= bit
+        if self._view:
+            self._view[row][col] = "M"
+        return _MISS
 
     def is_all_ships_destroyed(self):
         """
-        Check the entire battlefield to determine if all ship cells ("S") have been turned into hits ("H").
-        Returns True if no ship cells remain, indicating that all ships have been destroyed.
+        Returns True if every ship has been sunk.
         """
-        for row in self.battle_field:
-            if "S" in row:
-                return False
-        return True
+        return self.ships_left == 0
+
+    def to_packed(self) -> PackedBoard:
+        """
+        The board packed into 2 bits per cell, for packets and storage.
+        """
+        return PackedBoard.from_bitboards(self.width, self.height, self.ships, self.hits, self.misses)
+
+    def get_ship_mask(self, row, col) -> int:
+        """
+        Returns the bitboard of the ship occupying the cell, 0 if there is no ship.
+        """
+        ship = self.ship_ids.get(row * self.width + col)
+        return 0 if ship is None else self.ship_masks[ship]
+
+    def reveal(self, mask: int) -> None:
+        """
+        Marks the cells of the bitboard that haven't been shot at as missed,
+        e.g. the water around a sunk ship, which can't contain another ship.
+        """
+        mask &= ~(self.hits | self.misses | self.ships)
+        self.misses |= mask
+
+        if self._view and mask:
+            for cell in mask_cells(mask):
+                row, col = divmod(cell, self.width)
+                self._view[row][col] = "M"
+
+    def copy(self) -> "BattleField":
+        """
+        Returns an independent copy of the field without validating it again.
+        """
+        field = BattleField.__new__(BattleField)
+        field.width, field.height, field.fleet = self.width, self.height, self.fleet
+        field.ships, field.hits, field.misses = self.ships, self.hits, self.misses
+        field._view = None
+        # The ships themselves never change, only their counters do.
+        field.ship_ids = self.ship_ids
+        field.ship_masks = self.ship_masks
+        field.ship_health = self.ship_health[:]
+        field.ships_left = self.ships_left
+        return field
 
     def set(self, row, col, shoot_state: 'BattleField.ShootState') -> None:
         """
         Manually sets the state of a specific cell in the battlefield:
           - Validates the coordinates.
-          - Sets the cell to "H" (hit) or "M" (miss) based on the provided shoot_state.
+          - Marks the cell as hit or missed based on the provided shoot_state.
         """
         self._check_coordinates(row, col)
 
-        if shoot_state == self.ShootState.HIT:
-            self.battle_field[row][col] = "H"
+        bit = 1 << (row * self.width + col)
+        if shoot_state in (self.ShootState.HIT, self.ShootState.SUNK):
+            self.hits |= bit
+            if self._view:
+                self._view[row][col] = "H"
         elif shoot_state == self.ShootState.MISS:
-            self.battle_field[row][col] = "M"
+            self.misses |= bit
+            if self._view:
+                self._view[row][col] = "M"
+
+
+# Shot results as plain module globals: looking enum members up through the class is slow in a hot path.
+_HIT, _MISS, _ALREADY_SHOT, _SUNK = (
+    BattleField.ShootState.HIT,
+    BattleField.ShootState.MISS,
+    BattleField.ShootState.ALREADY_SHOT,
+    BattleField.ShootState.SUNK,
+)
+
+
+_board_engines = {}
+
+
+def board_engine(name: str = BOARD_ENGINE) -> type:
+    """
+    The BattleField class of a board engine, by default the one of BOARD_ENGINE. If the NumPy engine
+    is chosen but NumPy isn't installed, the bitboard BattleField is used instead.
+    """
+    if name not in _board_engines:
+        if name == "python":
+            _board_engines[name] = BattleField
+        elif name == "numpy":
+            # Imported here because numpy_board imports this module.
+            from numpy_board import NumpyBattleField, NUMPY_AVAILABLE
+
+            if NUMPY_AVAILABLE:
+                _board_engines[name] = NumpyBattleField
+            else:
+                Log.warning("NumPy is not installed, the python board engine is used instead.")
+                _board_engines[name] = BattleField
+        else:
+            raise ValueError(f"Unknown board engine {name}")
+    return _board_engines[name]
 
 
 class Session:
@@ -198,6 +334,7 @@ class Session:
         POST_DATA = 3
         COMPLETE = 4
         WAITING = 5
+        SPECTATOR_EVENT = 6
 
     class GameDataType(Enum):
         BATTLE_FIELD_REQUIRED = 0
@@ -210,45 +347,93 @@ class Session:
     sessions: list["Session"] = []
     next_session_id = 0
 
+    # Users are matched from their own threads, so matchmaking is serialized
+    # to keep a player from being put into two sessions at once.
+    matchmaking_lock = Lock()
+
     @staticmethod
     def get_next_session_id():
         id = Session.next_session_id
         Session.next_session_id += 1
         return id
 
+    @staticmethod
+    def get_session_by_id(id: int) -> Optional["Session"]:
+        for session in Session.sessions:
+            if session.id == id:
+                return session
+        return None
+
     @staticmethod
     def connect(user: "User") -> Optional["Session"]:
-        players = set((user,))
+        with Session.matchmaking_lock:
+            # Another player may have already matched this user while it was waiting for the lock.
+            if user.session:
+                return user.session
+
+            players = set((user,))
 
-        for u in user.get_users(user.server):
-            if not u.session and u.is_looking_for_session:
-                players.add(u)
-            if len(players) >= MIN_PLAYERS_IN_SESSION:
-                session = Session(user.server, players)
+            # Only players who chose the same game variant play each other.
+            rules = GAME_RULES.get(user.variant, GAME_RULES[DEFAULT_GAME_VARIANT])
+
+            for u in list(user.get_users(user.server)):
+                if not u.session and u.is_looking_for_session and u.variant == user.variant:
+                    players.add(u)
+                if len(players) >= MIN_PLAYERS_IN_SESSION:
+                    session = Session(user.server, players, rules=rules)
+
+                    # The user is connected here too, so it's in the session before the session thread checks its players.
+                    for player in players:
+                        player.connect_session(session)
+
+                    session.start()
+                    return session
+
+            # Nobody else is looking for a game: after a while, bots take the free slots.
+            if BOTS_ENABLED and time() - user.looking_since >= BOT_MATCH_WAIT:
+                while len(players) < MIN_PLAYERS_IN_SESSION:
+                    players.add(Bot(BOT_DIFFICULTY))
+
+                session = Session(user.server, players, rules=rules)
 
                 for player in players:
-                    if player == user:
-                        continue
                     player.connect_session(session)
 
                 session.start()
                 return session
 
-        return None
+            return None
 
     @Log.log_logger.catch
-    def __init__(self, server, players: set) -> None:
+    def __init__(self, server, players: set, logger=None, rules: "Rules" = None) -> None:
         self.server = server
         self.players: list = list(players)
 
         self.id = Session.get_next_session_id()
 
-        self.logger = Log.Session(self.id)
+        # Board size and fleet of the game, the same for all players.
+        self.rules = rules if rules else GAME_RULES[DEFAULT_GAME_VARIANT]
+        self.board_engine = board_engine()
+
+        # A session logs into its own file unless another logger is given (e.g. by simulations).
+        self.logger = logger if logger else Log.Session(self.id)
 
         self.is_active = True
 
         self.data = Queue(100)
 
+        self.spectators = SpectatorHub(self.id)
+
+        # Statistics of the players are gathered in memory and saved once the session ends.
+        self.stats = SessionStatistics()
+
+        # The current phase deadline on the shared timer heap.
+        self.deadline = None
+        self.deadline_id = 0
+        self.expired_deadline = None  # (deadline_id, action) recorded by the timer thread
+        # Player -> number of shot clocks that expired in a row, an absent player gets forfeited after a few.
+        self.expired_turns = {}
+
         self.session_start_time = time()
         self.session_end_time = None
 
@@ -258,13 +443,90 @@ class Session:
         if packet.code == Packet.Code.SESSION_DATA:
             self.data.put({"player": user, "data": packet.data})
 
-    def get_data_packet(self) -> dict:
-        if not self.data.empty():
-            packet = self.data.get()
-            return packet
-        else:
+    def add_bot_action(self, bot: "Bot", action) -> bool:
+        """
+        Queues the turn of a bot. It's called on the timer thread, so it never waits for room in the queue.
+        The action runs on the session thread and returns the data of the bot's packet (see Bot._schedule).
+        Returns False if the queue is full.
+        """
+        try:
+            self.data.put_nowait({"player": bot, "action": action})
+        except Full:
+            return False
+        return True
+
+    def get_data_packet(self, timeout: float = None) -> dict:
+        """
+        Returns the next packet from the players, waiting up to timeout seconds for it.
+        Returns None if no packet has arrived.
+        """
+        try:
+            if timeout:
+                return self.data.get(timeout=timeout)
+            return self.data.get_nowait()
+        except Empty:
             return None
 
+    def _spectator_packet(self, event: dict) -> Packet:
+        return Packet(
+            Packet.Code.SESSION_DATA,
+            {
+                "code": self.GameDataCode.SPECTATOR_EVENT.value,
+                "session_id": self.id,
+                "event": event,
+            },
+        )
+
+    def _field_data(self, user, field: BattleField) -> dict:
+        """
+        The field for a packet to the user: packed (see board.PackedBoard) if their client supports it,
+        otherwise as a list of rows of cells.
+        """
+        if FEATURE_PACKED_BOARD in user.features:
+            return {"board": field.to_packed().to_bytes()}
+        return {"field": field.battle_field}
+
+    def publish_event(self, event: dict) -> None:
+        """
+        Sends a game event to everyone watching the session.
+        The packet is encoded once and shared between all spectators.
+        """
+        self.spectators.publish(self._spectator_packet(event))
+
+    def spectate(self, user: "User") -> bool:
+        """
+        Subscribes the user to the session events.
+        The spectator first receives a snapshot with the players and their shooting fields,
+        so ship positions are never revealed to spectators.
+        """
+        if user in self.players or not self.is_active:
+            return False
+
+        fields = self.get_fields() or {}
+        snapshot = {
+            "type": "snapshot",
+            "players": [player.name for player in self.players],
+            "phase": getattr(self, "phase", None),
+            "rules": self.rules.to_dict(),
+        }
+        if FEATURE_PACKED_BOARD in user.features:
+            snapshot["boards"] = {
+                player.name: player_fields[1].to_packed().to_bytes()
+                for player, player_fields in fields.items()
+                if player_fields
+            }
+        else:
+            snapshot["fields"] = {
+                player.name: player_fields[1].battle_field
+                for player, player_fields in fields.items()
+                if player_fields
+            }
+        turn = self.get_player_whose_turn()
+        if turn:
+            snapshot["turn"] = turn.name
+
+        return self.spectators.subscribe(user, self._spectator_packet(snapshot))
+
     def get_session_duration(self) -> float:
         if self.session_end_time is None:
             return time() - self.session_start_time
@@ -298,7 +560,12 @@ class Session:
     def Stop(self) -> None:
         self.is_active = False
 
-        Session.sessions.remove(self)
+        if self in Session.sessions:
+            Session.sessions.remove(self)
+
+        # Wake the session thread up so it notices the session has been stopped.
+        with suppress(Full):
+            self.data.put_nowait(None)
 
     def _Stop(self) -> None:
         self.logger.broadcast("Stopping game session.")
@@ -306,6 +573,15 @@ class Session:
 
         self.session_end_time = time()
 
+        self._set_deadline(0, None)
+
+        winner = self.get_winner()
+        self.spectators.close(
+            self._spectator_packet(
+                {"type": "closed", "winner": winner.name if winner else None}
+            )
+        )
+
         for player in self.players:
             player.disconnect_session(False)
             if player.net.connected():
@@ -316,43 +592,18 @@ class Session:
                             {"code": self.GameDataCode.SESSION_CLOSED.value},
                         )
                     )
-                    longest_player_match = self.server.server_data.users.get_stat_longest_match(player.name)
-                    if longest_player_match > self.get_session_duration():
-                        self.server.server_data.users.set_stat_hits(player.name, self.get_session_duration())
                 except Exception:
                     continue
 
+        self.stats.flush(self.server.server_data.users, self.get_session_duration())
+
         if self in Session.sessions:
             Session.sessions.remove(self)
 
     @Log.log_logger.catch
     def _start(self):
         try:
-            players = "\n"
-            for i, player in enumerate(self.players):
-                players += f"{i + 1}. '{player.name}'\n"
-            self.logger.broadcast(f"Starting game session. Players: {players}")
-            self.logger.info(f"Starting game session. Players: {players}")
-
-            for player in self.players:
-                player.net.send(
-                    Packet(
-                        Packet.Code.SESSION_DATA,
-                        {
-                            "code": self.GameDataCode.SESSION_STARTED.value,
-                            "session_id": self.id,
-                        },
-                    )
-                )
-
-                self.server.server_data.users.set_stat_matches(player.name, self.server.server_data.users.get_stat_matches(player.name) + 1)
-
-            self.battle_fields = {player: None for player in self.players}
-            self.phase = "setup"
-            self.player_attacks = -1  # Index of player in self.players
-            self.player_attacked = 0  # Index of player in self.players
-            self.winner = None
-            self.losers = []
+            self._begin()
 
             # Activating session main handler
             self._session_handler()
@@ -369,6 +620,151 @@ class Session:
         finally:
             self._Stop()
 
+    def _begin(self) -> None:
+        """
+        Notifies the players that the session has started and moves it into the 'setup' phase.
+        """
+        players = "\n"
+        for i, player in enumerate(self.players):
+            players += f"{i + 1}. '{player.name}'\n"
+        self.logger.broadcast(f"Starting game session. Players: {players}")
+        self.logger.info(f"Starting game session. Players: {players}")
+
+        for player in self.players:
+            player.net.send(
+                Packet(
+                    Packet.Code.SESSION_DATA,
+                    {
+                        "code": self.GameDataCode.SESSION_STARTED.value,
+                        "session_id": self.id,
+                        "rules": self.rules.to_dict(),
+                    },
+                )
+            )
+
+            self.stats.add(player, "stat_matches")
+
+        self.battle_fields = {player: None for player in self.players}
+        self.phase = "setup"
+        self.player_attacks = -1  # Index of player in self.players
+        self.player_attacked = 0  # Index of player in self.players
+        self.winner = None
+        self.losers = []
+
+        self.publish_event(
+            {
+                "type": "started",
+                "players": [player.name for player in self.players],
+                "rules": self.rules.to_dict(),
+            }
+        )
+
+        self._set_deadline(SETUP_PHASE_TIMEOUT, "setup")
+
+    def _set_deadline(self, timeout: float, action: str) -> None:
+        """
+        Replaces the current deadline of the session with a new one on the shared timer heap.
+        :param timeout: Seconds until the deadline expires, 0 only cancels the current deadline.
+        :param action: What has to be done on expiry: "setup", "turn" or "results".
+        """
+        if self.deadline:
+            self.deadline.cancel()
+            self.deadline = None
+
+        self.deadline_id += 1
+        if timeout > 0:
+            self.deadline = timers.schedule(
+                timeout, self._on_deadline, self.deadline_id, action
+            )
+
+    def _on_deadline(self, deadline_id: int, action: str) -> None:
+        """
+        Timer callback. It runs on the timer thread, so it only records the expired deadline
+        and wakes the session thread up; the deadline is handled by the session thread itself.
+        """
+        if deadline_id == self.deadline_id and self.is_active:
+            self.expired_deadline = (deadline_id, action)
+            with suppress(Full):
+                self.data.put_nowait(None)
+
+    def _handle_deadline(self, action: str) -> None:
+        if action == "setup":
+            ready_players = [
+                player for player, fields in self.battle_fields.items() if fields
+            ]
+            self.logger.info("Setup phase time is over.")
+
+            if len(ready_players) == 1:
+                self._declare_winner(ready_players[0], forfeit=True)
+            else:
+                self.Stop()
+        elif action == "turn":
+            player = self.players[self.player_attacks]
+            self.logger.info(f"Player {player.name} ran out of time to shoot.")
+
+            self.expired_turns[player] = self.expired_turns.get(player, 0) + 1
+            absent = TURN_TIMEOUT_FORFEIT_AFTER and self.expired_turns[player] >= TURN_TIMEOUT_FORFEIT_AFTER
+
+            if TURN_TIMEOUT_ACTION == "random_shot" and not absent:
+                view_field: BattleField = self.battle_fields[player][1]
+                row, col = choice(view_field.get_unshot_cells())
+                self._shoot(player, row, col)
+            else:
+                self._declare_winner(self.players[self.player_attacked], forfeit=True)
+        elif action == "results":
+            self.Stop()
+
+    def _declare_winner(self, player: "User", forfeit: bool = False) -> None:
+        """
+        Ends the battle. The winner is notified immediately; losers are notified when they ask for data,
+        or right away if the game was won by forfeit (the loser may not be responding at all).
+        """
+        self.logger.info(f"Player {player.name} win!")
+        player.net.send(
+            Packet(
+                Packet.Code.SESSION_DATA,
+                {
+                    "code": self.GameDataCode.POST_DATA.value,
+                    "data": {
+                        "type": self.GameDataType.RESULTS.value,
+                        "winner": "you",
+                    },
+                },
+            )
+        )
+
+        self.stats.add(player, "stat_wins")
+
+        self.winner = player
+        self.publish_event(
+            {"type": "winner", "winner": player.name, "forfeit": forfeit}
+        )
+
+        for pl in self.players:
+            if pl == self.winner:
+                continue
+            self.losers.append(pl)
+            self.stats.add(pl, "stat_defeats")
+
+            if forfeit:
+                pl.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.RESULTS.value,
+                                "winner": self.winner.name,
+                            },
+                        },
+                    )
+                )
+
+        if forfeit:
+            self.Stop()
+        else:
+            self._set_deadline(RESULTS_TIMEOUT, "results")
+
     def _session_handler(self):
         """
         Main loop for handling an active game session.
@@ -377,6 +773,9 @@ class Session:
           - Every player’s network connection is active and they are currently in the session.
           - The session itself is active.
           - There are at least a minimum number of players (MIN_PLAYERS_IN_SESSION) required to proceed.
+
+        The loop blocks on the packet queue, so packets are handled as soon as they arrive.
+        Expired deadlines wake it up through the same queue.
         """
         while (
             all(
@@ -386,358 +785,378 @@ class Session:
             and self.is_active
             and len(self.players) >= MIN_PLAYERS_IN_SESSION
         ):
-            # SESSION PHASE: 'setup' during this phase, the server asks users for their ship placement and saves it
-            if self.phase == "setup":
-                # If any player's battle field is still missing (i.e. has not been set up yet)
-                if any(field is None for field in self.battle_fields.values()):
-                    # Retrieve a data packet from one of the players
-                    packet = self.get_data_packet()
-                    if packet:
-                        player, data = packet["player"], packet["data"]
-
-                        if data.get("code") == self.GameDataCode.POST_DATA.value:
-                            if (
-                                data.get("data")
-                                and "type" in data["data"]
-                                and data["data"]["type"]
-                                == self.GameDataType.BATTLE_FIELD.value
-                            ):
-                                try:
-                                    self.battle_fields[player] = (
-                                        BattleField(data.get("data")["field"]),
-                                        BattleField(),
-                                    )
-                                    player.net.send(
-                                        Packet(
-                                            Packet.Code.SESSION_DATA,
-                                            {"code": self.GameDataCode.COMPLETE.value},
-                                        )
-                                    )
-
-                                    self.logger.info(
-                                        f"Player {player.name} battlefield accepted."
-                                    )
-                                except ValueError as e:
-                                    player.net.send(
-                                        Packet(
-                                            Packet.Code.ERROR,
-                                            {
-                                                "error_code": Network.Errors.UNCORRECT_PACKET.value,
-                                                "msg": e,
-                                            },
-                                        )
-                                    )
-                                    self.logger.error(
-                                        f"Player {player.name} battlefield uncorrect."
-                                    )
-                            else:
-                                player.net.send(
-                                    Packet(
-                                        Packet.Code.ERROR,
-                                        {
-                                            "error_code": Network.Errors.UNCORRECT_PACKET.value
-                                        },
-                                    )
-                                )
-                        elif data.get("code") == self.GameDataCode.GET_DATA.value:
-                            if self.battle_fields[player] is None:
-                                player.net.send(
-                                    Packet(
-                                        Packet.Code.SESSION_DATA,
-                                        {
-                                            "code": self.GameDataCode.POST_DATA.value,
-                                            "data": {
-                                                "type": self.GameDataType.BATTLE_FIELD_REQUIRED.value
-                                            },
-                                        },
-                                    )
-                                )
-                            else:
-                                wait_players = []
-                                for player, fields in self.battle_fields.items():
-                                    if fields is None:
-                                        wait_players.append(player.name)
-
-                                if wait_players:
-                                    player.net.send(
-                                        Packet(
-                                            Packet.Code.SESSION_DATA,
-                                            {
-                                                "code": self.GameDataCode.WAITING.value,
-                                                "player": " ".join(wait_players),
-                                            },
-                                        )
-                                    )
-                                else:
-                                    player.net.send(
-                                        Packet(
-                                            Packet.Code.SESSION_DATA,
-                                            {"code": self.GameDataCode.WAITING.value},
-                                        )
-                                    )
-                else:
-                    # If all battle fields have been received, change the phase to 'battle'
-                    self.phase = "battle"
-                    self.logger.info("Moving into a new phase: 'battle'")
+            self._process_packet(self.get_data_packet(SESSION_POLL_INTERVAL))
+
+    def _process_packet(self, packet: Optional[dict]) -> None:
+        """
+        Handles one packet from the players (or just an expired deadline if packet is None)
+        according to the current phase of the session.
+        """
+        if self.expired_deadline:
+            (deadline_id, action), self.expired_deadline = self.expired_deadline, None
+            # The deadline may have been replaced (e.g. the turn changed) after it expired.
+            if deadline_id == self.deadline_id:
+                self._handle_deadline(action)
+
+                if not self.is_active:
+                    return
+
+        if packet and "action" in packet:
+            # The turn of a bot: its request is made here instead of on the timer thread.
+            try:
+                data = packet["action"]()
+            except Exception as e:
+                Log.exception(f'Bot "{packet["player"].name}" failed to make its request', e)
+                data = None
+            packet = {"player": packet["player"], "data": data} if data else None
+
+        # SESSION PHASE: 'setup' during this phase, the server asks users for their ship placement and saves it
+        if self.phase == "setup":
+            if packet:
+                self._handle_setup_packet(packet["player"], packet["data"])
+
+            # If all battle fields have been received, change the phase to 'battle'
+            if all(field is not None for field in self.battle_fields.values()):
+                self.phase = "battle"
+                self.logger.info("Moving into a new phase: 'battle'")
+
+                self.logger.info(
+                    f"Now attacking player {self.players[self.player_attacks].name}"
+                )
+                self.publish_event(
+                    {
+                        "type": "battle",
+                        "turn": self.players[self.player_attacks].name,
+                    }
+                )
+                self._set_deadline(TURN_TIMEOUT, "turn")
+
+        elif self.phase == "battle":
+            # Battle phase: process game actions during active battles.
+            if packet:
+                self._handle_battle_packet(packet["player"], packet["data"])
+
+    def _handle_setup_packet(self, player: "User", data: dict) -> None:
+        if data.get("code") == self.GameDataCode.POST_DATA.value:
+            if (
+                data.get("data")
+                and "type" in data["data"]
+                and data["data"]["type"]
+                == self.GameDataType.BATTLE_FIELD.value
+            ):
+                try:
+                    self.battle_fields[player] = (
+                        self._create_battle_field(data["data"]),
+                        self.board_engine(None, self.rules.width, self.rules.height, self.rules.fleet),
+                    )
+                    player.net.send(
+                        Packet(
+                            Packet.Code.SESSION_DATA,
+                            {"code": self.GameDataCode.COMPLETE.value},
+                        )
+                    )
 
                     self.logger.info(
-                        f"Now attacking player {self.players[self.player_attacks].name}"
+                        f"Player {player.name} battlefield accepted."
+                    )
+                except ValueError as e:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.ERROR,
+                            {
+                                "error_code": Network.Errors.UNCORRECT_PACKET.value,
+                                "msg": e,
+                            },
+                        )
+                    )
+                    self.logger.error(
+                        f"Player {player.name} battlefield uncorrect."
+                    )
+            else:
+                player.net.send(
+                    Packet(
+                        Packet.Code.ERROR,
+                        {
+                            "error_code": Network.Errors.UNCORRECT_PACKET.value
+                        },
+                    )
+                )
+        elif data.get("code") == self.GameDataCode.GET_DATA.value:
+            if self.battle_fields[player] is None:
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.BATTLE_FIELD_REQUIRED.value
+                            },
+                        },
+                    )
+                )
+            else:
+                wait_players = []
+                for waiting_player, fields in self.battle_fields.items():
+                    if fields is None:
+                        wait_players.append(waiting_player.name)
+
+                if wait_players:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.SESSION_DATA,
+                            {
+                                "code": self.GameDataCode.WAITING.value,
+                                "player": " ".join(wait_players),
+                            },
+                        )
+                    )
+                else:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.SESSION_DATA,
+                            {"code": self.GameDataCode.WAITING.value},
+                        )
                     )
 
-            elif self.phase == "battle":
-                # Battle phase: process game actions during active battles.
-                packet = self.get_data_packet()
-                if packet:
-                    player, data = packet["player"], packet["data"]
+    def _create_battle_field(self, data: dict) -> BattleField:
+        """
+        Creates the battlefield a player has sent, either as the bitmask of the ship cells ("ships",
+        compact even on the largest boards) or as a list of rows of cells ("field").
+        Raises ValueError if it is not a valid placement of the fleet of the session.
+        """
+        rules = self.rules
+        if "ships" in data:
+            return self.board_engine.from_ship_mask(data["ships"], rules.width, rules.height, rules.fleet)
+        if data.get("field"):
+            return self.board_engine(data["field"], rules.width, rules.height, rules.fleet)
+        raise ValueError("Uncorrect battle field")
+
+    def _handle_battle_packet(self, player: "User", data: dict) -> None:
+        if self.winner:
+            # If a winner has already been determined, notify each player of the result.
+            if player == self.winner:
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.RESULTS.value,
+                                "winner": "you",
+                            },
+                        },
+                    )
+                )
+            else:
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.RESULTS.value,
+                                "winner": self.winner.name,
+                            },
+                        },
+                    )
+                )
+
+                if player in self.losers:
+                    self.losers.remove(player)
 
-                    if self.winner:
-                        # If a winner has already been determined, notify each player of the result.
-                        if player == self.winner:
+                if len(self.losers) == 0:
+                    self.Stop()
+        else:
+            # No winner is declared yet, so handle gameplay data.
+            if data.get("code") == self.GameDataCode.POST_DATA.value:
+                if data.get("data") and "type" in data["data"]:
+                    payload = data["data"]
+                    if (
+                        payload["type"]
+                        == self.GameDataType.COORDINATE.value
+                    ):
+                        player_attacks = self.players[self.player_attacks]
+
+                        if player != player_attacks:
                             player.net.send(
                                 Packet(
                                     Packet.Code.SESSION_DATA,
                                     {
                                         "code": self.GameDataCode.POST_DATA.value,
                                         "data": {
-                                            "type": self.GameDataType.RESULTS.value,
-                                            "winner": "you",
+                                            "type": self.GameDataType.NOT_YOUR_TURN.value
                                         },
                                     },
                                 )
                             )
                         else:
-                            player.net.send(
-                                Packet(
-                                    Packet.Code.SESSION_DATA,
-                                    {
-                                        "code": self.GameDataCode.POST_DATA.value,
-                                        "data": {
-                                            "type": self.GameDataType.RESULTS.value,
-                                            "winner": self.winner.name,
-                                        },
-                                    },
-                                )
+                            self.expired_turns[player] = 0
+                            self._shoot(
+                                player,
+                                payload["coords"]["row"],
+                                payload["coords"]["col"],
+                            )
+                    else:
+                        player.net.send(
+                            Packet(
+                                Packet.Code.ERROR,
+                                {
+                                    "error_code": Network.Errors.UNCORRECT_PACKET.value
+                                },
                             )
+                        )
+                else:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.ERROR,
+                            {
+                                "error_code": Network.Errors.UNCORRECT_PACKET.value
+                            },
+                        )
+                    )
 
-                            if player in self.losers:
-                                self.losers.remove(player)
+            elif data.get("code") == self.GameDataCode.GET_DATA.value:
+                if player == self.players[self.player_attacks]:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.SESSION_DATA,
+                            {
+                                "code": self.GameDataCode.POST_DATA.value,
+                                "data": {
+                                    "type": self.GameDataType.BATTLE_FIELD.value,
+                                    **self._field_data(
+                                        player, self.battle_fields[player][1]
+                                    ),
+                                    "player": self.players[
+                                        self.player_attacked
+                                    ].name,
+                                },
+                            },
+                        )
+                    )
+                else:
+                    player.net.send(
+                        Packet(
+                            Packet.Code.SESSION_DATA,
+                            {
+                                "code": self.GameDataCode.POST_DATA.value,
+                                "data": {
+                                    "type": self.GameDataType.NOT_YOUR_TURN.value
+                                },
+                            },
+                        )
+                    )
 
-                            if len(self.losers) == 0:
-                                self.Stop()
-                    else:
-                        # No winner is declared yet, so handle gameplay data.
-                        if data.get("code") == self.GameDataCode.POST_DATA.value:
-                            if data.get("data") and "type" in data["data"]:
-                                payload = data["data"]
-                                if (
-                                    payload["type"]
-                                    == self.GameDataType.COORDINATE.value
-                                ):
-                                    player_attacked = self.players[self.player_attacked]
-                                    player_attacks = self.players[self.player_attacks]
-
-                                    if player != player_attacks:
-                                        player.net.send(
-                                            Packet(
-                                                Packet.Code.SESSION_DATA,
-                                                {
-                                                    "code": self.GameDataCode.POST_DATA.value,
-                                                    "data": {
-                                                        "type": self.GameDataType.NOT_YOUR_TURN.value
-                                                    },
-                                                },
-                                            )
-                                        )
-                                    else:
-                                        # Retrieve the battlefields:
-                                        #   - The attacked player's field (hidden from the attacker).
-                                        #   - The attacker's view of the attacked player's field.
-                                        player_attacked_field: BattleField = (
-                                            self.battle_fields[player_attacked][0]
-                                        )
-                                        player_attacks_field: BattleField = (
-                                            self.battle_fields[player_attacks][0]
-                                        )
-                                        player_attacks_view_field: BattleField = (
-                                            self.battle_fields[player_attacks][1]
-                                        )
-
-                                        row, col = (
-                                            payload["coords"]["row"],
-                                            payload["coords"]["col"],
-                                        )
-
-                                        shoot_state = player_attacked_field.shoot(
-                                            row, col
-                                        )
-                                        player_attacks_view_field.set(
-                                            row, col, shoot_state
-                                        )
-
-                                        if player_attacked_field.is_all_ships_destroyed():
-                                            self.logger.info(
-                                                f"Player {player.name} win!"
-                                            )
-                                            player.net.send(
-                                                Packet(
-                                                    Packet.Code.SESSION_DATA,
-                                                    {
-                                                        "code": self.GameDataCode.POST_DATA.value,
-                                                        "data": {
-                                                            "type": self.GameDataType.RESULTS.value,
-                                                            "winner": "you",
-                                                        },
-                                                    },
-                                                )
-                                            )
-
-                                            self.server.server_data.users.set_stat_wins(player.name, self.server.server_data.users.get_stat_wins(player.name) + 1)
-
-                                            self.winner = player
-
-                                            for pl in self.players:
-                                                if pl == self.winner:
-                                                    continue
-                                                self.losers.append(pl)
-                                                self.server.server_data.users.set_stat_defeats(pl.name, self.server.server_data.users.get_stat_defeats(pl.name) + 1)
-                                        else:
-                                            if (
-                                                shoot_state
-                                                == BattleField.ShootState.HIT
-                                            ):
-                                                self.logger.info(
-                                                    f"Player {player.name} hit"
-                                                )
-                                                player.net.send(
-                                                    Packet(
-                                                        Packet.Code.SESSION_DATA,
-                                                        {
-                                                            "code": self.GameDataCode.POST_DATA.value,
-                                                            "data": {
-                                                                "type": self.GameDataType.SHOOT_STATE.value,
-                                                                "shoot_state": BattleField.ShootState.HIT.value,
-                                                                "field": player_attacks_view_field.battle_field,
-                                                            },
-                                                        },
-                                                    )
-                                                )
-                                                self.server.server_data.users.set_stat_hits(player.name, self.server.server_data.users.get_stat_hits(player.name) + 1)
-                                            elif (
-                                                shoot_state
-                                                == BattleField.ShootState.MISS
-                                            ):
-                                                self.logger.info(
-                                                    f"Player {player.name} missed"
-                                                )
-                                                player.net.send(
-                                                    Packet(
-                                                        Packet.Code.SESSION_DATA,
-                                                        {
-                                                            "code": self.GameDataCode.POST_DATA.value,
-                                                            "data": {
-                                                                "type": self.GameDataType.SHOOT_STATE.value,
-                                                                "shoot_state": BattleField.ShootState.MISS.value,
-                                                                "field": player_attacks_field.battle_field,
-                                                            },
-                                                        },
-                                                    )
-                                                )
-
-                                                self.server.server_data.users.set_stat_misses(player.name, self.server.server_data.users.get_stat_misses(player.name) + 1)
-
-                                                self.player_attacks = (
-                                                    self.player_attacks + 1
-                                                ) % len(self.players)
-                                                self.player_attacked = (
-                                                    self.player_attacked + 1
-                                                ) % len(self.players)
-
-                                                self.logger.info(
-                                                    f"Now attacking player {self.players[self.player_attacks].name}"
-                                                )
-
-                                            elif (
-                                                shoot_state
-                                                == BattleField.ShootState.ALREADY_SHOT
-                                            ):
-                                                self.logger.info(
-                                                    f"Player {player.name} already shot at same place"
-                                                )
-                                                player.net.send(
-                                                    Packet(
-                                                        Packet.Code.SESSION_DATA,
-                                                        {
-                                                            "code": self.GameDataCode.POST_DATA.value,
-                                                            "data": {
-                                                                "type": self.GameDataType.SHOOT_STATE.value,
-                                                                "shoot_state": BattleField.ShootState.ALREADY_SHOT.value,
-                                                            },
-                                                        },
-                                                    )
-                                                )
-                                            elif (
-                                                shoot_state
-                                                == BattleField.ShootState.UNKNOWN
-                                            ):
-                                                player.net.send(
-                                                    Packet(
-                                                        Packet.Code.ERROR,
-                                                        {
-                                                            "error_code": Network.Errors.UNCORRECT_PACKET.value
-                                                        },
-                                                    )
-                                                )
-                                else:
-                                    player.net.send(
-                                        Packet(
-                                            Packet.Code.ERROR,
-                                            {
-                                                "error_code": Network.Errors.UNCORRECT_PACKET.value
-                                            },
-                                        )
-                                    )
-                            else:
-                                player.net.send(
-                                    Packet(
-                                        Packet.Code.ERROR,
-                                        {
-                                            "error_code": Network.Errors.UNCORRECT_PACKET.value
-                                        },
-                                    )
-                                )
+    def _shoot(self, player: "User", row: int, col: int) -> None:
+        """
+        Processes a shot of the attacking player and notifies them of the result.
+        """
+        player_attacked = self.players[self.player_attacked]
+
+        # Retrieve the battlefields:
+        #   - The attacked player's field (hidden from the attacker).
+        #   - The attacker's view of the attacked player's field.
+        player_attacked_field: BattleField = self.battle_fields[player_attacked][0]
+        player_attacks_field: BattleField = self.battle_fields[player][0]
+        player_attacks_view_field: BattleField = self.battle_fields[player][1]
+
+        shoot_state = player_attacked_field.shoot(row, col)
+        player_attacks_view_field.set(row, col, shoot_state)
+
+        if shoot_state == BattleField.ShootState.SUNK and REVEAL_SUNK_SHIP_SURROUNDINGS:
+            # Ships can't touch, so the water around a sunk ship is revealed to both players.
+            surroundings = placement_halo(
+                player_attacked_field.width,
+                player_attacked_field.height,
+                player_attacked_field.get_ship_mask(row, col),
+            )
+            player_attacked_field.reveal(surroundings)
+            player_attacks_view_field.reveal(surroundings)
+
+        self.publish_event(
+            {
+                "type": "shot",
+                "player": player.name,
+                "target": player_attacked.name,
+                "coords": {"row": row, "col": col},
+                "shoot_state": shoot_state.value,
+            }
+        )
+
+        if player_attacked_field.is_all_ships_destroyed():
+            self._declare_winner(player)
+        else:
+            if shoot_state in (BattleField.ShootState.HIT, BattleField.ShootState.SUNK):
+                if shoot_state == BattleField.ShootState.SUNK:
+                    self.logger.info(f"Player {player.name} sunk a ship")
+                else:
+                    self.logger.info(f"Player {player.name} hit")
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.SHOOT_STATE.value,
+                                "shoot_state": shoot_state.value,
+                                **self._field_data(player, player_attacks_view_field),
+                            },
+                        },
+                    )
+                )
+                self.stats.add(player, "stat_hits")
 
-                        elif data.get("code") == self.GameDataCode.GET_DATA.value:
-                            if player == self.players[self.player_attacks]:
-                                player.net.send(
-                                    Packet(
-                                        Packet.Code.SESSION_DATA,
-                                        {
-                                            "code": self.GameDataCode.POST_DATA.value,
-                                            "data": {
-                                                "type": self.GameDataType.BATTLE_FIELD.value,
-                                                "field": self.battle_fields[player][
-                                                    1
-                                                ].battle_field,
-                                                "player": self.players[
-                                                    self.player_attacked
-                                                ].name,
-                                            },
-                                        },
-                                    )
-                                )
-                            else:
-                                player.net.send(
-                                    Packet(
-                                        Packet.Code.SESSION_DATA,
-                                        {
-                                            "code": self.GameDataCode.POST_DATA.value,
-                                            "data": {
-                                                "type": self.GameDataType.NOT_YOUR_TURN.value
-                                            },
-                                        },
-                                    )
-                                )
-            sleep(0.07)
+                # The player shoots again, so the shot clock restarts.
+                self._set_deadline(TURN_TIMEOUT, "turn")
+            elif shoot_state == BattleField.ShootState.MISS:
+                self.logger.info(f"Player {player.name} missed")
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.SHOOT_STATE.value,
+                                "shoot_state": BattleField.ShootState.MISS.value,
+                                **self._field_data(player, player_attacks_field),
+                            },
+                        },
+                    )
+                )
+
+                self.stats.add(player, "stat_misses")
+
+                self.player_attacks = (self.player_attacks + 1) % len(self.players)
+                self.player_attacked = (self.player_attacked + 1) % len(self.players)
+
+                self.logger.info(
+                    f"Now attacking player {self.players[self.player_attacks].name}"
+                )
+                self._set_deadline(TURN_TIMEOUT, "turn")
+
+            elif shoot_state == BattleField.ShootState.ALREADY_SHOT:
+                self.logger.info(f"Player {player.name} already shot at same place")
+                player.net.send(
+                    Packet(
+                        Packet.Code.SESSION_DATA,
+                        {
+                            "code": self.GameDataCode.POST_DATA.value,
+                            "data": {
+                                "type": self.GameDataType.SHOOT_STATE.value,
+                                "shoot_state": BattleField.ShootState.ALREADY_SHOT.value,
+                            },
+                        },
+                    )
+                )
+            elif shoot_state == BattleField.ShootState.UNKNOWN:
+                player.net.send(
+                    Packet(
+                        Packet.Code.ERROR,
+                        {
+                            "error_code": Network.Errors.UNCORRECT_PACKET.value
+                        },
+                    )
+                )
 
     def start(self):
         Thread(target=self._start, daemon=True).start()
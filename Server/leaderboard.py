@@ -0,0 +1,110 @@
+from bisect import bisect_left, insort
+from math import ceil
+from threading import Lock
+
+
+class Leaderboard:
+    """
+    The users ranked by their wins, kept sorted in memory.
+
+    It's loaded from the database once and then updated by the Users model whenever the wins of a user change,
+    so the top of the list, a page of it or the rank of a user are found with a binary search
+    instead of sorting every user on each request.
+
+    Users with the same number of wins share a rank (1, 2, 2, 4, ...) and are listed by name.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._entries: list[tuple[int, str]] = []  # (-wins, user name), the best users first
+        self._wins: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, users) -> None:
+        """
+        Replaces the whole leaderboard.
+        :param users: Pairs of a user name and its wins.
+        """
+        with self._lock:
+            self._wins = {user_name: wins for user_name, wins in users}
+            self._entries = sorted((-wins, user_name) for user_name, wins in self._wins.items())
+
+    def set(self, user_name: str, wins: int) -> None:
+        with self._lock:
+            self._set(user_name, wins)
+
+    def add(self, user_name: str, delta: int) -> None:
+        """
+        Adds the delta to the wins of a user that is on the leaderboard.
+        """
+        with self._lock:
+            wins = self._wins.get(user_name)
+            if wins is not None:
+                self._set(user_name, wins + delta)
+
+    def remove(self, user_name: str) -> None:
+        with self._lock:
+            wins = self._wins.pop(user_name, None)
+            if wins is not None:
+                self._remove_entry(wins, user_name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._wins.clear()
+            self._entries.clear()
+
+    def _set(self, user_name: str, wins: int) -> None:
+        old_wins = self._wins.get(user_name)
+        if old_wins == wins:
+            return
+        if old_wins is not None:
+            self._remove_entry(old_wins, user_name)
+
+        self._wins[user_name] = wins
+        insort(self._entries, (-wins, user_name))
+
+    def _remove_entry(self, wins: int, user_name: str) -> None:
+        index = bisect_left(self._entries, (-wins, user_name))
+        if index < len(self._entries) and self._entries[index] == (-wins, user_name):
+            del self._entries[index]
+
+    def _rank(self, wins: int) -> int:
+        # The position of the first user with these wins, "" sorts before every name.
+        return bisect_left(self._entries, (-wins, "")) + 1
+
+    def rank(self, user_name: str) -> tuple[int, int]:
+        """
+        Returns the rank and the wins of the user, or None if the user isn't on the leaderboard.
+        """
+        with self._lock:
+            wins = self._wins.get(user_name)
+            if wins is None:
+                return None
+            return self._rank(wins), wins
+
+    def pages(self, size: int) -> int:
+        return max(1, ceil(len(self._entries) / size))
+
+    def page(self, number: int, size: int = 10) -> list[tuple[int, str, int]]:
+        """
+        Returns the users of a page (counted from 1) as tuples of a rank, a user name and wins.
+        """
+        start = (number - 1) * size
+        if start < 0:
+            return []
+
+        with self._lock:
+            page = []
+            rank = previous = None
+            for index, (negative_wins, user_name) in enumerate(self._entries[start:start + size], start):
+                if negative_wins != previous:
+                    # Only the first user of the page can share its rank with users before the page.
+                    rank = self._rank(-negative_wins) if previous is None else index + 1
+                    previous = negative_wins
+                page.append((rank, user_name, -negative_wins))
+            return page
+
+    def top(self, count: int = 10) -> list[tuple[int, str, int]]:
+        return self.page(1, count)
@@ -0,0 +1,88 @@
+"""
+Versioned changes of the database schema.
+
+The tables are created by the models (see models/), later changes to them are migrations:
+ordered steps that are applied once per database. The versions of the applied steps are recorded in the
+schema_version table, so at startup (see Data) only the new steps are run, in the order of their versions.
+A step must only be added to the end of MIGRATIONS and never changed once it has been released.
+"""
+from datetime import datetime
+from log import Log
+
+
+class Migration:
+    def __init__(self, version: int, description: str, apply) -> None:
+        """
+        :param version: Number of the step, higher than the version of the step before it.
+        :param description: What the step changes, recorded in the schema_version table.
+        :param apply: Function applying the step to a DatabaseInterface.
+        """
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "Index the users by wins for the leaderboard",
+        lambda database: database.create_index("users", "idx_users_stat_wins", ["stat_wins"]),
+    ),
+    Migration(
+        2,
+        "Index the users by registration date for the admin listings",
+        lambda database: database.create_index("users", "idx_users_register_date", ["register_date"]),
+    ),
+    Migration(
+        3,
+        "Index the users by the id of their last login",
+        lambda database: database.create_index("users", "idx_users_last_login_id", ["last_login_id"]),
+    ),
+]
+
+
+def schema_version(database: "DatabaseInterface") -> int:
+    """
+    Version of the last migration applied to the database, 0 for a new database.
+    """
+    database.create_table(
+        "schema_version",
+        {
+            "version": "INT PRIMARY KEY",
+            "description": "VARCHAR(255) NOT NULL",
+            "applied_at": "DATETIME NOT NULL",
+        },
+    )
+    return max((row["version"] for row in database.select("schema_version")), default=0)
+
+
+def migrate(database: "DatabaseInterface", migrations: list[Migration] = MIGRATIONS) -> int:
+    """
+    Applies the migrations the database doesn't have yet. Returns the number of applied migrations.
+    Every step is recorded in the same transaction as its changes (on engines where schema changes
+    are transactional), so a failing step stops the migration and is tried again at the next startup.
+    """
+    current = schema_version(database)
+
+    applied = 0
+    for migration in sorted(migrations, key=lambda migration: migration.version):
+        if migration.version <= current:
+            continue
+
+        Log.info(f"Migrating the database to version {migration.version}: {migration.description}...")
+        with database.transaction():
+            migration.apply(database)
+            database.insert(
+                "schema_version",
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                },
+            )
+        applied += 1
+        current = migration.version
+
+    if applied:
+        Log.info(f"The database has been migrated to version {current}.")
+    return applied
@@ -1,12 +1,59 @@
+from collections import Counter
+from threading import Lock
 from .model import DataModel
 from settings import MAX_USER_NAME_LENGTH
 
 
 class BlackList(DataModel):
+    """
+    The banned users. The whole list is loaded into memory at startup and kept in sync by add and remove,
+    so checking a user (on the handshake and on every ping) never touches the database.
+    """
+
     def __init__(self, data: "Data") -> None:
         self.data = data
         self._create_table()
 
+        self._lock = Lock()
+        self._names: dict[str, str] = {}  # Banned user names and their user ids
+        self._ids = Counter()  # Banned user ids, a user id can be banned under several names
+        self._load()
+
+    def _load(self) -> None:
+        with self._lock:
+            self._names.clear()
+            self._ids.clear()
+            for user in self.get():
+                self._ban(user["user_name"], user["user_id"])
+
+    def _ban(self, user_name: str, user_id: str) -> None:
+        if user_name in self._names:
+            self._unban(user_name)
+        self._names[user_name] = user_id
+        self._ids[user_id] += 1
+
+    def _unban(self, user_name: str) -> None:
+        user_id = self._names.pop(user_name, None)
+        if user_id is not None:
+            self._ids[user_id] -= 1
+            if self._ids[user_id] <= 0:
+                del self._ids[user_id]
+
+    def _banned(self, users: list[tuple[str, str]]) -> None:
+        with self._lock:
+            for user_name, user_id in users:
+                self._ban(user_name, user_id)
+
+    def _unbanned(self, user_name: str) -> None:
+        with self._lock:
+            self._unban(user_name)
+
+    def is_banned(self, user_name: str, user_id: str) -> bool:
+        """
+        Tells if the user name or the user id is banned.
+        """
+        return user_name.lower() in self._names or user_id in self._ids
+
     def _create_table(self) -> None:
         self.data.database.create_table(
             "blacklist",
@@ -18,6 +65,9 @@ class BlackList(DataModel):
 
     def delete(self) -> None:
         self.data.database.delete_table("blacklist")
+        with self._lock:
+            self._names.clear()
+            self._ids.clear()
 
     def get(self) -> dict:
         return self.data.database.select("blacklist")
@@ -26,9 +76,23 @@ class BlackList(DataModel):
         self.data.database.insert(
             "blacklist", {"user_name": user_name.lower(), "user_id": user_id}
         )
+        self.data.database.on_commit(lambda: self._banned([(user_name.lower(), user_id)]))
+
+    def add_many(self, users: list[tuple[str, str]]) -> int:
+        """
+        Bans several users with a single commit.
+        :param users: Pairs of a user name and a user id.
+        """
+        users = [(user_name.lower(), user_id) for user_name, user_id in users]
+        inserted = self.data.database.insert_many(
+            "blacklist", [{"user_name": user_name, "user_id": user_id} for user_name, user_id in users]
+        )
+        self.data.database.on_commit(lambda: self._banned(users))
+        return inserted
 
     def remove(self, user_name: str) -> bool:
         deleted = self.data.database.delete(
             "blacklist", {"user_name": user_name.lower()}
         )
+        self.data.database.on_commit(lambda: self._unbanned(user_name.lower()))
         return deleted > 0
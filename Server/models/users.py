@@ -1,13 +1,37 @@
 from datetime import datetime
+from threading import Lock
 from .model import DataModel
-from settings import MAX_USER_NAME_LENGTH
+from cache import LRUCache
+from leaderboard import Leaderboard
+from databases import Durability
+from settings import MAX_USER_NAME_LENGTH, USERS_CACHE_SIZE, USERS_CACHE_TTL
 
 
 class Users(DataModel):
+    """
+    The users table, with the rows of recently seen users kept in memory by lower-cased name.
+
+    The cache is write-through: every write of this model updates the cached row after the database,
+    so logins, checks and stat getters of online players don't touch the database.
+    Inside a transaction the cache is bypassed and the writes reach it only once the transaction is committed.
+    Rows changed directly in the database are picked up again when their entries expire.
+
+    The leaderboard (users ranked by wins) is loaded at startup and follows the committed changes of the wins.
+    """
+
     def __init__(self, data: "Data") -> None:
         self.data = data
+        self.cache = LRUCache("users", USERS_CACHE_SIZE, USERS_CACHE_TTL)
+
+        # Counts the writes, so a row read from the database isn't cached over a newer write.
+        self._lock = Lock()
+        self._generation = 0
+
         self._create_table()
 
+        self.leaderboard = Leaderboard()
+        self.leaderboard.load((user["user_name"], user["stat_wins"]) for user in self.get())
+
     def _create_table(self) -> None:
         self.data.database.create_table(
             "users",
@@ -27,39 +51,146 @@ class Users(DataModel):
 
     def delete(self) -> None:
         self.data.database.delete_table("users")
+        self.cache.clear()
+        self.leaderboard.clear()
 
     def get(self) -> dict:
         return self.data.database.select("users")
 
     def add(self, user_name: str, user_id: str, password: str) -> None:
-        self.data.database.insert(
-            "users",
-            {
-                "user_name": user_name.lower(),
-                "last_login_id": user_id,
-                "password": password,
-                "register_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            },
-        )
+        user = {
+            "user_name": user_name.lower(),
+            "last_login_id": user_id,
+            "password": password,
+            "register_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.data.database.insert("users", user)
+
+        self.data.database.on_commit(lambda: self._user_added(user))
+
+    def _user_added(self, user: dict) -> None:
+        self.leaderboard.set(user["user_name"], 0)
+
+        # The new user usually logs in right away.
+        with self._lock:
+            self._generation += 1
+            self.cache.put(
+                user["user_name"],
+                {
+                    **user,
+                    "stat_wins": 0,
+                    "stat_defeats": 0,
+                    "stat_matches": 0,
+                    "stat_longest_match": 0,
+                    "stat_hits": 0,
+                    "stat_misses": 0,
+                },
+            )
 
     def remove(self, user_name: str) -> bool:
         deleted = self.data.database.delete("users", {"user_name": user_name.lower()})
+        self.data.database.on_commit(lambda: self._uncache(user_name.lower()))
+        if deleted:
+            self.data.database.on_commit(lambda: self.leaderboard.remove(user_name.lower()))
         return deleted > 0
 
-    def find(self, user_name: str) -> dict:
-        users = self.get()
-        for user in users:
-            if user["user_name"] == user_name.lower():
-                return user
-        return None
+    def _uncache(self, user_name: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self.cache.remove(user_name)
 
-    def update_login(self, user_name: str, user_id: str) -> bool:
-        return (
-            self.data.database.set(
-                "users", "last_login_id", user_id, {"user_name": user_name}
-            )
-            > 0
-        )
+    def find(self, user_name: str) -> dict:
+        user_name = user_name.lower()
+
+        # A transaction must see its own uncommitted writes, and must not cache them.
+        if self.data.database.in_transaction():
+            return self.data.database.select_one("users", {"user_name": user_name})
+
+        user = self.cache.get(user_name)
+        if user is not None:
+            return dict(user)
+
+        generation = self._generation
+        # A primary key lookup, the table is never scanned.
+        user = self.data.database.select_one("users", {"user_name": user_name})
+        if user is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self.cache.put(user_name, dict(user))
+        return user
+
+    def _written(self, user_name: str, values: dict) -> None:
+        """
+        Applies values written to the database to the cached row of the user, once they're committed.
+        """
+        self.data.database.on_commit(lambda: self._write_through(user_name, values))
+
+    def _write_through(self, user_name: str, values: dict) -> None:
+        with self._lock:
+            self._generation += 1
+            user = self.cache.peek(user_name)
+            if user is not None:
+                self.cache.put(user_name, {**user, **values})
+
+    def _set(self, user_name: str, field: str, value) -> bool:
+        user_name = user_name.lower()
+        updated = self.data.database.set("users", field, value, {"user_name": user_name}) > 0
+        if updated:
+            self._written(user_name, {field: value})
+            if field == "stat_wins":
+                self.data.database.on_commit(lambda: self.leaderboard.set(user_name, value))
+        return updated
+
+    def update_login(self, user_name: str, user_id: str, durability: Durability = Durability.COMMITTED) -> bool:
+        return self.data.writer.write(self._set, user_name, "last_login_id", user_id, durability=durability)
+
+    def update_stats(self, user_name: str, deltas: dict, longest_match: int = 0) -> bool:
+        """
+        Adds the deltas to the statistics of the user and raises the longest match if needed,
+        with a single atomic UPDATE (no read first, concurrent updates don't lose increments).
+        :param deltas: Dictionary of stat fields (e.g. "stat_wins") and values to add to them.
+        :param longest_match: Duration of the finished match in seconds.
+        """
+        user_name = user_name.lower()
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        maximums = {"stat_longest_match": longest_match} if longest_match > 0 else {}
+        if not deltas and not maximums:
+            return True
+
+        updated = self.data.database.increment_many("users", deltas, {"user_name": user_name}, maximums) > 0
+        # The new values are only known to the database, the row is read again on the next find.
+        self.data.database.on_commit(lambda: self._uncache(user_name))
+        if updated and "stat_wins" in deltas:
+            self.data.database.on_commit(lambda: self.leaderboard.add(user_name, deltas["stat_wins"]))
+        return updated
+
+    def update_stats_many(self, stats: dict, longest_match: int = 0, durability: Durability = Durability.COMMITTED) -> int:
+        """
+        Adds the stat deltas of several users (e.g. the players of a session) in one transaction.
+        :param stats: Dictionary of user names and their deltas (see update_stats).
+        :param longest_match: Duration of the finished match in seconds.
+        :param durability: Durability.ASYNC queues the update and returns a Future of the result.
+        Returns the number of updated users.
+        """
+        # Copied, the caller may change the statistics while the update is queued.
+        stats = {user_name: dict(deltas) for user_name, deltas in stats.items()}
+        return self.data.writer.write(self._update_stats_many, stats, longest_match, durability=durability)
+
+    def _update_stats_many(self, stats: dict, longest_match: int) -> int:
+        updated = 0
+
+        with self.data.database.transaction():
+            for user_name, deltas in stats.items():
+                if self.update_stats(user_name, deltas, longest_match):
+                    updated += 1
+
+        return updated
+
+    def increment_stat(self, user_name: str, field: str, delta: int = 1) -> bool:
+        """
+        Adds the delta to a stat field of the user (e.g. "stat_wins").
+        """
+        return self.update_stats(user_name, {field: delta})
 
     def get_stat_wins(self, user_name: str) -> int:
         user = self.find(user_name)
@@ -67,36 +198,21 @@ class Users(DataModel):
         return user["stat_wins"] if user and "stat_wins" in user else 0
 
     def set_stat_wins(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_wins", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_wins", value)
 
     def get_stat_defeats(self, user_name: str) -> int:
         user = self.find(user_name)
         return user["stat_defeats"] if user and "stat_defeats" in user else 0
 
     def set_stat_defeats(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_defeats", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_defeats", value)
 
     def get_stat_matches(self, user_name: str) -> int:
         user = self.find(user_name)
         return user["stat_matches"] if user and "stat_matches" in user else 0
 
     def set_stat_matches(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_matches", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_matches", value)
 
     def get_stat_longest_match(self, user_name: str) -> int:
         user = self.find(user_name)
@@ -105,33 +221,18 @@ class Users(DataModel):
         )
 
     def set_stat_longest_match(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_longest_match", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_longest_match", value)
 
     def get_stat_hits(self, user_name: str) -> int:
         user = self.find(user_name)
         return user["stat_hits"] if user and "stat_hits" in user else 0
 
     def set_stat_hits(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_hits", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_hits", value)
 
     def get_stat_misses(self, user_name: str) -> int:
         user = self.find(user_name)
         return user["stat_misses"] if user and "stat_misses" in user else 0
 
     def set_stat_misses(self, user_name: str, value: int) -> bool:
-        return (
-            self.data.database.set(
-                "users", "stat_misses", value, {"user_name": user_name.lower()}
-            )
-            > 0
-        )
+        return self._set(user_name, "stat_misses", value)
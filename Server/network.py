@@ -1,10 +1,17 @@
 import socket
+from collections import deque
+from threading import Lock
 from typing import Callable
 from enum import Enum
 from packet import Packet
 from log import Log
 from settings import DEBUG
 
+RECV_BUFFER_SIZE = 65536  # Largest packet read at once; shooting fields of the largest boards take a few KB
+
+# Non-blocking send flag. Where it is not available (Windows) sends fall back to blocking mode.
+SEND_FLAGS = getattr(socket, "MSG_DONTWAIT", 0)
+
 
 class Network:
     class ConnectionStatus(Enum):
@@ -20,6 +27,9 @@ class Network:
 
     class ErrorMessages(Enum):
         PLAYER_NOT_IN_ANY_SESSION = 0
+        SESSION_NOT_FOUND = 1
+        CANNOT_SPECTATE_SESSION = 2
+        UNKNOWN_GAME_VARIANT = 3
 
     def __init__(
         self,
@@ -39,6 +49,12 @@ class Network:
             Network.ConnectionStatus.NOT_CONNECTED
         )
 
+        # The user thread and the spectator hub both write to the socket. Packets have no length prefix,
+        # so a packet must be written whole before the next one starts.
+        self.send_lock = Lock()
+        # The rest of a packet partially written by send_nowait(), written before any other packet.
+        self.pending: memoryview = None
+
     def disconnect(self):
         """
         Cleanly terminates the connection.
@@ -64,7 +80,7 @@ class Network:
             if data:
                 self.send(data)
 
-            response = self.conn.recv(1024)
+            response = self.conn.recv(RECV_BUFFER_SIZE)
             response = Packet(response)
 
             if DEBUG:
@@ -86,7 +102,11 @@ class Network:
             Log.debug(f"Send to {self.ip}:{self.port} - {data}")
 
         try:
-            self.conn.send(data.to_bytes())
+            with self.send_lock:
+                if self.pending is not None:
+                    self.conn.sendall(self.pending)
+                    self.pending = None
+                self.conn.sendall(data.to_bytes())
         except Exception as e:
             if DEBUG:
                 Log.exception("An error occurred when sending data to a user", e)
@@ -94,6 +114,30 @@ class Network:
         else:
             return True
 
+    def send_nowait(self, payloads: deque) -> bool:
+        """
+        Writes encoded packets from the front of the deque as far as the socket accepts them without blocking.
+        A packet that is only partially written is kept as pending and finished by the next send.
+        Returns True once the deque has been fully written, raises BlockingIOError or OSError like socket.send().
+        Returns False right away while the user thread is sending, the caller tries again later.
+        """
+        if not self.send_lock.acquire(blocking=False):
+            return False
+        try:
+            while True:
+                if self.pending is None:
+                    if not payloads:
+                        return True
+                    self.pending = memoryview(payloads.popleft())
+
+                sent = self.conn.send(self.pending, SEND_FLAGS)
+
+                self.pending = self.pending[sent:] if sent < len(self.pending) else None
+                if self.pending is not None:
+                    return False
+        finally:
+            self.send_lock.release()
+
     def handle(self):
         """
         Main loop for processing incoming data on this network connection.
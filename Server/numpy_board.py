@@ -0,0 +1,277 @@
+"""
+NumPy board engine.
+
+Boards are stored as uint8 arrays of cell states, which makes operations over many shots or many boards
+a handful of vectorized calls: applying a batch of shots, computing the hit masks of many boards and
+validating many fleets at once (e.g. for analytics over replays or big simulations).
+
+NumPy is optional. If it isn't installed, NUMPY_AVAILABLE is False and the server keeps using the
+bitboard BattleField (see BOARD_ENGINE in settings.py).
+"""
+from game_session import BattleField, validate_fleet_cached
+from board import CLASSIC_FLEET, PackedBoard, placement_cells, fleet_mask
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# Cell states of the board arrays.
+EMPTY = 0
+SHIP = 1
+HIT = 2
+MISS = 3
+
+_CELL_CHARS = np.array([".", "S", "H", "M"]) if NUMPY_AVAILABLE else None
+
+
+def masks_to_boards(masks: list[int], width: int, height: int) -> "np.ndarray":
+    """
+    Converts bitmasks of cells (bit row * width + col) into a (N, height, width) array of booleans.
+    """
+    size = (width * height + 7) // 8
+    data = b"".join(mask.to_bytes(size, "little") for mask in masks)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8).reshape(len(masks), size), axis=1, bitorder="little")
+    return bits[:, : width * height].reshape(len(masks), height, width).astype(bool)
+
+
+def boards_to_masks(boards: "np.ndarray") -> list[int]:
+    """
+    Converts a (N, height, width) array of booleans back into bitmasks of cells.
+    """
+    packed = np.packbits(boards.reshape(len(boards), -1), axis=1, bitorder="little")
+    return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+
+def validate_fleets(masks: list[int], width: int = 10, height: int = 10, fleet: tuple = CLASSIC_FLEET) -> "np.ndarray":
+    """
+    Checks many fleets (bitmasks of ship cells) at once. Returns an array of booleans, True for the valid ones.
+
+    Straight ships that don't touch never have two ship cells on a diagonal of a 2x2 square (that would be
+    a bend of one ship or two ships touching), and once there are none every group of ship cells is a straight
+    line. So a fleet is valid if it has no such diagonal and its lines have the lengths of the fleet.
+    """
+    size = width * height
+    in_board = np.array([0 <= mask < 1 << size for mask in masks], dtype=bool)
+    boards = masks_to_boards([mask if ok else 0 for mask, ok in zip(masks, in_board)], width, height)
+
+    valid = in_board & (boards.sum(axis=(1, 2)) == sum(fleet))
+    valid &= ~(boards[:, :-1, :-1] & boards[:, 1:, 1:]).any(axis=(1, 2))
+    valid &= ~(boards[:, :-1, 1:] & boards[:, 1:, :-1]).any(axis=(1, 2))
+
+    # Every ship starts in its cell without a ship cell on the left or above.
+    starts = boards.copy()
+    starts[:, :, 1:] &= ~boards[:, :, :-1]
+    starts[:, 1:, :] &= ~boards[:, :-1, :]
+
+    # Lengths of the ship cell runs to the right and down, counted one ship cell further than the longest ship.
+    longest = max(fleet)
+    right = boards.astype(np.int16)
+    down = boards.astype(np.int16)
+    run_right = boards.copy()
+    run_down = boards.copy()
+    for k in range(1, longest + 1):
+        run_right[:, :, : width - k] &= boards[:, :, k:]
+        run_right[:, :, width - k :] = False
+        run_down[:, : height - k, :] &= boards[:, k:, :]
+        run_down[:, height - k :, :] = False
+        right += run_right
+        down += run_down
+    lengths = np.where(starts, np.maximum(right, down), 0)
+
+    valid &= starts.sum(axis=(1, 2)) == len(fleet)
+    for length in range(1, longest + 1):
+        valid &= (lengths == length).sum(axis=(1, 2)) == fleet.count(length)
+
+    return valid
+
+
+def hit_masks(fields: list["NumpyBattleField"]) -> "np.ndarray":
+    """
+    Hit cells of many boards of the same size as one (N, height, width) array of booleans.
+    """
+    return np.stack([field.cells for field in fields]) == HIT
+
+
+class NumpyBattleField(BattleField):
+    """
+    BattleField stored as a (height, width) uint8 array of cell states instead of bitboards.
+
+    It has the same API the session uses, so BOARD_ENGINE can switch between the two, and adds shoot_many
+    to apply a batch of shots in one call. Single shots are faster on bitboards; the arrays pay off
+    for batches and for analytics over many boards.
+    """
+
+    def __init__(
+        self,
+        battle_field: list[list] = None,
+        width: int = BattleField.BATTLE_FIELD_WIDTH,
+        height: int = BattleField.BATTLE_FIELD_HEIGH,
+        fleet: tuple = CLASSIC_FLEET,
+    ) -> None:
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("The NumPy board engine requires NumPy to be installed.")
+
+        self.width = width
+        self.height = height
+        self.fleet = fleet
+
+        self.cells = np.zeros((height, width), dtype=np.uint8)
+        self.ship_index = np.full((height, width), -1, dtype=np.int16)  # Cell -> index of the ship in ship_masks
+        self.ship_masks: list[int] = []
+        self.ship_health: list[int] = []
+        self.ships_left = 0
+
+        self._view = None
+
+        if battle_field:
+            mask = fleet_mask(battle_field, width, height)
+            self._place_ships(validate_fleet_cached(mask, width, height, fleet))
+
+    def _place_ships(self, ship_masks: list[int]) -> None:
+        flat_index = self.ship_index.reshape(-1)
+        for ship, mask in enumerate(ship_masks):
+            cells = placement_cells(mask)
+            flat_index[list(cells)] = ship
+            self.ship_health.append(len(cells))
+
+        self.cells[self.ship_index >= 0] = SHIP
+        self.ship_masks = ship_masks
+        self.ships_left = len(ship_masks)
+
+    @property
+    def ships(self) -> int:
+        return boards_to_masks(((self.cells == SHIP) | (self.cells == HIT))[None])[0]
+
+    @property
+    def hits(self) -> int:
+        return boards_to_masks(self.cells[None] == HIT)[0]
+
+    @property
+    def misses(self) -> int:
+        return boards_to_masks(self.cells[None] == MISS)[0]
+
+    @property
+    def battle_field(self) -> list[list[str]]:
+        """
+        The field as a list of rows of cells: "S" (ship), "H" (hit), "M" (miss) or "." (empty).
+        The list is shared and must not be modified.
+        """
+        if self._view is None:
+            self._view = _CELL_CHARS[self.cells].tolist()
+        return self._view
+
+    def get_unshot_cells(self) -> list[tuple[int, int]]:
+        return [tuple(cell) for cell in np.argwhere(self.cells < HIT).tolist()]
+
+    def shoot(self, row, col) -> "BattleField.ShootState":
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError("Invalid coordinates")
+
+        cell = self.cells[row, col]
+        if cell >= HIT:
+            return BattleField.ShootState.ALREADY_SHOT
+        if cell == SHIP:
+            self.cells[row, col] = HIT
+            if self._view:
+                self._view[row][col] = "H"
+
+            ship = int(self.ship_index[row, col])
+            self.ship_health[ship] -= 1
+            if self.ship_health[ship] == 0:
+                self.ships_left -= 1
+                return BattleField.ShootState.SUNK
+            return BattleField.ShootState.HIT
+
+        self.cells[row, col] = MISS
+        if self._view:
+            self._view[row][col] = "M"
+        return BattleField.ShootState.MISS
+
+    def shoot_many(self, rows, cols) -> "np.ndarray":
+        """
+        Applies a batch of shots in order, as if shoot was called for every one of them.
+        Returns the ShootState values of the shots as an array.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        if rows.size and (
+            rows.min() < 0 or rows.max() >= self.height or cols.min() < 0 or cols.max() >= self.width
+        ):
+            raise ValueError("Invalid coordinates")
+
+        targets = rows * self.width + cols
+        states = np.full(targets.size, BattleField.ShootState.ALREADY_SHOT.value, dtype=np.uint8)
+
+        # Only the first shot at a cell that hasn't been shot at yet counts.
+        board = self.cells.reshape(-1)
+        _, first = np.unique(targets, return_index=True)
+        first = first[board[targets[first]] < HIT]
+        is_ship = board[targets[first]] == SHIP
+
+        states[first] = np.where(is_ship, BattleField.ShootState.HIT.value, BattleField.ShootState.MISS.value)
+        board[targets[first]] = np.where(is_ship, HIT, MISS)
+
+        # A ship is sunk by the last shot of the batch that hits it, if no intact cell is left.
+        hit_shots = first[is_ship]
+        hit_ships = self.ship_index.reshape(-1)[targets[hit_shots]]
+        health = np.array(self.ship_health, dtype=np.int64) - np.bincount(hit_ships, minlength=len(self.ship_health))
+        last_hit = np.full(len(self.ship_health), -1, dtype=np.intp)
+        np.maximum.at(last_hit, hit_ships, hit_shots)
+        sunk = np.nonzero((health == 0) & (last_hit >= 0))[0]
+        states[last_hit[sunk]] = BattleField.ShootState.SUNK.value
+
+        self.ship_health = health.tolist()
+        self.ships_left -= len(sunk)
+        self._view = None
+        return states
+
+    def to_packed(self) -> PackedBoard:
+        """
+        The cell states are the 2-bit codes of PackedBoard, so 4 cells are combined into a byte at a time.
+        """
+        cells = np.zeros(-self.cells.size % 4 + self.cells.size, dtype=np.uint8)
+        cells[: self.cells.size] = self.cells.reshape(-1)
+        packed = cells[0::4] | cells[1::4] << 2 | cells[2::4] << 4 | cells[3::4] << 6
+        return PackedBoard(self.width, self.height, packed.tobytes())
+
+    def get_ship_mask(self, row, col) -> int:
+        ship = int(self.ship_index[row, col])
+        return 0 if ship < 0 else self.ship_masks[ship]
+
+    def reveal(self, mask: int) -> None:
+        """
+        Marks the cells of the bitboard that haven't been shot at as missed.
+        """
+        revealed = masks_to_boards([mask], self.width, self.height)[0] & (self.cells == EMPTY)
+        self.cells[revealed] = MISS
+
+        if self._view:
+            for row, col in np.argwhere(revealed).tolist():
+                self._view[row][col] = "M"
+
+    def copy(self) -> "NumpyBattleField":
+        field = NumpyBattleField.__new__(NumpyBattleField)
+        field.width, field.height, field.fleet = self.width, self.height, self.fleet
+        field.cells = self.cells.copy()
+        field._view = None
+        # The ships themselves never change, only their counters do.
+        field.ship_index = self.ship_index
+        field.ship_masks = self.ship_masks
+        field.ship_health = self.ship_health[:]
+        field.ships_left = self.ships_left
+        return field
+
+    def set(self, row, col, shoot_state: "BattleField.ShootState") -> None:
+        self._check_coordinates(row, col)
+
+        if shoot_state in (self.ShootState.HIT, self.ShootState.SUNK):
+            self.cells[row, col] = HIT
+            if self._view:
+                self._view[row][col] = "H"
+        elif shoot_state == self.ShootState.MISS:
+            self.cells[row, col] = MISS
+            if self._view:
+                self._view[row][col] = "M"
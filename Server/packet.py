@@ -1,6 +1,8 @@
 from enum import Enum
 from pickle import dumps, loads
 
+# Optional protocol features a client can list in the "features" of its USERNAME_AND_ID packet.
+FEATURE_PACKED_BOARD = "packed_board"  # Fields are sent as board.PackedBoard bytes ("board") instead of lists of rows ("field").
 
 class Packet:
     class Code(Enum):
@@ -12,6 +14,8 @@ class Packet:
         USERNAME_AND_ID = 5
         PASSWORD = 6
         SESSION_DATA = 7
+        SPECTATE = 8
+        RULES = 9
 
         @classmethod
         def to_code(cls, value: int) -> "Code":
@@ -1,13 +1,38 @@
 def leaderboard(args, kwargs) -> str:
+    """
+    Users ranked by their wins, a page at a time: 'leaderboard', 'leaderboard 2', 'leaderboard 3 size=20'.
+    'leaderboard user=<user_name>' shows the rank of a user.
+    """
     output = ""
-    users = server.server_data.users.get()
+    leaderboard = server.server_data.users.leaderboard
+
+    user_name = kwargs.get("user")
+    if user_name:
+        rank = leaderboard.rank(user_name.lower())
+        if rank:
+            output += f"{user_name.capitalize()} is #{rank[0]} of {len(leaderboard)} with {rank[1]} wins."
+        else:
+            output += f"There is no user with name {user_name}."
+        return output
+
+    try:
+        number = int(kwargs.get("page") or (args[0] if args else 1))
+        size = int(kwargs.get("size", 10))
+    except ValueError:
+        return "Error: The page and its size must be numbers (e.g., 'leaderboard 2 size=20')."
+    if number < 1 or size < 1:
+        return "Error: The page and its size must be at least 1."
 
-    users = sorted(users, key=lambda player: player.get("stat_wins", 0), reverse=True)
+    page = leaderboard.page(number, size)
+    if page:
+        output += f"Top users (page {number} of {leaderboard.pages(size)}):\n"
+        for rank, user_name, wins in page:
+            output += f"{rank}. {user_name.capitalize()} - {wins}\n"
+    elif len(leaderboard):
+        output += f"The last page is {leaderboard.pages(size)}."
+    else:
+        output += "No registred users yet."
 
-    output = "Top users:\n"
-    for user in users:
-        output += f"{user['user_name']} - {user['stat_wins']}\n"
-    
     return output
 
 def test(args, kwargs) -> str:
@@ -165,7 +165,8 @@ class Server:
             for user in users:
                 user.disconnect_user()
 
-            # Clean up server data and close the socket to free up the port
+            # Write the queued database writes, clean up server data and close the socket to free up the port
+            self.server_data.close()
             del self.server_data
             self.server_socket.close()
             self.server_running = False
@@ -41,6 +41,52 @@ MAX_USER_NAME_LENGTH = 30    # Maximum allowable length for a username.
 
 MAX_GAME_SESSIONS = 2        # Maximum number of concurrent game sessions allowed.
 
+# Game session deadlines (in seconds, 0 disables a deadline):
+SETUP_PHASE_TIMEOUT = 180    # Time for players to submit their ship placement.
+TURN_TIMEOUT = 60            # Shot clock: time for the attacking player to shoot.
+TURN_TIMEOUT_ACTION = "random_shot"  # What happens when the shot clock expires: "random_shot" or "forfeit".
+TURN_TIMEOUT_FORFEIT_AFTER = 3  # A player whose shot clock expires this many times in a row forfeits (0 never).
+RESULTS_TIMEOUT = 30         # Time the session stays open after a winner has been determined.
+
+# Game rules:
+REVEAL_SUNK_SHIP_SURROUNDINGS = False  # Mark the cells around a sunk ship as missed for both players.
+
+# Game variants: board size (up to 50x50 cells) and the lengths of the ships of the fleet.
+# Players choose a variant before looking for a session and are only matched with players who chose the same one.
+GAME_VARIANTS = {
+    "classic": {"width": 10, "height": 10, "fleet": [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]},
+    "large": {"width": 20, "height": 20, "fleet": [5, 4, 4, 3, 3, 3, 2, 2, 2, 2, 1, 1, 1, 1, 1]},
+    "huge": {
+        "width": 50,
+        "height": 50,
+        "fleet": [6, 5, 5, 4, 4, 4, 3, 3, 3, 3, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1],
+    },
+}
+DEFAULT_GAME_VARIANT = "classic"  # Variant of the players who don't choose one.
+
+# Board engine: "python" stores boards as bitboards (fastest for single games),
+# "numpy" as NumPy arrays with batch operations (falls back to "python" if NumPy isn't installed).
+BOARD_ENGINE = "python"
+
+# Caches:
+FLEET_VALIDATION_CACHE_SIZE = 4096  # Number of validated fleet layouts kept in memory (0 disables the cache).
+USERS_CACHE_SIZE = 10000  # Number of user rows kept in memory (0 disables the cache).
+USERS_CACHE_TTL = 300  # Seconds a cached user row is trusted before it's read from the database again (0 = until evicted).
+SQL_STATEMENT_CACHE_SIZE = 256  # Number of built SQL statements kept for reuse (0 disables the cache).
+
+# Bot players:
+BOTS_ENABLED = True          # Offer a game against a bot to players who can't find an opponent.
+BOT_MATCH_WAIT = 30          # Seconds a player waits for an opponent before a bot takes the free slot.
+BOT_DIFFICULTY = "medium"    # Bot difficulty: "easy", "medium" or "hard".
+BOT_THINK_TIME = 0.5         # Seconds a bot waits before shooting.
+BOT_POLL_INTERVAL = 0.5      # Seconds between bot requests while it waits for its turn.
+
+# Spectator settings:
+MAX_SPECTATORS_PER_SESSION = 500   # Maximum number of spectators that can watch one game session.
+SPECTATOR_QUEUE_SIZE = 64          # Maximum number of undelivered events kept per spectator (oldest are skipped).
+SPECTATOR_MAX_LAG = 256            # A spectator is dropped after this many events were skipped in a row.
+SPECTATOR_FLUSH_INTERVAL = 0.05    # Seconds between delivery attempts to spectators whose sockets are busy.
+
 # Database configuration:
 # DATABASE_ENGINE specifies the database backend that the server will use.
 # Supported values are "SQLite" or "MySQL". Currently set to "MySQL".
@@ -55,6 +101,25 @@ DATABASE_ENGINE = "MySQL"  # Choose between "SQLite" and "MySQL"
 # }
 
 # Configuration for SQLite database engine:
+# Every thread gets a connection of its own. The pragmas are applied to every connection (see SQLiteDatabase.PRAGMAS).
+# "database" must be a file, not ":memory:": each thread connection would open a separate empty in-memory database.
 DATABASE_CONFIG = {
-    "database": "db.sqlite3"
-}
\ No newline at end of file
+    "database": "db.sqlite3",
+    "pragmas": {
+        "journal_mode": "WAL",    # WAL lets readers work while a thread writes ("DELETE" is the SQLite default)
+        "synchronous": "NORMAL",  # "FULL" also survives power loss for the last commits, but syncs on every commit
+        "busy_timeout": 5000,     # Milliseconds to wait for a lock before failing with "database is locked"
+        "mmap_size": 67108864,    # Bytes of the database file read through memory mapping (0 disables it)
+    },
+}
+
+# MySQL connection pool (a MySQL connection can't be used by several threads at once):
+DATABASE_POOL_SIZE = 8              # Maximum number of open connections.
+DATABASE_POOL_TIMEOUT = 10          # Seconds a thread waits for a free connection before the query fails.
+DATABASE_POOL_PING_INTERVAL = 60    # Seconds a connection can stay idle before it's checked (and reopened if the server closed it).
+
+# Write-behind: logins and game statistics are queued and written by a background thread in batched transactions,
+# so the user and session threads don't wait for the database.
+DATABASE_WRITE_BEHIND = True        # False writes everything on the thread making the change.
+DATABASE_WRITE_BATCH_SIZE = 100     # Maximum number of queued writes committed in one transaction.
+DATABASE_WRITE_QUEUE_SIZE = 10000   # Maximum number of queued writes, further writes wait for room in the queue.
\ No newline at end of file
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Headless self-play simulation of game sessions.
+
+Runs complete games through the real session logic (setup phase, shots, winner detection)
+with in-memory players instead of network connections, and reports how many games and turns
+per second the game engine can process.
+
+Usage: python simulation.py [--games N] [--workers N] [--ai easy|medium|hard] [--variant NAME] [--engine python|numpy]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from random import shuffle
+from time import perf_counter
+from packet import Packet
+from log import Log
+from ai import TargetingEngine, random_fleet_mask
+from board import Rules
+from game_session import Session, BattleField, GAME_RULES, DEFAULT_GAME_VARIANT, board_engine
+from settings import BOARD_ENGINE
+
+
+class SimulatedNetwork:
+    """
+    Network connection of a simulated player. Only the last packet sent by the session is kept.
+    """
+
+    def __init__(self) -> None:
+        self.ip = "simulation"
+        self.conn = None
+        self.last_packet = None
+
+    def connected(self) -> bool:
+        return True
+
+    def send(self, packet: Packet) -> bool:
+        self.last_packet = packet
+        return True
+
+    def disconnect(self) -> None:
+        pass
+
+
+class SimulatedPlayer:
+    """
+    An in-memory player. It takes the place of a User in a session.
+    """
+
+    is_bot = False
+    features = frozenset()
+
+    def __init__(self, name: str, rules: Rules, difficulty: str = None) -> None:
+        self.id = name
+        self.name = name
+        self.net = SimulatedNetwork()
+        self.session = None
+
+        # Without a difficulty the player shoots every cell once in a random order.
+        self.engine = TargetingEngine(difficulty, rules.width, rules.height, rules.fleet) if difficulty else None
+        self.cells = [(row, col) for row in range(rules.height) for col in range(rules.width)]
+        shuffle(self.cells)
+
+    def connect_session(self, session: "Session" = None) -> None:
+        self.session = session
+
+    def is_in_session(self) -> bool:
+        return True if self.session else False
+
+    def disconnect_session(self, find_new_session: bool = False) -> None:
+        self.session = None
+
+    def stop_spectating(self) -> None:
+        pass
+
+    def next_shot(self) -> tuple[int, int]:
+        if self.engine:
+            return self.engine.next_shot()
+        return self.cells.pop()
+
+
+class SilentLogger:
+    """
+    Session logger that discards all messages, so logging doesn't distort the measurements.
+    """
+
+    def debug(self, string: str, *args, **kwargs) -> None:
+        pass
+
+    def info(self, string: str, *args, **kwargs) -> None:
+        pass
+
+    def error(self, string: str, *args, **kwargs) -> None:
+        pass
+
+    def exception(self, string: str, exception: Exception, *args, **kwargs) -> None:
+        pass
+
+    def broadcast(self, string: str, *args, **kwargs) -> None:
+        pass
+
+
+class SimulatedUsers:
+    def update_stats(self, user_name: str, deltas: dict, longest_match: int = 0) -> None:
+        pass
+
+    def update_stats_many(self, stats: dict, longest_match: int = 0, durability=None) -> int:
+        return 0
+
+
+class SimulatedServerData:
+    def __init__(self) -> None:
+        self.users = SimulatedUsers()
+
+
+class SimulatedServer:
+    def __init__(self) -> None:
+        self.server_data = SimulatedServerData()
+
+
+def play_game(server: SimulatedServer, rules: Rules, difficulty: str = None, engine: str = BOARD_ENGINE) -> list[float]:
+    """
+    Plays one game between two simulated players.
+    Returns the processing time of every turn (a shot packet) in seconds.
+    """
+    players = [SimulatedPlayer("player-1", rules, difficulty), SimulatedPlayer("player-2", rules, difficulty)]
+
+    session = Session(server, set(players), logger=SilentLogger(), rules=rules)
+    session.board_engine = board_engine(engine)
+    for player in session.players:
+        player.connect_session(session)
+
+    session._begin()
+
+    for player in session.players:
+        session._process_packet(
+            {
+                "player": player,
+                "data": {
+                    "code": Session.GameDataCode.POST_DATA.value,
+                    "data": {
+                        "type": Session.GameDataType.BATTLE_FIELD.value,
+                        "ships": random_fleet_mask(rules.width, rules.height, rules.fleet),
+                    },
+                },
+            }
+        )
+
+    latencies = []
+    while session.is_active and not session.winner:
+        player = session.players[session.player_attacks]
+        row, col = player.next_shot()
+
+        packet = {
+            "player": player,
+            "data": {
+                "code": Session.GameDataCode.POST_DATA.value,
+                "data": {
+                    "type": Session.GameDataType.COORDINATE.value,
+                    "coords": {"row": row, "col": col},
+                },
+            },
+        }
+
+        start = perf_counter()
+        session._process_packet(packet)
+        latencies.append(perf_counter() - start)
+
+        if player.engine and not session.winner:
+            shoot_state = player.net.last_packet.data["data"]["shoot_state"]
+            if shoot_state == BattleField.ShootState.SUNK.value:
+                player.engine.sunk(row, col)
+            else:
+                player.engine.record(row, col, shoot_state == BattleField.ShootState.HIT.value)
+
+    session._Stop()
+
+    return latencies
+
+
+def run_games(
+    games: int, difficulty: str = None, variant: str = DEFAULT_GAME_VARIANT, engine: str = BOARD_ENGINE
+) -> list[float]:
+    """
+    Worker process entry point. Plays the given number of games and returns all turn latencies.
+    """
+    # Drop the default console sink of the logger, nothing should be printed by the workers.
+    Log.log_logger.remove()
+
+    server = SimulatedServer()
+    rules = GAME_RULES[variant]
+
+    latencies = []
+    for _ in range(games):
+        latencies.extend(play_game(server, rules, difficulty, engine))
+    return latencies
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Percentile of already sorted values.
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless self-play simulation of game sessions.")
+    parser.add_argument("--games", type=int, default=1000, help="Number of games to play (default 1000).")
+    parser.add_argument("--workers", type=int, default=cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument(
+        "--ai",
+        choices=TargetingEngine.DIFFICULTIES,
+        default=None,
+        help="Let the players shoot with the targeting AI (its time isn't counted in the latencies).",
+    )
+    parser.add_argument(
+        "--variant",
+        choices=GAME_RULES,
+        default=DEFAULT_GAME_VARIANT,
+        help=f"Game variant to play (default {DEFAULT_GAME_VARIANT}).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("python", "numpy"),
+        default=BOARD_ENGINE,
+        help=f"Board engine of the sessions (default {BOARD_ENGINE}).",
+    )
+    args = parser.parse_args()
+
+    workers = max(1, min(args.workers, args.games))
+    chunks = [args.games // workers + (1 if i < args.games % workers else 0) for i in range(workers)]
+
+    rules = GAME_RULES[args.variant]
+    print(f"Playing {args.games} '{rules.name}' games ({rules.width}x{rules.height}) with the {board_engine(args.engine).__name__} engine in {workers} processes...")
+
+    start = perf_counter()
+    latencies = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(
+            run_games, chunks, [args.ai] * workers, [args.variant] * workers, [args.engine] * workers
+        ):
+            latencies.extend(result)
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+
+    print(f"Games:   {args.games} in {elapsed:.2f}s ({args.games / elapsed:.1f} games/s)")
+    print(f"Turns:   {len(latencies)} ({len(latencies) / elapsed:.1f} turns/s, {len(latencies) / args.games:.1f} per game)")
+    print(
+        f"Latency: p50 {percentile(latencies, 50) * 1e6:.1f}us, "
+        f"p99 {percentile(latencies, 99) * 1e6:.1f}us, "
+        f"max {latencies[-1] * 1e6 if latencies else 0:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+from time import time
+from collections import deque
+from threading import Thread, Lock, Event
+from packet import Packet
+from log import Log
+from settings import (
+    MAX_SPECTATORS_PER_SESSION,
+    SPECTATOR_QUEUE_SIZE,
+    SPECTATOR_MAX_LAG,
+    SPECTATOR_FLUSH_INTERVAL,
+)
+
+# Seconds a closed hub keeps trying to deliver the remaining events before giving up.
+CLOSE_TIMEOUT = 5.0
+
+
+class Spectator:
+    def __init__(self, user: "User") -> None:
+        self.user = user
+
+        # Encoded packets waiting to be delivered. The deque is bounded, so when a spectator
+        # can't keep up the oldest events are skipped instead of growing without limit.
+        self.queue: deque[bytes] = deque(maxlen=SPECTATOR_QUEUE_SIZE)
+
+        # Number of events skipped in a row because the queue was full.
+        self.lag = 0
+
+
+class SpectatorHub:
+    """
+    Fans out events of a game session to its spectators.
+
+    Every event is encoded into bytes exactly once and the same buffer is shared by the
+    queues of all spectators. Delivery happens on a single background thread per session
+    using non-blocking sends, so a slow spectator never delays the players or other spectators:
+    its queue just skips ahead, and if it keeps lagging it is dropped.
+    """
+
+    def __init__(self, session_id: int) -> None:
+        self.session_id = session_id
+
+        self.spectators: dict["User", Spectator] = {}
+        self.lock = Lock()
+
+        self.wakeup = Event()
+        self.is_active = True
+        self.closed_at = None
+        self.thread = None
+
+    def count(self) -> int:
+        return len(self.spectators)
+
+    def get_spectators(self) -> list["User"]:
+        with self.lock:
+            return list(self.spectators)
+
+    def subscribe(self, user: "User", snapshot: Packet = None) -> bool:
+        """
+        Adds a user to the spectators of the session.
+        The optional snapshot packet is delivered to this spectator only, before any further events.
+        Returns False if the session is closed or the spectators limit has been reached.
+        """
+        with self.lock:
+            if not self.is_active or len(self.spectators) >= MAX_SPECTATORS_PER_SESSION:
+                return False
+
+            spectator = Spectator(user)
+            if snapshot:
+                spectator.queue.append(snapshot.to_bytes())
+            self.spectators[user] = spectator
+
+            if self.thread is None:
+                self.thread = Thread(target=self._sender, daemon=True)
+                self.thread.start()
+
+        self.wakeup.set()
+        return True
+
+    def unsubscribe(self, user: "User") -> None:
+        with self.lock:
+            self.spectators.pop(user, None)
+
+    def publish(self, packet: Packet) -> None:
+        """
+        Encodes the packet once and queues the shared buffer for every spectator.
+        """
+        if not self.spectators:
+            return
+
+        payload = packet.to_bytes()
+
+        lagging = []
+        with self.lock:
+            for user, spectator in self.spectators.items():
+                if len(spectator.queue) == SPECTATOR_QUEUE_SIZE:
+                    spectator.lag += 1
+                    if spectator.lag > SPECTATOR_MAX_LAG:
+                        lagging.append(user)
+                        continue
+                spectator.queue.append(payload)
+
+        for user in lagging:
+            Log.warning(
+                f'Spectator "{user.name}" is too slow and has been removed from session #{self.session_id}.'
+            )
+            self.unsubscribe(user)
+            user.stop_spectating()
+
+        self.wakeup.set()
+
+    def close(self, packet: Packet = None) -> None:
+        """
+        Stops the hub. The optional packet is the last event delivered to the spectators.
+        """
+        if packet:
+            self.publish(packet)
+
+        self.is_active = False
+        self.closed_at = time()
+        self.wakeup.set()
+
+    def _flush(self, spectator: Spectator) -> bool:
+        """
+        Writes as much of the spectator queue as the socket accepts without blocking.
+        The writes go through the user's network (see Network.send_nowait), so they never interleave
+        with the packets the user's own thread sends. Returns True once the queue has been fully delivered.
+        """
+        if spectator.user.net.send_nowait(spectator.queue):
+            spectator.lag = 0
+            return True
+        return False
+
+    def _sender(self) -> None:
+        """
+        Background delivery loop. Sockets that can't accept more data are retried
+        every SPECTATOR_FLUSH_INTERVAL seconds; the loop exits once the hub is closed
+        and everything queued so far has been delivered, or CLOSE_TIMEOUT has passed.
+        """
+        while True:
+            self.wakeup.wait(SPECTATOR_FLUSH_INTERVAL)
+            self.wakeup.clear()
+
+            with self.lock:
+                spectators = list(self.spectators.values())
+
+            delivered = True
+            for spectator in spectators:
+                if not spectator.user.net.connected():
+                    self.unsubscribe(spectator.user)
+                    spectator.user.stop_spectating()
+                    continue
+                try:
+                    delivered = self._flush(spectator) and delivered
+                except (BlockingIOError, InterruptedError):
+                    delivered = False
+                except OSError:
+                    self.unsubscribe(spectator.user)
+                    spectator.user.stop_spectating()
+
+            if not self.is_active and (delivered or time() - self.closed_at > CLOSE_TIMEOUT):
+                break
+
+        for user in self.get_spectators():
+            self.unsubscribe(user)
+            user.stop_spectating()
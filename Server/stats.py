@@ -0,0 +1,41 @@
+from log import Log
+from databases import Durability
+
+
+class SessionStatistics:
+    """
+    Statistics of the players gathered in memory while a game session is running.
+    Nothing is written to the database until flush() is called at the end of the session,
+    so processing turns doesn't do any database I/O.
+    """
+
+    def __init__(self) -> None:
+        self.players: dict[str, dict[str, int]] = {}
+
+    def add(self, player: "User", field: str, value: int = 1) -> None:
+        """
+        Adds the value to a stat field of the player (e.g. "stat_hits").
+        Bots don't have statistics.
+        """
+        if player.is_bot:
+            return
+
+        stats = self.players.setdefault(player.name, {})
+        stats[field] = stats.get(field, 0) + value
+
+    def get(self, player: "User", field: str) -> int:
+        return self.players.get(player.name, {}).get(field, 0)
+
+    def flush(self, users: "Users", duration: float) -> None:
+        """
+        Queues the gathered statistics of every player for the database writer (see DatabaseWriter).
+        :param users: The Users model.
+        :param duration: Duration of the session in seconds, used for the longest match stat.
+        """
+        try:
+            # One transaction for all the players of the session, written in the background.
+            users.update_stats_many(self.players, int(duration), durability=Durability.ASYNC)
+        except Exception as e:
+            Log.exception(f"Failed to save statistics of the users {', '.join(self.players)}", e)
+
+        self.players.clear()
@@ -0,0 +1,39 @@
+"""
+Tests of the server. Run them from the Server directory: python -m pytest tests
+
+The server modules import each other by their plain names (from log import Log), so the Server directory
+is put on the path. The tests run in a temporary directory, so the log files don't end up in Server/logs.
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+SERVER_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIRECTORY)
+os.chdir(tempfile.mkdtemp(prefix="battleship-tests-"))
+
+from databases import DatabaseWriter
+from databases.sqlite_db import SQLiteDatabase
+
+
+class ModelData:
+    """
+    Stands in for Data in the tests of the models: a database and its writer, without the other models.
+    """
+
+    def __init__(self, database, write_behind: bool = False) -> None:
+        self.database = database
+        self.writer = DatabaseWriter(database, write_behind)
+
+
+@pytest.fixture
+def database(tmp_path):
+    return SQLiteDatabase(str(tmp_path / "db.sqlite3"))
+
+
+@pytest.fixture
+def data(database):
+    data = ModelData(database)
+    yield data
+    data.writer.close()
@@ -0,0 +1,134 @@
+import random
+import pytest
+from ai import TargetingEngine, random_fleet, random_fleet_mask
+from board import validate_fleet
+from game_session import GAME_RULES, BattleField
+
+ShootState = BattleField.ShootState
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_random_fleets_are_valid(variant):
+    rules = GAME_RULES[variant]
+    random.seed(variant)
+
+    for _ in range(5):
+        mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+        ships = validate_fleet(mask, rules.width, rules.height, rules.fleet)
+        assert sorted(bin(ship).count("1") for ship in ships) == sorted(rules.fleet)
+
+
+def test_random_fleet_rows_match_the_mask():
+    random.seed(1)
+    field = random_fleet()
+    mask = sum(1 << (row * 10 + col) for row in range(10) for col in range(10) if field[row][col] == "S")
+
+    validate_fleet(mask)
+
+
+def test_fleet_that_does_not_fit_raises():
+    with pytest.raises(ValueError):
+        random_fleet_mask(3, 3, (3, 3, 3))
+
+
+def test_unknown_difficulty_raises():
+    with pytest.raises(ValueError):
+        TargetingEngine("impossible")
+
+
+@pytest.mark.parametrize("difficulty", TargetingEngine.DIFFICULTIES)
+def test_hit_is_followed_up_next_to_it(difficulty):
+    random.seed(2)
+    engine = TargetingEngine(difficulty)
+    engine.record(4, 4, True)
+
+    for _ in range(20):
+        assert engine.next_shot() in {(3, 4), (5, 4), (4, 3), (4, 5)}
+
+
+@pytest.mark.parametrize("difficulty", ("medium", "hard"))
+def test_two_hits_in_a_row_are_followed_up_along_the_line(difficulty):
+    random.seed(3)
+    engine = TargetingEngine(difficulty)
+    engine.record(4, 4, True)
+    engine.record(4, 5, True)
+
+    for _ in range(20):
+        assert engine.next_shot() in {(4, 3), (4, 6)}
+
+
+def test_medium_hunts_on_one_checkerboard_colour():
+    random.seed(4)
+    engine = TargetingEngine("medium")
+    colours = set()
+
+    for _ in range(30):
+        row, col = engine.next_shot()
+        engine.record(row, col, False)
+        colours.add((row + col) % 2)
+
+    assert len(colours) == 1
+
+
+def test_hunting_never_shoots_a_known_cell():
+    random.seed(5)
+    engine = TargetingEngine("easy", 4, 4, (1,))
+    shots = set()
+
+    for _ in range(16):
+        row, col = engine.next_shot()
+        assert (row, col) not in shots
+        shots.add((row, col))
+        engine.record(row, col, False)
+
+
+def test_sunk_ship_is_resolved_and_its_water_is_skipped():
+    engine = TargetingEngine("medium")
+    engine.record(0, 0, True)
+    engine.record(0, 1, True)
+    engine.sunk(0, 2)
+
+    assert engine.hits == 0
+    assert engine.remaining == [4, 3, 2, 2, 2, 1, 1, 1, 1]
+    # The water around the ship can't hold another one.
+    for row, col in ((0, 3), (1, 0), (1, 1), (1, 2), (1, 3)):
+        assert engine.empty >> (row * 10 + col) & 1
+
+
+def play(engine: TargetingEngine, field: BattleField) -> int:
+    """
+    Lets the engine shoot at the field until every ship is sunk. Returns the number of shots.
+    """
+    shots = 0
+    while not field.is_all_ships_destroyed():
+        row, col = engine.next_shot()
+        state = field.shoot(row, col)
+        assert state != ShootState.ALREADY_SHOT
+        shots += 1
+
+        if state == ShootState.SUNK:
+            engine.sunk(row, col)
+        else:
+            engine.record(row, col, state == ShootState.HIT)
+    return shots
+
+
+@pytest.mark.parametrize("difficulty", TargetingEngine.DIFFICULTIES)
+def test_engine_sinks_a_whole_fleet(difficulty):
+    random.seed(6)
+    field = BattleField.from_ship_mask(random_fleet_mask())
+
+    assert play(TargetingEngine(difficulty), field) <= 100
+
+
+def test_harder_engines_need_fewer_shots():
+    random.seed(7)
+    masks = [random_fleet_mask() for _ in range(10)]
+
+    shots = {
+        difficulty: sum(play(TargetingEngine(difficulty), BattleField.from_ship_mask(mask)) for mask in masks)
+        for difficulty in TargetingEngine.DIFFICULTIES
+    }
+
+    assert shots["hard"] < shots["easy"]
+    assert shots["medium"] < shots["easy"]
@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+from models.black_list import BlackList
+
+
+@pytest.fixture
+def black_list(data):
+    return BlackList(data)
+
+
+def test_banned_names_and_ids_are_checked_in_memory(black_list, database, monkeypatch):
+    black_list.add("Mallory", "id-1")
+
+    monkeypatch.setattr(database, "select", lambda *args: pytest.fail("not in memory"))
+    monkeypatch.setattr(database, "select_one", lambda *args: pytest.fail("not in memory"))
+    assert black_list.is_banned("mallory", "id-2")
+    assert black_list.is_banned("someone", "id-1")
+    assert not black_list.is_banned("someone", "id-2")
+
+
+def test_add_many_and_remove_keep_the_list_in_sync(black_list):
+    assert black_list.add_many([("Eve", "id-1"), ("Trudy", "id-2"), ("Eve2", "id-1")]) == 3
+
+    assert black_list.is_banned("eve", "other")
+    assert black_list.is_banned("trudy", "other")
+
+    assert black_list.remove("Trudy")
+    assert not black_list.is_banned("trudy", "id-2")
+    assert not black_list.remove("trudy")
+
+    # The id stays banned until every name banned with it is removed.
+    black_list.remove("eve")
+    assert black_list.is_banned("someone", "id-1")
+    black_list.remove("eve2")
+    assert not black_list.is_banned("someone", "id-1")
+
+
+def test_failed_add_many_bans_nobody(black_list, database):
+    black_list.add("eve", "id-1")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        black_list.add_many([("trudy", "id-2"), ("EVE", "id-3")])
+
+    assert not black_list.is_banned("trudy", "id-2")
+    assert not black_list.is_banned("someone", "id-3")
+    assert [row["user_name"] for row in database.select("blacklist")] == ["eve"]
+
+
+def test_ban_is_applied_once_the_transaction_commits(black_list, database):
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            black_list.add("eve", "id-1")
+            raise RuntimeError("rolled back")
+    assert not black_list.is_banned("eve", "id-1")
+
+    with database.transaction():
+        black_list.add("eve", "id-1")
+        assert not black_list.is_banned("eve", "id-1")
+    assert black_list.is_banned("eve", "id-1")
+
+
+def test_list_is_loaded_from_the_database(black_list, data):
+    black_list.add_many([("eve", "id-1"), ("trudy", "id-2")])
+
+    reloaded = BlackList(data)
+    assert reloaded.is_banned("trudy", "other")
+    assert reloaded.is_banned("someone", "id-1")
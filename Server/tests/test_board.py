@@ -0,0 +1,318 @@
+import random
+import pytest
+from ai import random_fleet_mask
+from board import CLASSIC_FLEET, MAX_BOARD_SIZE, PackedBoard, column_name, validate_fleet
+from game_session import GAME_RULES, BattleField
+
+ShootState = BattleField.ShootState
+
+
+def ship_cells(mask: int, width: int, height: int) -> set[tuple[int, int]]:
+    return {divmod(cell, width) for cell in range(width * height) if mask >> cell & 1}
+
+
+def ship_groups(cells: set[tuple[int, int]]) -> list[set[tuple[int, int]]]:
+    """
+    Groups of ship cells touching each other in any of the 8 directions.
+    """
+    groups = []
+    left = set(cells)
+    while left:
+        stack = [left.pop()]
+        group = set(stack)
+        while stack:
+            row, col = stack.pop()
+            for neighbour in [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]:
+                if neighbour in left:
+                    left.remove(neighbour)
+                    group.add(neighbour)
+                    stack.append(neighbour)
+        groups.append(group)
+    return groups
+
+
+def is_valid_fleet(mask: int, width: int, height: int, fleet) -> bool:
+    """
+    The rules checked cell by cell: every group of touching ship cells is a straight line without gaps,
+    and the lengths of the lines are the ones of the fleet.
+    """
+    lengths = []
+    for group in ship_groups(ship_cells(mask, width, height)):
+        rows = {row for row, _ in group}
+        cols = {col for _, col in group}
+        if len(rows) > 1 and len(cols) > 1:
+            return False
+        if max(rows) - min(rows) + max(cols) - min(cols) + 1 != len(group):
+            return False
+        lengths.append(len(group))
+    return sorted(lengths) == sorted(fleet)
+
+
+class ReferenceBoard:
+    """
+    A board kept as a dictionary of cells, the way the game was played before the bitboards.
+    """
+
+    def __init__(self, mask: int, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.cells = {(row, col): "." for row in range(height) for col in range(width)}
+        self.ships = ship_groups(ship_cells(mask, width, height))
+        for ship in self.ships:
+            for cell in ship:
+                self.cells[cell] = "S"
+
+    def shoot(self, row: int, col: int) -> ShootState:
+        state = self.cells[row, col]
+        if state in "HM":
+            return ShootState.ALREADY_SHOT
+        if state == ".":
+            self.cells[row, col] = "M"
+            return ShootState.MISS
+
+        self.cells[row, col] = "H"
+        ship = next(ship for ship in self.ships if (row, col) in ship)
+        if all(self.cells[cell] == "H" for cell in ship):
+            return ShootState.SUNK
+        return ShootState.HIT
+
+    def rows(self) -> list[list[str]]:
+        return [[self.cells[row, col] for col in range(self.width)] for row in range(self.height)]
+
+    def sunk(self) -> bool:
+        return "S" not in self.cells.values()
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_shots_match_the_reference_board(variant):
+    random.seed(variant)
+    rules = GAME_RULES[variant]
+
+    for _ in range(3):
+        mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+        field = BattleField.from_ship_mask(mask, rules.width, rules.height, rules.fleet)
+        reference = ReferenceBoard(mask, rules.width, rules.height)
+
+        # Every cell once and some of them twice, in a random order.
+        cells = [(row, col) for row in range(rules.height) for col in range(rules.width)]
+        shots = cells + random.sample(cells, len(cells) // 4)
+        random.shuffle(shots)
+
+        for number, (row, col) in enumerate(shots):
+            assert field.shoot(row, col) == reference.shoot(row, col)
+            assert field.is_all_ships_destroyed() == reference.sunk()
+            if number % 50 == 0:
+                assert field.battle_field == reference.rows()
+
+        assert field.battle_field == reference.rows()
+        assert field.get_unshot_cells() == []
+
+
+def test_field_from_rows_matches_the_ship_mask():
+    random.seed(1)
+    mask = random_fleet_mask()
+    rows = [["S" if mask >> (row * 10 + col) & 1 else "." for col in range(10)] for row in range(10)]
+
+    field = BattleField(rows)
+
+    assert field.ships == mask
+    assert field.battle_field == rows
+    assert len(field.get_unshot_cells()) == 100
+
+
+def test_shot_outside_the_board_raises():
+    field = BattleField.from_ship_mask(random_fleet_mask())
+
+    for row, col in ((-1, 0), (0, -1), (10, 0), (0, 10)):
+        with pytest.raises(ValueError):
+            field.shoot(row, col)
+
+
+def test_ship_mask_of_a_cell():
+    random.seed(2)
+    mask = random_fleet_mask()
+    field = BattleField.from_ship_mask(mask)
+
+    ships = ship_groups(ship_cells(mask, 10, 10))
+    for ship in ships:
+        expected = sum(1 << (row * 10 + col) for row, col in ship)
+        for row, col in ship:
+            assert field.get_ship_mask(row, col) == expected
+    assert sum(field.get_ship_mask(row, col) == 0 for row in range(10) for col in range(10)) == 100 - sum(CLASSIC_FLEET)
+
+
+def test_copy_is_independent():
+    random.seed(3)
+    field = BattleField.from_ship_mask(random_fleet_mask())
+    row, col = divmod((field.ships & -field.ships).bit_length() - 1, 10)
+
+    copy = field.copy()
+    copy.shoot(row, col)
+
+    assert field.hits == 0 and field.misses == 0
+    assert field.ship_health != copy.ship_health
+    assert field.shoot(row, col) in (ShootState.HIT, ShootState.SUNK)
+
+
+def as_mask(cells, width: int = 10) -> int:
+    return sum(1 << (row * width + col) for row, col in cells)
+
+
+CLASSIC_SHIPS = [
+    [(0, 0), (0, 1), (0, 2), (0, 3)],
+    [(2, 0), (2, 1), (2, 2)],
+    [(2, 5), (3, 5), (4, 5)],
+    [(4, 0), (4, 1)],
+    [(6, 0), (7, 0)],
+    [(9, 8), (9, 9)],
+    [(6, 3)],
+    [(6, 8)],
+    [(8, 5)],
+    [(9, 2)],
+]
+
+
+def test_valid_fleet_is_split_into_its_ships():
+    ships = validate_fleet(as_mask(cell for ship in CLASSIC_SHIPS for cell in ship))
+
+    assert sorted(ships) == sorted(as_mask(ship) for ship in CLASSIC_SHIPS)
+
+
+@pytest.mark.parametrize(
+    "change, error",
+    [
+        # A 1-cell ship touching the corner of another ship.
+        ({"remove": [(6, 3)], "add": [(5, 2)]}, "cannot touch"),
+        # The 4-cell ship bent into an L.
+        ({"remove": [(0, 3)], "add": [(1, 2)]}, "cannot touch"),
+        # A 1-cell ship next to the side of another ship.
+        ({"remove": [(9, 2)], "add": [(3, 6)]}, "cannot touch"),
+        # The right number of cells, but a 5-cell ship instead of a 4-cell and a 1-cell one.
+        ({"remove": [(9, 2)], "add": [(0, 4)]}, "cannot touch"),
+        # A gap in the middle of a ship.
+        ({"remove": [(0, 1)], "add": [(0, 5)]}, None),
+        # A cell missing.
+        ({"remove": [(9, 2)], "add": []}, "in total"),
+        # Right lengths of cells, wrong ships: two 2-cell ships instead of a 3-cell and a 1-cell one.
+        ({"remove": [(2, 2), (8, 5)], "add": [(8, 5), (8, 6)]}, None),
+    ],
+)
+def test_invalid_fleets_are_rejected(change, error):
+    cells = {cell for ship in CLASSIC_SHIPS for cell in ship}
+    cells = cells - set(change["remove"]) | set(change["add"])
+
+    with pytest.raises(ValueError, match=error):
+        validate_fleet(as_mask(cells))
+
+
+def test_cells_outside_the_board_are_rejected():
+    with pytest.raises(ValueError):
+        validate_fleet(1 << 100)
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_validation_matches_the_rules_cell_by_cell(variant):
+    random.seed(variant)
+    rules = GAME_RULES[variant]
+    cells = rules.width * rules.height
+
+    # Fewer fleets on the larger boards, the reference check goes over every cell.
+    for _ in range(max(20, 20000 // cells)):
+        mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+        # Valid fleets and fleets with a cell moved, added or removed.
+        for _ in range(random.choice((0, 1, 2))):
+            mask ^= 1 << random.randrange(cells)
+
+        try:
+            ships = validate_fleet(mask, rules.width, rules.height, rules.fleet)
+        except ValueError:
+            ships = None
+
+        assert (ships is not None) == is_valid_fleet(mask, rules.width, rules.height, rules.fleet)
+        if ships is not None:
+            groups = ship_groups(ship_cells(mask, rules.width, rules.height))
+            assert sorted(ships) == sorted(as_mask(group, rules.width) for group in groups)
+
+
+def random_board(width: int, height: int) -> tuple[int, int, int]:
+    """
+    Random ship, hit and missed cells: hits are ship cells, misses are empty cells.
+    """
+    cells = width * height
+    ships = random.getrandbits(cells)
+    hits = ships & random.getrandbits(cells)
+    misses = ~ships & random.getrandbits(cells) & ((1 << cells) - 1)
+    return ships, hits, misses
+
+
+def test_packed_bitboards_roundtrip():
+    random.seed(7)
+    sizes = [(1, 1), (1, 7), (3, 1), (10, 10), (7, 13), (MAX_BOARD_SIZE, MAX_BOARD_SIZE)]
+    sizes += [(random.randint(1, MAX_BOARD_SIZE), random.randint(1, MAX_BOARD_SIZE)) for _ in range(50)]
+
+    for width, height in sizes:
+        board = random_board(width, height)
+        packed = PackedBoard.from_bitboards(width, height, *board)
+
+        assert len(packed.data) == (width * height + 3) // 4
+        assert packed.to_bitboards() == board
+
+
+def test_packed_field_roundtrip():
+    random.seed(8)
+    for width, height in ((1, 1), (10, 10), (7, 13), (MAX_BOARD_SIZE, 3)):
+        field = [[random.choice(".SHM") for _ in range(width)] for _ in range(height)]
+        packed = PackedBoard.from_field(field)
+
+        assert (packed.width, packed.height) == (width, height)
+        assert packed.to_field() == field
+        assert packed.to_rows() == ["".join(row) for row in field]
+
+
+def test_packed_bytes_roundtrip_inside_a_larger_buffer():
+    random.seed(9)
+    boards = [
+        PackedBoard.from_bitboards(width, height, *random_board(width, height))
+        for width, height in ((10, 10), (7, 13), (1, 1))
+    ]
+    buffer = b"head" + b"".join(board.to_bytes() for board in boards) + b"tail"
+
+    offset = 4
+    for board in boards:
+        read = PackedBoard.from_bytes(memoryview(buffer), offset)
+        assert (read.width, read.height, read.data) == (board.width, board.height, board.data)
+        assert read.size() == len(board.to_bytes())
+        offset += read.size()
+
+
+def test_packed_board_of_a_battle_field():
+    random.seed(10)
+    field = BattleField.from_ship_mask(random_fleet_mask())
+    for row, col in random.sample([(row, col) for row in range(10) for col in range(10)], 40):
+        field.shoot(row, col)
+
+    packed = field.to_packed()
+
+    assert packed.to_field() == field.battle_field
+    assert packed.to_bitboards() == (field.ships, field.hits, field.misses)
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda: PackedBoard(0, 10, b""),
+        lambda: PackedBoard(MAX_BOARD_SIZE + 1, 1, bytes((MAX_BOARD_SIZE + 4) // 4)),
+        lambda: PackedBoard(10, 10, bytes(24)),
+        lambda: PackedBoard.from_field([["S", "X"]]),
+        lambda: PackedBoard.from_bytes(bytes((10, 10)) + bytes(20)),
+        lambda: PackedBoard.from_bytes(b"\x0a"),
+    ],
+)
+def test_invalid_packed_boards_are_rejected(make):
+    with pytest.raises(ValueError):
+        make()
+
+
+def test_columns_past_z_are_named_like_spreadsheet_columns():
+    assert [column_name(index) for index in (0, 25, 26, 27, 51, 52)] == ["A", "Z", "AA", "AB", "AZ", "BA"]
+    assert len({column_name(index) for index in range(MAX_BOARD_SIZE)}) == MAX_BOARD_SIZE
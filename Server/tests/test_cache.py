@@ -0,0 +1,86 @@
+import cache
+from cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache("test lru", 2)
+
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.put("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.evictions == 1
+    assert len(lru) == 2
+
+
+def test_peek_does_not_count_or_reorder():
+    lru = LRUCache("test peek", 2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+
+    assert lru.peek("a") == 1
+    assert lru.peek("missing", "default") == "default"
+    lru.put("c", 3)
+
+    assert lru.peek("a") is None  # Still the least recently used one, so it was evicted
+    assert lru.hits == 0 and lru.misses == 0
+
+
+def test_stats_and_hit_rate():
+    lru = LRUCache("test stats", 10)
+    lru.put("a", 1)
+
+    lru.get("a")
+    lru.get("a")
+    lru.get("a")
+    lru.get("b")
+
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (3, 1, 1)
+    assert lru.hit_rate() == 0.75
+    assert LRUCache.caches["test stats"] is lru
+
+
+def test_zero_size_disables_the_cache():
+    lru = LRUCache("test disabled", 0)
+
+    lru.put("a", 1)
+
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+    lru = LRUCache("test ttl", 10, ttl=5)
+
+    lru.put("a", 1)
+    now[0] += 4.9
+    assert lru.get("a") == 1
+
+    now[0] += 0.2
+    assert lru.get("a") is None
+    assert lru.expirations == 1
+    assert len(lru) == 0
+
+    # Storing the entry again starts a new ttl.
+    lru.put("a", 2)
+    now[0] += 4.9
+    assert lru.get("a") == 2
+
+
+def test_remove_and_clear():
+    lru = LRUCache("test remove", 10)
+    lru.put("a", 1)
+    lru.put("b", 2)
+
+    lru.remove("a")
+    lru.remove("missing")
+    assert lru.get("a") is None and lru.get("b") == 2
+
+    lru.clear()
+    assert len(lru) == 0
@@ -0,0 +1,75 @@
+import random
+import pytest
+from ai import random_fleet_mask
+from game_session import GAME_RULES, Session
+from settings import TURN_TIMEOUT_FORFEIT_AFTER
+from simulation import SilentLogger, SimulatedPlayer, SimulatedServer
+
+
+def post(player, data: dict) -> dict:
+    return {"player": player, "data": {"code": Session.GameDataCode.POST_DATA.value, "data": data}}
+
+
+@pytest.fixture
+def session():
+    random.seed(1)
+    rules = GAME_RULES["classic"]
+    players = [SimulatedPlayer("absent", rules), SimulatedPlayer("present", rules)]
+
+    session = Session(SimulatedServer(), set(players), logger=SilentLogger(), rules=rules)
+    for player in session.players:
+        player.connect_session(session)
+    session._begin()
+
+    for player in session.players:
+        session._process_packet(
+            post(player, {"type": Session.GameDataType.BATTLE_FIELD.value, "ships": random_fleet_mask()})
+        )
+    yield session
+    session._Stop()
+
+
+def expire_turn(session: Session) -> None:
+    # What the timer thread does when the shot clock of the attacking player runs out.
+    session.expired_deadline = (session.deadline_id, "turn")
+    session._process_packet(None)
+
+
+def test_player_who_never_shoots_loses_by_forfeit(session):
+    absent, present = sorted(session.players, key=lambda player: player.name)
+    ships = session.battle_fields[absent][0].ships
+    # The present player only shoots at water, so the absent one gets the turn back after every shot.
+    water = [divmod(cell, 10) for cell in range(100) if not ships >> cell & 1]
+
+    for _ in range(200):
+        if session.winner:
+            break
+        if session.players[session.player_attacks] is absent:
+            expire_turn(session)
+        else:
+            row, col = water.pop()
+            session._process_packet(
+                post(present, {"type": Session.GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}})
+            )
+
+    assert session.winner is present
+    assert session.expired_turns[absent] == TURN_TIMEOUT_FORFEIT_AFTER
+
+
+def test_real_shot_resets_the_expired_turns(session):
+    player = session.players[session.player_attacks]
+    expire_turn(session)
+    while session.players[session.player_attacks] is not player:
+        other = session.players[session.player_attacks]
+        row, col = other.next_shot()
+        session._process_packet(
+            post(other, {"type": Session.GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}})
+        )
+
+    row, col = player.next_shot()
+    session._process_packet(
+        post(player, {"type": Session.GameDataType.COORDINATE.value, "coords": {"row": row, "col": col}})
+    )
+
+    assert session.expired_turns[player] == 0
+    assert not session.winner
@@ -0,0 +1,94 @@
+import random
+from leaderboard import Leaderboard
+from models.users import Users
+
+
+def ranking(wins: dict) -> list[tuple[int, str, int]]:
+    """
+    The whole ranking computed from scratch: by wins, then by name, equal wins share the rank.
+    """
+    ordered = sorted(wins.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        (1 + sum(other > user_wins for other in wins.values()), user_name, user_wins)
+        for user_name, user_wins in ordered
+    ]
+
+
+def test_ranks_are_shared_by_equal_wins():
+    leaderboard = Leaderboard()
+    leaderboard.load([("dave", 3), ("alice", 5), ("carol", 3), ("bob", 5), ("eve", 0)])
+
+    assert leaderboard.top(10) == [
+        (1, "alice", 5),
+        (1, "bob", 5),
+        (3, "carol", 3),
+        (3, "dave", 3),
+        (5, "eve", 0),
+    ]
+    assert leaderboard.rank("dave") == (3, 3)
+    assert leaderboard.rank("nobody") is None
+
+
+def test_page_starting_inside_a_group_of_equal_wins():
+    leaderboard = Leaderboard()
+    leaderboard.load([("a", 9), ("b", 7), ("c", 7), ("d", 7), ("e", 1)])
+
+    assert leaderboard.page(2, 2) == [(2, "c", 7), (2, "d", 7)]
+    assert leaderboard.page(3, 2) == [(5, "e", 1)]
+    assert leaderboard.page(4, 2) == []
+    assert leaderboard.pages(2) == 3
+
+
+def test_updates_match_a_ranking_from_scratch():
+    random.seed(11)
+    leaderboard = Leaderboard()
+    wins = {f"user{number}": random.randrange(5) for number in range(50)}
+    leaderboard.load(wins.items())
+
+    for step in range(500):
+        user_name = f"user{random.randrange(60)}"
+        action = random.random()
+        if action < 0.5 and user_name in wins:
+            delta = random.choice((1, 1, 2, -1))
+            wins[user_name] += delta
+            leaderboard.add(user_name, delta)
+        elif action < 0.8:
+            wins[user_name] = random.randrange(10)
+            leaderboard.set(user_name, wins[user_name])
+        else:
+            wins.pop(user_name, None)
+            leaderboard.remove(user_name)
+
+        if step % 25 == 0:
+            expected = ranking(wins)
+            assert len(leaderboard) == len(wins)
+            pages = [leaderboard.page(number, 7) for number in range(1, leaderboard.pages(7) + 1)]
+            assert [entry for page in pages for entry in page] == expected
+            for rank, user_name, user_wins in expected:
+                assert leaderboard.rank(user_name) == (rank, user_wins)
+
+
+def test_add_ignores_users_that_are_not_on_the_leaderboard():
+    leaderboard = Leaderboard()
+
+    leaderboard.add("nobody", 1)
+
+    assert len(leaderboard) == 0
+    assert leaderboard.pages(10) == 1
+    assert leaderboard.top() == []
+
+
+def test_users_model_keeps_the_leaderboard_up_to_date(data):
+    users = Users(data)
+    for user_name in ("alice", "bob", "carol"):
+        users.add(user_name, user_name, "password")
+
+    users.update_stats("bob", {"stat_wins": 2})
+    users.update_stats_many({"carol": {"stat_wins": 1}, "alice": {"stat_defeats": 1}})
+    users.set_stat_wins("alice", 1)
+    users.remove("carol")
+
+    assert users.leaderboard.top() == [(1, "bob", 2), (2, "alice", 1)]
+
+    # Loaded from the database, a new model gets the same leaderboard.
+    assert Users(data).leaderboard.top() == users.leaderboard.top()
@@ -0,0 +1,70 @@
+import pytest
+from migrations import MIGRATIONS, Migration, migrate, schema_version
+from models.users import Users
+
+
+def indexes(database, table_name: str) -> set[str]:
+    rows = database.select("sqlite_master", {"type": "index", "tbl_name": table_name})
+    return {row["name"] for row in rows if not row["name"].startswith("sqlite_autoindex")}
+
+
+def test_new_database_gets_every_migration(data):
+    Users(data)
+
+    assert migrate(data.database) == len(MIGRATIONS)
+
+    assert schema_version(data.database) == MIGRATIONS[-1].version
+    assert indexes(data.database, "users") == {
+        "idx_users_stat_wins",
+        "idx_users_register_date",
+        "idx_users_last_login_id",
+    }
+
+
+def test_migrating_again_changes_nothing(data):
+    Users(data)
+    migrate(data.database)
+    versions = data.database.select("schema_version")
+
+    assert migrate(data.database) == 0
+    assert migrate(data.database) == 0
+
+    assert data.database.select("schema_version") == versions
+
+
+def test_only_new_migrations_are_applied(database):
+    applied = []
+
+    def step(version: int) -> Migration:
+        return Migration(version, f"Step {version}", lambda database: applied.append(version))
+
+    assert migrate(database, [step(1), step(2)]) == 2
+    # Released steps stay, new ones are added to the end (in any order in the list).
+    assert migrate(database, [step(1), step(2), step(4), step(3)]) == 2
+
+    assert applied == [1, 2, 3, 4]
+    assert schema_version(database) == 4
+
+
+def test_failed_migration_is_tried_again(database):
+    attempts = []
+
+    def create_table(database) -> None:
+        database.create_table("replays", {"id": "INT PRIMARY KEY"})
+
+    def add_index(database) -> None:
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise RuntimeError("interrupted")
+        database.create_index("replays", "idx_replays_id", ["id"])
+
+    migrations = [Migration(1, "Replays", create_table), Migration(2, "Index the replays", add_index)]
+
+    with pytest.raises(RuntimeError):
+        migrate(database, migrations)
+    # The first step stays applied, the failed one isn't recorded.
+    assert schema_version(database) == 1
+
+    assert migrate(database, migrations) == 1
+    assert schema_version(database) == 2
+    assert indexes(database, "replays") == {"idx_replays_id"}
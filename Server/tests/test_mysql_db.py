@@ -0,0 +1,142 @@
+import pytest
+
+mysql = pytest.importorskip("mysql.connector")
+
+from databases.mysql_db import MySQLDatabase
+
+
+class FakeCursor:
+    rowcount = 1
+
+    def __init__(self, log: list) -> None:
+        self.log = log
+
+    def execute(self, statement, params=()) -> None:
+        self.log.append(statement)
+
+    def executemany(self, statement, rows) -> None:
+        self.log.append(statement)
+
+    def fetchone(self):
+        return ("8.0.0",)
+
+    def fetchall(self) -> list:
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    """
+    Records the statements, transactions and connection options a MySQLDatabase uses.
+    """
+
+    def __init__(self, **options) -> None:
+        self.options = options
+        self.log = []
+        self.cursors = []
+
+    def cursor(self, **options) -> FakeCursor:
+        self.cursors.append(options)
+        return FakeCursor(self.log)
+
+    def start_transaction(self) -> None:
+        self.log.append("START TRANSACTION")
+
+    def commit(self) -> None:
+        self.log.append("COMMIT")
+
+    def rollback(self) -> None:
+        self.log.append("ROLLBACK")
+
+    def ping(self, reconnect: bool = False) -> None:
+        pass
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    connections = []
+
+    def connect(**options) -> FakeConnection:
+        connections.append(FakeConnection(**options))
+        return connections[-1]
+
+    monkeypatch.setattr(mysql, "connect", connect)
+    database = MySQLDatabase("localhost", "user", "password", "BattleShipDB", pool_size=1)
+    database.connections = connections
+    connections[0].log.clear()  # The version query of the constructor
+    return database
+
+
+def test_connections_commit_every_statement_outside_of_transactions(database):
+    connection = database.connections[0]
+
+    database.insert("users", {"name": "alice"})
+    database.select("users")
+
+    # Autocommit: reads don't keep a snapshot open and writes don't need a COMMIT.
+    assert connection.options["autocommit"] is True
+    assert connection.log == ["INSERT INTO users (name) VALUES (%s)", "SELECT * FROM users"]
+
+
+def test_transaction_is_started_and_committed_once(database):
+    connection = database.connections[0]
+
+    with database.transaction():
+        database.insert("users", {"name": "alice"})
+        with database.transaction():
+            database.set("users", "stat_wins", 1, {"name": "alice"})
+
+    assert connection.log == [
+        "START TRANSACTION",
+        "INSERT INTO users (name) VALUES (%s)",
+        "UPDATE users SET stat_wins=%s WHERE name=%s",
+        "COMMIT",
+    ]
+
+
+def test_failing_transaction_is_rolled_back(database):
+    connection = database.connections[0]
+    committed = []
+
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            database.insert("users", {"name": "alice"})
+            database.on_commit(lambda: committed.append(True))
+            raise RuntimeError("failed")
+
+    assert connection.log == ["START TRANSACTION", "INSERT INTO users (name) VALUES (%s)", "ROLLBACK"]
+    assert not committed
+    assert not database.in_transaction()
+
+
+def test_batch_writes_commit_once(database):
+    connection = database.connections[0]
+
+    database.set_many("users", "stat_wins", [(1, {"name": "alice"}), (2, {"name": "bob"})])
+
+    assert connection.log == ["START TRANSACTION", "UPDATE users SET stat_wins=%s WHERE name=%s", "COMMIT"]
+
+
+def test_prepared_cursor_is_reused_for_the_same_statement(database):
+    connection = database.connections[0]
+    connection.cursors.clear()  # The cursor of the version query
+
+    for name in ("alice", "bob", "carol"):
+        database.select_one("users", {"name": name})
+    database.delete("users", {"name": "alice"})
+    database.delete("users", {"name": "bob"})
+
+    # One prepared cursor per statement: later executions only send the parameters.
+    assert connection.cursors == [
+        {"prepared": True, "dictionary": True},
+        {"prepared": True, "dictionary": False},
+    ]
+    assert connection.log == ["SELECT * FROM users WHERE name=%s LIMIT 1"] * 3 + ["DELETE FROM users WHERE name=%s"] * 2
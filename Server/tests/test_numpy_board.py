@@ -0,0 +1,138 @@
+import random
+import pytest
+from ai import random_fleet_mask
+from board import validate_fleet
+from game_session import GAME_RULES, BattleField
+
+np = pytest.importorskip("numpy")
+
+from numpy_board import NumpyBattleField, boards_to_masks, hit_masks, masks_to_boards, validate_fleets
+
+
+def assert_same_board(field: NumpyBattleField, expected: BattleField) -> None:
+    assert field.ships == expected.ships
+    assert field.hits == expected.hits
+    assert field.misses == expected.misses
+    assert field.ship_health == expected.ship_health
+    assert field.ships_left == expected.ships_left
+    assert field.is_all_ships_destroyed() == expected.is_all_ships_destroyed()
+    assert field.battle_field == expected.battle_field
+    assert field.get_unshot_cells() == expected.get_unshot_cells()
+    assert field.to_packed().to_bytes() == expected.to_packed().to_bytes()
+
+
+def random_shots(rules, count: int) -> list[tuple[int, int]]:
+    # Repeated cells included, they have to be reported as already shot.
+    return [(random.randrange(rules.height), random.randrange(rules.width)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_shots_match_the_bitboard_engine(variant):
+    random.seed(variant)
+    rules = GAME_RULES[variant]
+    mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+
+    field = NumpyBattleField.from_ship_mask(mask, rules.width, rules.height, rules.fleet)
+    expected = BattleField.from_ship_mask(mask, rules.width, rules.height, rules.fleet)
+    assert_same_board(field, expected)
+
+    for number, (row, col) in enumerate(random_shots(rules, rules.width * rules.height * 2)):
+        assert field.shoot(row, col) == expected.shoot(row, col)
+        if number % 100 == 0:
+            assert_same_board(field, expected)
+
+    assert_same_board(field, expected)
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_shoot_many_matches_single_shots(variant):
+    random.seed(variant)
+    rules = GAME_RULES[variant]
+    mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+
+    field = NumpyBattleField.from_ship_mask(mask, rules.width, rules.height, rules.fleet)
+    expected = BattleField.from_ship_mask(mask, rules.width, rules.height, rules.fleet)
+
+    # Batches of different sizes until every ship is sunk.
+    while not expected.is_all_ships_destroyed():
+        shots = random_shots(rules, random.randint(1, rules.width * rules.height // 4))
+        states = field.shoot_many([row for row, _ in shots], [col for _, col in shots])
+
+        assert states.tolist() == [expected.shoot(row, col).value for row, col in shots]
+        assert_same_board(field, expected)
+
+
+def test_shoot_many_outside_the_board_raises():
+    field = NumpyBattleField.from_ship_mask(random_fleet_mask())
+
+    with pytest.raises(ValueError):
+        field.shoot_many([0, 10], [0, 0])
+    assert field.hits == 0 and field.misses == 0
+
+
+def test_reveal_copy_and_set_match_the_bitboard_engine():
+    random.seed(4)
+    mask = random_fleet_mask()
+    field = NumpyBattleField.from_ship_mask(mask)
+    expected = BattleField.from_ship_mask(mask)
+
+    reveal = random.getrandbits(100)
+    field.reveal(reveal)
+    expected.reveal(reveal)
+    assert_same_board(field, expected)
+
+    copy, expected_copy = field.copy(), expected.copy()
+    for row, col in random_shots(GAME_RULES["classic"], 30):
+        assert copy.shoot(row, col) == expected_copy.shoot(row, col)
+    assert_same_board(copy, expected_copy)
+    assert_same_board(field, expected)
+
+    field.set(0, 0, BattleField.ShootState.MISS)
+    expected.set(0, 0, BattleField.ShootState.MISS)
+    assert field.battle_field == expected.battle_field
+
+
+def test_masks_and_boards_roundtrip():
+    random.seed(5)
+    masks = [random.getrandbits(7 * 13) for _ in range(20)]
+
+    boards = masks_to_boards(masks, 7, 13)
+
+    assert boards.shape == (20, 13, 7)
+    assert bool(boards[0, 1, 2]) == bool(masks[0] >> (1 * 7 + 2) & 1)
+    assert boards_to_masks(boards) == masks
+
+
+def test_hit_masks():
+    random.seed(6)
+    fields = [NumpyBattleField.from_ship_mask(random_fleet_mask()) for _ in range(5)]
+    for field in fields:
+        for row, col in random_shots(GAME_RULES["classic"], 40):
+            field.shoot(row, col)
+
+    assert boards_to_masks(hit_masks(fields)) == [field.hits for field in fields]
+
+
+@pytest.mark.parametrize("variant", sorted(GAME_RULES))
+def test_batch_validation_matches_validate_fleet(variant):
+    random.seed(variant)
+    rules = GAME_RULES[variant]
+    cells = rules.width * rules.height
+
+    masks = []
+    for _ in range(max(20, 20000 // cells)):
+        mask = random_fleet_mask(rules.width, rules.height, rules.fleet)
+        for _ in range(random.choice((0, 1, 2))):
+            mask ^= 1 << random.randrange(cells)
+        masks.append(mask)
+    masks.append(1 << cells)  # A cell outside the board
+
+    expected = []
+    for mask in masks:
+        try:
+            validate_fleet(mask, rules.width, rules.height, rules.fleet)
+            expected.append(True)
+        except ValueError:
+            expected.append(False)
+
+    assert validate_fleets(masks, rules.width, rules.height, rules.fleet).tolist() == expected
@@ -0,0 +1,207 @@
+from queue import Queue
+from threading import Event, Thread
+from time import sleep
+import pytest
+from databases.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.usable = True
+        self.healthy = True
+        self.rollbacks = 0
+        self.closed = False
+
+    def check(self) -> None:
+        if not self.healthy:
+            raise ConnectionError("gone away")
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_pool(size: int = 2, timeout: float = 1.0, ping_interval: float = 60.0) -> ConnectionPool:
+    return ConnectionPool(
+        FakeConnection,
+        FakeConnection.check,
+        lambda connection: connection.usable,
+        size=size,
+        timeout=timeout,
+        ping_interval=ping_interval,
+    )
+
+
+def hold(pool: ConnectionPool, taken: Queue, release: Event) -> Thread:
+    """
+    Starts a thread that checks a connection out, puts it into taken and keeps it until release is set.
+    """
+
+    def run() -> None:
+        try:
+            with pool.connection() as connection:
+                taken.put(connection)
+                release.wait(5)
+        except PoolTimeoutError as e:
+            taken.put(e)
+
+    thread = Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for_waiters(pool: ConnectionPool, waiting: int) -> None:
+    for _ in range(500):
+        if pool.stats()["waiting"] == waiting:
+            return
+        sleep(0.002)
+    raise AssertionError(f"{waiting} threads never started waiting")
+
+
+def test_connections_are_opened_on_demand_and_reused():
+    pool = make_pool(size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_nested_use_gets_the_same_connection():
+    pool = make_pool(size=1, timeout=0.1)
+
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+
+    assert pool.stats()["created"] == 1
+
+
+def test_exhausted_pool_times_out():
+    pool = make_pool(size=1, timeout=0.05)
+    taken, release = Queue(), Event()
+    holder = hold(pool, taken, release)
+    taken.get(timeout=1)
+
+    with pytest.raises(PoolTimeoutError):
+        with pool.connection():
+            pass
+
+    release.set()
+    holder.join()
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waiting"] == 0
+    assert stats["open"] == 1
+
+
+def test_freed_connection_is_handed_over_in_order():
+    pool = make_pool(size=1, timeout=2)
+    taken, release = Queue(), Event()
+    holder = hold(pool, taken, release)
+    connection = taken.get(timeout=1)
+
+    # Three more threads queue up for the only connection, one after the other.
+    waiters = []
+    for index in range(3):
+        waiter_taken, waiter_release = Queue(), Event()
+        waiters.append((hold(pool, waiter_taken, waiter_release), waiter_taken, waiter_release))
+        wait_for_waiters(pool, index + 1)
+
+    release.set()
+    holder.join()
+    for thread, waiter_taken, waiter_release in waiters:
+        # Each waiter gets the connection only once the one before it has released it.
+        assert waiter_taken.get(timeout=1) is connection
+        waiter_release.set()
+        thread.join()
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["waits"] == 3
+    assert stats["timeouts"] == 0
+
+
+def test_failed_operation_rolls_the_connection_back():
+    pool = make_pool(size=1)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connection:
+            raise RuntimeError("query failed")
+
+    assert connection.rollbacks == 1
+    with pool.connection() as again:
+        assert again is connection
+    assert pool.stats()["errors"] == 1
+
+
+def test_unusable_connection_is_replaced_and_its_slot_handed_over():
+    pool = make_pool(size=1, timeout=2)
+    taken, failed = Queue(), Event()
+
+    def fail() -> None:
+        try:
+            with pool.connection() as connection:
+                taken.put(connection)
+                failed.wait(5)
+                connection.usable = False
+                raise RuntimeError("connection lost")
+        except RuntimeError:
+            pass
+
+    failing = Thread(target=fail)
+    failing.start()
+    broken = taken.get(timeout=1)
+
+    waiter_taken, waiter_release = Queue(), Event()
+    waiter = hold(pool, waiter_taken, waiter_release)
+    wait_for_waiters(pool, 1)
+    failed.set()
+    failing.join()
+
+    replacement = waiter_taken.get(timeout=1)
+    waiter_release.set()
+    waiter.join()
+
+    assert broken.closed
+    assert isinstance(replacement, FakeConnection) and replacement is not broken
+    assert pool.stats()["open"] == 1
+
+
+def test_idle_connection_is_checked_and_reopened():
+    pool = make_pool(size=1, ping_interval=0)
+
+    with pool.connection() as connection:
+        pass
+    connection.healthy = False
+    sleep(0.001)
+
+    with pool.connection() as reopened:
+        pass
+
+    assert reopened is not connection
+    assert connection.closed
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_close_closes_idle_connections_and_returned_ones():
+    pool = make_pool(size=2)
+    taken, release = Queue(), Event()
+    holder = hold(pool, taken, release)
+    in_use = taken.get(timeout=1)
+    with pool.connection() as idle:
+        pass
+
+    pool.close()
+    assert idle.closed and not in_use.closed
+
+    release.set()
+    holder.join()
+    assert in_use.closed
+    assert pool.stats()["open"] == 0
@@ -0,0 +1,102 @@
+from threading import Event
+import pytest
+from packet import Packet
+from settings import SPECTATOR_QUEUE_SIZE, SPECTATOR_MAX_LAG
+from spectators import SpectatorHub
+
+
+class FakeNetwork:
+    """
+    A socket that accepts nothing (busy), everything, or fails, depending on mode.
+    """
+
+    def __init__(self, mode: str = "busy") -> None:
+        self.mode = mode
+        self.sent = []
+
+    def connected(self) -> bool:
+        return True
+
+    def send_nowait(self, payloads) -> bool:
+        if self.mode == "error":
+            raise ConnectionResetError("reset by peer")
+        if self.mode == "busy":
+            return False
+        while payloads:
+            self.sent.append(payloads.popleft())
+        return True
+
+
+class FakeUser:
+    def __init__(self, name: str, hub: SpectatorHub, mode: str = "busy") -> None:
+        self.name = name
+        self.net = FakeNetwork(mode)
+        self.spectating = hub
+        self.stopped = Event()
+
+    def stop_spectating(self) -> None:
+        self.spectating = None
+        self.stopped.set()
+
+
+def event(number: int) -> Packet:
+    return Packet(Packet.Code.SESSION_DATA, {"event": number})
+
+
+@pytest.fixture
+def hub():
+    hub = SpectatorHub(1)
+    yield hub
+    hub.close()
+
+
+def test_events_are_encoded_once_and_delivered_in_order(hub):
+    first, second = FakeUser("first", hub, "ready"), FakeUser("second", hub, "ready")
+    hub.subscribe(first)
+    hub.subscribe(second)
+
+    for number in range(3):
+        hub.publish(event(number))
+    hub.close()
+    hub.thread.join(1)
+
+    expected = [event(number).to_bytes() for number in range(3)]
+    assert first.net.sent == expected == second.net.sent
+    # Both spectators got the same buffers.
+    assert all(a is b for a, b in zip(first.net.sent, second.net.sent))
+
+
+def test_queue_of_a_busy_spectator_is_bounded_and_skips_the_oldest_events(hub):
+    user = FakeUser("slow", hub)
+    hub.subscribe(user)
+
+    for number in range(SPECTATOR_QUEUE_SIZE + 10):
+        hub.publish(event(number))
+
+    queue = hub.spectators[user].queue
+    assert len(queue) == SPECTATOR_QUEUE_SIZE
+    assert queue[0] == event(10).to_bytes()
+    assert hub.spectators[user].lag == 10
+    assert not user.stopped.is_set()
+
+
+def test_spectator_that_keeps_lagging_is_dropped(hub):
+    user = FakeUser("slow", hub)
+    hub.subscribe(user)
+
+    for number in range(SPECTATOR_QUEUE_SIZE + SPECTATOR_MAX_LAG + 1):
+        hub.publish(event(number))
+
+    assert user not in hub.get_spectators()
+    assert user.stopped.is_set()
+    assert user.spectating is None
+
+
+def test_spectator_whose_socket_fails_is_dropped(hub):
+    user = FakeUser("gone", hub, "error")
+    hub.subscribe(user)
+    hub.publish(event(0))
+
+    assert user.stopped.wait(1)
+    assert user.spectating is None
+    assert user not in hub.get_spectators()
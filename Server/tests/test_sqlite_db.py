@@ -0,0 +1,66 @@
+import sqlite3
+from queue import Queue
+from threading import Event, Thread
+import pytest
+
+
+@pytest.fixture
+def table(database):
+    database.create_table("names", {"name": "VARCHAR(40) PRIMARY KEY"})
+    return database
+
+
+def names(database) -> list[str]:
+    return sorted(row["name"] for row in database.select("names"))
+
+
+def test_failed_write_does_not_keep_the_write_lock(table):
+    table.insert("names", {"name": "taken"})
+    failed = Queue()
+    release = Event()
+
+    def run() -> None:
+        try:
+            table.insert("names", {"name": "taken"})
+        except sqlite3.IntegrityError as e:
+            failed.put(e)
+        # The thread keeps its connection open while the other one writes.
+        release.wait(5)
+
+    thread = Thread(target=run)
+    thread.start()
+    try:
+        assert isinstance(failed.get(timeout=5), sqlite3.IntegrityError)
+        table.insert("names", {"name": "free"})
+    finally:
+        release.set()
+        thread.join()
+
+    assert names(table) == ["free", "taken"]
+
+
+def test_failed_transaction_is_rolled_back(table):
+    with pytest.raises(sqlite3.IntegrityError):
+        with table.transaction():
+            table.insert("names", {"name": "first"})
+            table.insert("names", {"name": "first"})
+
+    assert not table._connection().in_transaction
+    assert names(table) == []
+
+    with table.transaction():
+        table.insert("names", {"name": "second"})
+    assert names(table) == ["second"]
+
+
+def test_batch_with_a_failing_row_is_rolled_back_as_a_whole(table):
+    with pytest.raises(sqlite3.IntegrityError):
+        table.insert_many("names", [{"name": "a"}, {"name": "b"}, {"name": "a"}])
+
+    assert not table._connection().in_transaction
+    assert names(table) == []
+
+    assert table.insert_many("names", [{"name": "a"}, {"name": "b"}]) == 2
+    with pytest.raises(sqlite3.IntegrityError):
+        table.set_many("names", "name", [("c", {"name": "a"}), ("c", {"name": "b"})])
+    assert names(table) == ["a", "b"]
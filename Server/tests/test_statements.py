@@ -0,0 +1,61 @@
+from threading import Barrier, Thread
+from databases.statements import Statements
+
+
+def test_same_query_returns_the_same_string():
+    statements = Statements("?", "MAX")
+
+    first = statements.update("users", ("stat_wins",), ("user_name",))
+    # Built from new but equal tuples, as the engines do on every call.
+    second = statements.update("users", tuple(["stat_wins"]), tuple(["user_name"]))
+
+    assert first == "UPDATE users SET stat_wins=? WHERE user_name=?"
+    assert first is second
+    assert len(statements) == 1
+
+
+def test_statements_are_keyed_by_operation_table_and_columns():
+    statements = Statements("%s", "GREATEST")
+
+    assert statements.select("users") == "SELECT * FROM users"
+    assert statements.select("users", ("user_name",)) == "SELECT * FROM users WHERE user_name=%s"
+    assert statements.select_one("users", ("user_name",)) == "SELECT * FROM users WHERE user_name=%s LIMIT 1"
+    assert statements.delete("blacklist", ("user_name",)) == "DELETE FROM blacklist WHERE user_name=%s"
+    assert statements.insert("blacklist", ("user_name", "user_id")) == "INSERT INTO blacklist (user_name, user_id) VALUES (%s, %s)"
+    assert (
+        statements.increment("users", ("stat_wins",), ("stat_longest_match",), ("user_name",))
+        == "UPDATE users SET stat_wins=stat_wins+%s, stat_longest_match=GREATEST(stat_longest_match, %s) WHERE user_name=%s"
+    )
+    assert len(statements) == 6
+
+
+def test_full_cache_stops_growing_but_still_builds_statements():
+    statements = Statements("?", "MAX", max_size=2)
+
+    for table in ("a", "b", "c"):
+        assert statements.select(table) == f"SELECT * FROM {table}"
+    assert len(statements) == 2
+    assert statements.select("a") is statements.select("a")
+
+    disabled = Statements("?", "MAX", max_size=0)
+    assert disabled.select("a") == "SELECT * FROM a"
+    assert len(disabled) == 0
+
+
+def test_threads_building_the_same_statement_get_the_same_string():
+    statements = Statements("?", "MAX")
+    barrier = Barrier(8)
+    results = []
+
+    def build() -> None:
+        barrier.wait()
+        results.append(statements.select("users", ("user_name",)))
+
+    threads = [Thread(target=build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result is results[0] for result in results)
+    assert len(statements) == 1
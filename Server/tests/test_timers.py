@@ -0,0 +1,80 @@
+from queue import Queue
+from threading import Event
+from timers import TimerHeap
+
+
+def test_timers_fire_in_deadline_order():
+    heap = TimerHeap()
+    fired = Queue()
+
+    for delay in (0.06, 0.02, 0.04, 0.0):
+        heap.schedule(delay, fired.put, delay)
+
+    assert [fired.get(timeout=1) for _ in range(4)] == [0.0, 0.02, 0.04, 0.06]
+
+
+def test_timer_passes_its_arguments():
+    heap = TimerHeap()
+    fired = Queue()
+
+    heap.schedule(0, lambda *args: fired.put(args), 1, "two")
+
+    assert fired.get(timeout=1) == (1, "two")
+
+
+def test_cancelled_timer_does_not_fire():
+    heap = TimerHeap()
+    cancelled = Event()
+    done = Event()
+
+    heap.schedule(0.02, cancelled.set).cancel()
+    heap.schedule(0.05, done.set)
+
+    assert done.wait(1)
+    assert not cancelled.is_set()
+
+
+def test_new_nearest_timer_wakes_the_thread_up():
+    heap = TimerHeap()
+    fired = Event()
+
+    heap.schedule(60, lambda: None)  # The thread sleeps until this one...
+    heap.schedule(0.01, fired.set)   # ...and has to wake up for the nearer one.
+
+    assert fired.wait(1)
+
+
+def test_cancelled_timers_are_compacted():
+    heap = TimerHeap()
+
+    timers = [heap.schedule(60, lambda: None) for _ in range(200)]
+    for timer in timers[:150]:
+        timer.cancel()
+    heap.schedule(60, lambda: None)
+
+    # Compacted once most of the heap was cancelled timers.
+    assert len(heap) == 51
+    assert heap.cancelled == 0
+
+
+def test_failing_callback_does_not_stop_the_thread():
+    heap = TimerHeap()
+    done = Event()
+
+    heap.schedule(0, lambda: 1 / 0)
+    heap.schedule(0.01, done.set)
+
+    assert done.wait(1)
+
+
+def test_cancelling_a_fired_timer_is_not_counted():
+    heap = TimerHeap()
+    fired = Event()
+
+    timer = heap.schedule(0, fired.set)
+    assert fired.wait(1)
+    timer.cancel()
+    timer.cancel()
+
+    assert not timer.cancelled
+    assert heap.cancelled == 0
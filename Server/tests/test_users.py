@@ -0,0 +1,81 @@
+import pytest
+from models.users import Users
+
+
+@pytest.fixture
+def users(data):
+    users = Users(data)
+    users.add("Alice", "login-1", "password")
+    users.add("bob", "login-2", "password")
+    return users
+
+
+def test_found_user_is_cached(users, data, monkeypatch):
+    users.cache.clear()
+    assert users.find("ALICE")["user_name"] == "alice"
+
+    # Served from the cache, the database isn't asked again.
+    monkeypatch.setattr(data.database, "select_one", lambda *args: pytest.fail("not cached"))
+    assert users.find("alice")["last_login_id"] == "login-1"
+
+
+def test_writes_go_through_the_cache(users, database):
+    users.find("alice")
+
+    users.update_login("Alice", "login-3")
+    users.set_stat_defeats("alice", 7)
+
+    assert users.find("alice")["last_login_id"] == "login-3"
+    assert users.get_stat_defeats("alice") == 7
+    assert database.select_one("users", {"user_name": "alice"})["stat_defeats"] == 7
+
+
+def test_stat_increments_are_read_again(users):
+    users.find("alice")
+
+    users.update_stats("alice", {"stat_wins": 2, "stat_matches": 3}, longest_match=40)
+    users.update_stats("alice", {"stat_wins": 1}, longest_match=30)
+
+    user = users.find("alice")
+    assert (user["stat_wins"], user["stat_matches"], user["stat_longest_match"]) == (3, 3, 40)
+
+
+def test_rolled_back_writes_do_not_reach_the_cache(users, database):
+    users.find("alice")
+
+    with pytest.raises(RuntimeError):
+        with database.transaction():
+            users.set_stat_hits("alice", 50)
+            users.update_stats("alice", {"stat_wins": 5})
+            # The transaction sees its own writes...
+            assert users.get_stat_hits("alice") == 50
+            raise RuntimeError("rolled back")
+
+    # ...but nobody else does once it's rolled back.
+    assert users.get_stat_hits("alice") == 0
+    assert users.get_stat_wins("alice") == 0
+    assert users.leaderboard.rank("alice") == (1, 0)
+
+
+def test_stats_of_several_users_in_one_transaction(users):
+    updated = users.update_stats_many(
+        {
+            "alice": {"stat_wins": 1, "stat_matches": 1},
+            "bob": {"stat_defeats": 1, "stat_matches": 1},
+            "nobody": {"stat_wins": 1},
+        },
+        longest_match=25,
+    )
+
+    assert updated == 2
+    assert users.get_stat_wins("alice") == 1
+    assert users.get_stat_defeats("bob") == 1
+    assert users.get_stat_longest_match("bob") == 25
+
+
+def test_removed_user_is_not_found(users):
+    users.find("bob")
+
+    assert users.remove("BOB")
+    assert users.find("bob") is None
+    assert not users.remove("bob")
@@ -0,0 +1,112 @@
+from threading import Event, current_thread
+import pytest
+from databases import DatabaseWriter, Durability
+
+
+@pytest.fixture
+def table(database):
+    database.create_table("events", {"id": "INT PRIMARY KEY", "thread": "VARCHAR(40)"})
+    return database
+
+
+def insert(database, id: int) -> int:
+    database.insert("events", {"id": id, "thread": current_thread().name})
+    return id
+
+
+def ids(database) -> list[int]:
+    return sorted(row["id"] for row in database.select("events"))
+
+
+def test_close_writes_everything_that_is_queued(table):
+    writer = DatabaseWriter(table, batch_size=50)
+    blocked = Event()
+    # Keeps the writer thread busy, so the writes below pile up in the queue.
+    writer.write(blocked.wait, 5, durability=Durability.ASYNC)
+
+    futures = [writer.write(insert, table, id, durability=Durability.ASYNC) for id in range(500)]
+    assert writer.stats()["pending"] > 0
+
+    blocked.set()
+    writer.close()
+
+    assert ids(table) == list(range(500))
+    assert [future.result(0) for future in futures] == list(range(500))
+    stats = writer.stats()
+    assert stats["pending"] == 0
+    assert stats["written"] == 501
+    assert 1 < stats["batches"] < 501
+    assert stats["largest_batch"] <= 50
+    # Every write was made by the writer thread.
+    assert {row["thread"] for row in table.select("events")} == {"database-writer"}
+
+
+def test_writes_after_close_run_on_the_calling_thread(table):
+    writer = DatabaseWriter(table)
+    writer.close()
+
+    assert writer.write(insert, table, 1) == 1
+    assert table.select("events")[0]["thread"] == current_thread().name
+
+
+def test_committed_write_returns_its_result_or_raises(table):
+    writer = DatabaseWriter(table)
+
+    assert writer.write(insert, table, 1) == 1
+    with pytest.raises(Exception):
+        writer.write(insert, table, 1)  # Duplicate primary key
+
+    writer.close()
+    assert writer.stats()["errors"] == 1
+
+
+def test_failing_write_does_not_lose_the_rest_of_its_batch(table):
+    writer = DatabaseWriter(table, batch_size=100)
+    blocked = Event()
+    writer.write(blocked.wait, 5, durability=Durability.ASYNC)
+
+    # The sixth write duplicates the first one.
+    futures = [writer.write(insert, table, 0 if id == 5 else id, durability=Durability.ASYNC) for id in range(10)]
+    blocked.set()
+    writer.flush()
+
+    # Only the duplicate fails, the batch is written again without it.
+    assert ids(table) == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert futures[5].exception(0) is not None
+    assert all(future.exception(0) is None for index, future in enumerate(futures) if index != 5)
+    writer.close()
+
+
+def test_flush_waits_for_the_queued_writes(table):
+    writer = DatabaseWriter(table)
+
+    for id in range(100):
+        writer.write(insert, table, id, durability=Durability.ASYNC)
+    writer.flush()
+
+    assert ids(table) == list(range(100))
+    writer.close()
+
+
+def test_writes_inside_a_transaction_run_right_away(table):
+    writer = DatabaseWriter(table)
+
+    with pytest.raises(RuntimeError):
+        with table.transaction():
+            writer.write(insert, table, 1, durability=Durability.ASYNC)
+            assert ids(table) == [1]
+            raise RuntimeError("rolled back")
+
+    # The write was part of the transaction, so it was rolled back with it.
+    assert ids(table) == []
+    writer.close()
+
+
+def test_disabled_writer_runs_writes_on_the_calling_thread(table):
+    writer = DatabaseWriter(table, enabled=False)
+
+    future = writer.write(insert, table, 1, durability=Durability.ASYNC)
+
+    assert future.result(0) == 1
+    assert table.select("events")[0]["thread"] == current_thread().name
+    assert writer.stats()["queued"] == 0
@@ -0,0 +1,105 @@
+import heapq
+from itertools import count
+from threading import Thread, Condition
+from time import monotonic
+from log import Log
+
+
+class Timer:
+    """
+    Handle of a scheduled callback. Cancelling only marks the timer,
+    it is discarded when it reaches the top of the heap.
+    """
+
+    __slots__ = ("heap", "deadline", "callback", "args", "cancelled", "fired")
+
+    def __init__(self, heap: "TimerHeap", deadline: float, callback, args: tuple) -> None:
+        self.heap = heap
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self) -> None:
+        with self.heap.condition:
+            # Only a timer still in the heap counts towards its compaction.
+            if not self.cancelled and not self.fired:
+                self.cancelled = True
+                self.heap.cancelled += 1
+
+
+class TimerHeap:
+    """
+    A single thread serving the deadlines of every game session.
+
+    Timers are kept in a binary heap ordered by deadline, so scheduling and firing
+    cost O(log n) and the thread sleeps until the nearest deadline instead of each
+    session polling or sleeping on its own. Callbacks run on the timer thread and must be short.
+    """
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[float, int, Timer]] = []
+        self.cancelled = 0  # Number of cancelled timers still in the heap
+        self.sequence = count()  # Tie breaker for timers with equal deadlines
+        self.condition = Condition()
+        self.thread = None
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        """
+        Calls callback(*args) after delay seconds.
+        """
+        timer = Timer(self, monotonic() + delay, callback, args)
+
+        with self.condition:
+            # Deadlines are usually cancelled long before they expire (e.g. a shot clock on every shot),
+            # so the heap is compacted once most of it is cancelled timers.
+            if self.cancelled > 64 and self.cancelled * 2 > len(self.heap):
+                self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+                heapq.heapify(self.heap)
+                self.cancelled = 0
+
+            heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+
+            if self.thread is None:
+                self.thread = Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+            # Wake the thread up only if the new timer became the nearest one.
+            if self.heap[0][2] is timer:
+                self.condition.notify()
+
+        return timer
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while True:
+                    while self.heap and self.heap[0][2].cancelled:
+                        heapq.heappop(self.heap)
+                        self.cancelled -= 1
+
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+
+                    delay = self.heap[0][0] - monotonic()
+                    if delay > 0:
+                        self.condition.wait(delay)
+                        continue
+
+                    _, _, timer = heapq.heappop(self.heap)
+                    timer.fired = True
+                    break
+
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                Log.exception("An error occurred in a timer callback", e)
+
+
+# Timers shared by all game sessions.
+timers = TimerHeap()
@@ -4,11 +4,13 @@ from typing import Optional
 from queue import Queue
 from threading import Thread
 from contextlib import suppress
+from time import time
 from settings import MAX_USERS, MAX_USER_NAME_LENGTH, DEBUG
 from network import Network
 from packet import Packet
+from databases import Durability
 from log import Log
-from game_session import Session
+from game_session import Session, GAME_RULES, DEFAULT_GAME_VARIANT
 
 class User:
     # Enum for representing different states of a user's connection and required operations.
@@ -28,6 +30,9 @@ class User:
     # A queue to hold players waiting for a game session assignment.
     waiting_players = Queue()
 
+    # Users are human players, see Bot for computer ones.
+    is_bot = False
+
     @staticmethod
     def append_user_in_list(server, user) -> None:
         """
@@ -96,6 +101,18 @@ class User:
         # Session management: the user might be waiting to join a game session.
         self.session = None
         self.is_looking_for_session = True
+        self.looking_since = time()  # When the user started looking for a session
+
+        # The game variant (board size and fleet) the user wants to play, see GAME_VARIANTS.
+        self.variant = DEFAULT_GAME_VARIANT
+
+        # The session the user is watching as a spectator, if any.
+        self.spectating = None
+        # Whether the user was looking for a session when they started spectating, restored when they stop.
+        self.was_looking_for_session = False
+
+        # Optional protocol features the client supports (see packet.py), advertised in the handshake.
+        self.features = set()
 
         # Enforce global maximum users: if exceeded, immediately refuse the connection.
         if len(User.get_users(self.server)) > MAX_USERS:
@@ -116,6 +133,7 @@ class User:
         if response.code == Packet.Code.USERNAME_AND_ID:
             self.name: str = response.data["name"]
             self.id: str = response.data["uid"]
+            self.features = set(response.data.get("features") or ())
 
             # Initialize a user-specific logger for contextual debugging and tracing.
             self.logger = Log.User(self.net.ip, self.name)
@@ -165,12 +183,7 @@ class User:
             self.disconnect_user()
 
     def is_in_black_list(self):
-        black_list = self.server.server_data.black_list.get()
-
-        for user in black_list:
-            if user["user_name"] == self.name or user["user_id"] == self.id:
-                return True
-        return False
+        return self.server.server_data.black_list.is_banned(self.name, self.id)
 
     def is_registred(self) -> bool:
         if not self.is_authorised:
@@ -222,7 +235,8 @@ class User:
 
                     if password == user["password"]:
                         self.is_authorised = True
-                        self.server.server_data.users.update_login(self.name, self.id)
+                        # The login id is only checked on the next connection, the thread doesn't wait for the write.
+                        self.server.server_data.users.update_login(self.name, self.id, durability=Durability.ASYNC)
                         self.logger.info("The user has successfully logged in")
                         self.net.send(Packet(Packet.Code.OK))
                         return True
@@ -309,6 +323,7 @@ class User:
 
     def on_disconnect(self):
         with suppress(Exception):
+            self.stop_spectating()
             self.disconnect_user()
             self.logger.info("User has been disconnected.")
 
@@ -327,6 +342,74 @@ class User:
     def disconnect_session(self, find_new_session: bool = False):
         self.session = None
         self.is_looking_for_session = find_new_session
+        self.looking_since = time()
+
+    def spectate(self, session_id: int) -> Packet:
+        """
+        Starts watching the session with the given id.
+        A user can't spectate while playing, and stops looking for a session of their own while watching
+        (until stop_spectating(), e.g. when the watched session ends).
+        """
+        session = Session.get_session_by_id(session_id)
+        if not session:
+            return Packet(
+                Packet.Code.ERROR,
+                {
+                    "error_code": Network.Errors.UNEXPECTED_PACKET.value,
+                    "msg": Network.ErrorMessages.SESSION_NOT_FOUND.value,
+                },
+            )
+
+        self.stop_spectating()
+        if self.session or not session.spectate(self):
+            return Packet(
+                Packet.Code.ERROR,
+                {
+                    "error_code": Network.Errors.UNEXPECTED_PACKET.value,
+                    "msg": Network.ErrorMessages.CANNOT_SPECTATE_SESSION.value,
+                },
+            )
+
+        self.spectating = session
+        self.was_looking_for_session = self.is_looking_for_session
+        self.is_looking_for_session = False
+        self.logger.info(f"Started spectating session #{session.id}.")
+        return Packet(Packet.Code.OK)
+
+    def choose_variant(self, variant: str = None) -> Packet:
+        """
+        Sets the game variant the user wants to play; it applies to the next session the user is matched into.
+        Without a variant only the current choice is reported. The reply lists the rules of all variants.
+        """
+        if variant is not None:
+            if variant not in GAME_RULES:
+                return Packet(
+                    Packet.Code.ERROR,
+                    {
+                        "error_code": Network.Errors.UNCORRECT_PACKET.value,
+                        "msg": Network.ErrorMessages.UNKNOWN_GAME_VARIANT.value,
+                    },
+                )
+
+            self.variant = variant
+            self.logger.info(f"Chose the game variant '{variant}'.")
+
+        return Packet(
+            Packet.Code.RULES,
+            {
+                "variant": self.variant,
+                "variants": [rules.to_dict() for rules in GAME_RULES.values()],
+            },
+        )
+
+    def stop_spectating(self) -> None:
+        session = self.spectating
+        if session:
+            self.spectating = None
+            session.spectators.unsubscribe(self)
+            # Back to the lobby: a user who was looking for a session before watching is matched again.
+            self.is_looking_for_session = self.was_looking_for_session
+            self.looking_since = time()
 
     @Log.log_logger.catch
     def _handle_user(self, request) -> Optional[Packet]:
@@ -350,6 +433,17 @@ class User:
                 if not self._register():
                     return None
 
+            if request.code == Packet.Code.SPECTATE:
+                # Spectators subscribe to an existing session instead of being matched into a new one.
+                if request.data and "session_id" in request.data:
+                    return self.spectate(request.data["session_id"])
+                self.stop_spectating()
+                return Packet(Packet.Code.OK)
+
+            if request.code == Packet.Code.RULES:
+                # Handled before matchmaking, so a client can choose the variant with its first request.
+                return self.choose_variant(request.data.get("variant") if request.data else None)
+
             if not self.session and self.is_looking_for_session:
                 self.connect_session()
 
@@ -365,9 +459,11 @@ class User:
                 if request.data == self.UserConnectionStatus.DISCONNECTED.value:
                     return None
                 if request.data == self.UserConnectionStatus.FIND_NEW_SESSION.value:
+                    self.stop_spectating()
                     self.disconnect_session(True)
                     return Packet(Packet.Code.OK)
                 if request.data == self.UserConnectionStatus.LEAVE_SESSION.value:
+                    self.stop_spectating()
                     self.disconnect_session(False)
                     return Packet(Packet.Code.OK)
 